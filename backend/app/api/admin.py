@@ -0,0 +1,141 @@
+"""Admin API endpoints for operational visibility."""
+
+import secrets
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+from app.config import get_settings
+from app.middleware.profiling import get_profiler
+from app.services.admission import get_admission_controller
+from app.services.model_router import get_model_router
+from app.services.openai_service import get_stream_stats
+from app.services.paraphrase_index import get_paraphrase_index
+from app.services.resilience import get_upstream_resilience
+from app.services.response_cache import get_response_cache
+from app.services.session_store import get_session_store
+from app.services.singleflight import get_singleflight
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+
+def require_admin(
+    x_admin_token: Annotated[str | None, Header()] = None,
+) -> None:
+    """
+    Reject requests that do not carry the configured admin token.
+
+    Admin endpoints are hidden (404) when no ``ADMIN_TOKEN`` is configured.
+    """
+    admin_token = get_settings().admin_token
+    if not admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not secrets.compare_digest(
+        x_admin_token, admin_token
+    ):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+def require_metrics_token(
+    authorization: Annotated[str | None, Header()] = None,
+) -> None:
+    """
+    Reject scrapes that do not carry ``Authorization: Bearer <METRICS_TOKEN>``.
+
+    Metrics expose cache, session, pool and breaker internals, so the
+    endpoint is hidden (404) when no ``METRICS_TOKEN`` is configured.
+    """
+    metrics_token = get_settings().metrics_token
+    if not metrics_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token, metrics_token):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+@router.get("/pool", dependencies=[Depends(require_admin)])
+async def pool_stats(request: Request) -> dict[str, int]:
+    """Report upstream connection pool usage for capacity sizing."""
+    pool = getattr(request.app.state, "openai_pool", None)
+    if pool is None:
+        raise HTTPException(status_code=503, detail="Client pool not started")
+    return pool.pool_stats()
+
+
+@router.get("/cache", dependencies=[Depends(require_admin)])
+async def cache_stats() -> dict[str, int]:
+    """Report response cache size and hit/miss/eviction counters."""
+    return get_response_cache().stats()
+
+
+@router.post("/cache/flush", dependencies=[Depends(require_admin)])
+async def flush_cache() -> dict[str, int]:
+    """Drop all cached responses (for example after a prompt change)."""
+    removed = get_response_cache().clear()
+    return {
+        "flushed": removed["entries"],
+        "persistent_flushed": removed.get("persistent_entries", 0),
+        "paraphrases_flushed": get_paraphrase_index().clear(),
+    }
+
+
+@router.get("/paraphrase", dependencies=[Depends(require_admin)])
+async def paraphrase_stats() -> dict[str, int]:
+    """Report paraphrase index size and hit/miss/eviction counters."""
+    return get_paraphrase_index().stats()
+
+
+@router.get("/routing", dependencies=[Depends(require_admin)])
+async def routing_stats() -> dict[str, int]:
+    """Report requests, tokens and summed latencies per routing rule and arm."""
+    return get_model_router().stats()
+
+
+@router.get("/singleflight", dependencies=[Depends(require_admin)])
+async def singleflight_stats() -> dict[str, int]:
+    """Report in-flight completions and how many requests were coalesced."""
+    return get_singleflight().stats()
+
+
+@router.get("/sessions", dependencies=[Depends(require_admin)])
+async def session_stats() -> dict[str, int]:
+    """Report stored conversation sessions and memory use."""
+    return get_session_store().stats()
+
+
+@router.get("/streams", dependencies=[Depends(require_admin)])
+async def stream_stats() -> dict[str, int]:
+    """Report upstream streams cancelled on disconnect and tokens saved."""
+    return get_stream_stats().as_dict()
+
+
+@router.get("/admission", dependencies=[Depends(require_admin)])
+async def admission_stats() -> dict[str, int]:
+    """Report the upstream concurrency limit, queue and rejections."""
+    return get_admission_controller().stats()
+
+
+@router.get("/profiles", dependencies=[Depends(require_admin)])
+async def list_profiles() -> list[dict[str, str | int]]:
+    """List recent request profiles, newest first."""
+    return get_profiler().store.list()
+
+
+@router.get(
+    "/profiles/{name}",
+    dependencies=[Depends(require_admin)],
+    response_class=PlainTextResponse,
+)
+async def get_profile(name: str) -> str:
+    """Download a profile in folded-stack format (for flamegraph tools)."""
+    folded = get_profiler().store.read(name)
+    if folded is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return folded
+
+
+@router.get("/resilience", dependencies=[Depends(require_admin)])
+async def resilience_stats() -> dict[str, int]:
+    """Report circuit breaker state and upstream retry and hedge counts."""
+    return get_upstream_resilience().stats()
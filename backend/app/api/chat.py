@@ -1,16 +1,66 @@
 """Chat API endpoint."""
 
-import json
 import logging
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import aclosing
+from dataclasses import dataclass
+from functools import partial
 from typing import Annotated
 
+import anyio
 from fastapi import APIRouter, Depends, Request
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from openai import OpenAIError
 from pydantic import BaseModel, Field
 
-from app.middleware.rate_limit import limiter
+from app.config import get_settings
+from app.middleware.rate_limit import enforce_chat_limit
+from app.middleware.token_quota import TokenQuota, get_token_quota
+from app.prompts.system_prompt import SYSTEM_PROMPT_VERSION
+from app.services.admission import (
+    AdmissionController,
+    UpstreamOverloaded,
+    get_admission_controller,
+)
+from app.services.context_builder import (
+    ContextBuilder,
+    get_context_builder,
+)
+from app.services.drain import DrainController, get_drain_controller
+from app.services.intent_classifier import (
+    IntentClassifier,
+    get_intent_classifier,
+    split_template,
+)
+from app.services.metrics import StreamTimings, get_metrics
+from app.services.model_router import ModelRoute, ModelRouter, get_model_router
 from app.services.openai_service import OpenAIService, get_openai_service
+from app.services.paraphrase_index import ParaphraseIndex, get_paraphrase_index
+from app.services.prompt_builder import PromptBuilder, get_prompt_builder
+from app.services.resilience import (
+    FALLBACK_REPLY,
+    CircuitOpen,
+    UpstreamResilience,
+    UpstreamTimeout,
+    get_upstream_resilience,
+)
+from app.services.response_cache import ResponseCache, get_response_cache
+from app.services.session_store import SessionStore, get_session_store
+from app.services.singleflight import (
+    Flight,
+    FlightCancelled,
+    SingleFlight,
+    get_singleflight,
+)
+from app.services.sse import (
+    DONE_FRAME,
+    ERROR_FRAME,
+    coalesce_chunks,
+    content_frame,
+    with_event_id,
+)
+from app.services.stream_buffer import StreamBuffer, get_stream_buffer, parse_event_id
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +68,10 @@ router = APIRouter(prefix="/api", tags=["chat"])
 
 # Maximum characters allowed in a chat message (keep in sync with frontend)
 MAX_MESSAGE_LENGTH = 500
+# Maximum characters in one history message (long assistant replies included)
+MAX_HISTORY_CONTENT_LENGTH = 8_000
+# Reply sources that generated tokens for the client; replays are free
+CHARGED_SOURCES = frozenset({"upstream", "shared"})
 
 
 class ChatRequest(BaseModel):
@@ -30,7 +84,11 @@ class ChatRequest(BaseModel):
             description="Message role: user or assistant",
             pattern="^(user|assistant)$",
         )
-        content: str = Field(min_length=1, description="Message content")
+        content: str = Field(
+            min_length=1,
+            max_length=MAX_HISTORY_CONTENT_LENGTH,
+            description="Message content",
+        )
 
     message: Annotated[
         str,
@@ -44,6 +102,16 @@ class ChatRequest(BaseModel):
         default_factory=list,
         description="Recent conversation history (user and assistant messages)",
     )
+    conversation_id: str | None = Field(
+        default=None,
+        max_length=64,
+        description="Server-side conversation to continue (session mode)",
+    )
+    session: bool = Field(
+        default=False,
+        description="Start a server-side conversation; its ID is returned "
+        "in the X-Conversation-Id header",
+    )
 
 
 class ErrorResponse(BaseModel):
@@ -53,44 +121,530 @@ class ErrorResponse(BaseModel):
     detail: str | None = None
 
 
+async def _replay_chunks(chunks: list[str]) -> AsyncIterator[str]:
+    """Replay cached content chunks as if they were streamed."""
+    for chunk in chunks:
+        yield chunk
+
+
+async def _store_when_complete(
+    source: AsyncIterator[str], on_complete: Callable[[list[str]], None]
+) -> AsyncIterator[str]:
+    """Pass chunks through and hand the full list over once the stream ends."""
+    chunks: list[str] = []
+    async for chunk in source:
+        chunks.append(chunk)
+        yield chunk
+    on_complete(chunks)
+
+
+async def _charge_when_closed(
+    chunks: AsyncIterator[str],
+    reply: "PlannedReply",
+    charge: Callable[[int], Awaitable[None]],
+) -> AsyncIterator[str]:
+    """Pass chunks through, then charge the upstream tokens however it ended."""
+    try:
+        async with aclosing(chunks):
+            async for chunk in chunks:
+                yield chunk
+    finally:
+        reply.record_shared_tokens()
+        if reply.timings.source in CHARGED_SOURCES:
+            # Shielded so a disconnect or cancel cannot skip the charge
+            with anyio.CancelScope(shield=True):
+                await charge(reply.timings.tokens)
+
+
+async def _close_with(
+    chunks: AsyncIterator[str], source: AsyncIterator[str]
+) -> AsyncIterator[str]:
+    """Pass coalesced chunks through and close their source along with them."""
+    async with aclosing(source), aclosing(chunks):
+        async for chunk in chunks:
+            yield chunk
+
+
+async def _plain_frames(
+    chunks: AsyncIterator[str],
+    on_response: Callable[[str], Awaitable[None]] | None,
+) -> AsyncIterator[bytes]:
+    """Frame content chunks without event IDs."""
+    reply: list[str] = []
+    async with aclosing(chunks):
+        async for chunk in chunks:
+            reply.append(chunk)
+            yield content_frame(chunk)
+    if on_response is not None:
+        await on_response("".join(reply))
+    yield DONE_FRAME
+
+
+async def _buffered_frames(
+    stream_id: str, stream: Flight, start: int = 0
+) -> AsyncIterator[bytes]:
+    """
+    Frame a buffered stream from a chunk offset, with resumable event IDs.
+
+    Each event ID is ``<stream_id>:<chunks delivered so far>``, so the ID a
+    client last saw is exactly the offset to resume from.
+    """
+    offset = start
+    async with aclosing(stream.subscribe(start)) as chunks:
+        async for chunk in chunks:
+            offset += 1
+            yield with_event_id(content_frame(chunk), f"{stream_id}:{offset}")
+    yield with_event_id(DONE_FRAME, f"{stream_id}:{offset}")
+
+
+def _sse_response(frames: AsyncIterator[bytes]) -> StreamingResponse:
+    return StreamingResponse(
+        frames,
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+@dataclass
+class PlannedReply:
+    """
+    Where a reply's content comes from, decided before the response starts.
+
+    Built by ``plan_reply`` and shared by the SSE and WebSocket transports,
+    which only differ in how they frame the chunks of ``open``.
+    """
+
+    cache_key: str
+    cached_chunks: list[str] | None
+    replay_source: str
+    open_upstream: Callable[[], AsyncIterator[str]]
+    store: Callable[[list[str]], None]
+    singleflight: SingleFlight | None
+    timings: StreamTimings
+    # False for the canned fallback, which is not part of the conversation
+    conversational: bool = True
+    flight: Flight | None = None
+    route: ModelRoute | None = None
+    router: ModelRouter | None = None
+
+    def open(
+        self, charge: Callable[[int], Awaitable[None]] | None = None
+    ) -> AsyncIterator[str]:
+        """
+        Start streaming the reply.
+
+        Args:
+            charge: Called when the reply ends, completed or not, with the
+                upstream tokens it streamed. Not called for replays.
+
+        Returns:
+            Content chunks, coalesced into flush-sized pieces; closing the
+            iterator releases the upstream stream.
+        """
+        settings = get_settings()
+        timings = self.timings
+        if self.cached_chunks is not None:
+            timings.source = self.replay_source
+            timings.tokens = len(self.cached_chunks)
+            source = _replay_chunks(self.cached_chunks)
+        elif self.singleflight is not None:
+
+            def start_upstream() -> AsyncIterator[str]:
+                # Only called when this request starts a new flight
+                timings.source = "upstream"
+                return self.open_upstream()
+
+            timings.source = "shared"
+            if self.flight is None:
+                self.flight = self.singleflight.join(
+                    self.cache_key, start_upstream, on_complete=self.store
+                )
+            else:
+                self.singleflight.record_join(self.cache_key)
+            # A flight joined while planning is replayed even if it ended since
+            source = self.flight.subscribe()
+        else:
+            source = _store_when_complete(self.open_upstream(), self.store)
+        chunks = _close_with(
+            coalesce_chunks(
+                source,
+                max_bytes=settings.sse_flush_bytes,
+                max_delay=settings.sse_flush_interval_ms / 1000,
+            ),
+            source,
+        )
+        if charge is None:
+            return chunks
+        return _charge_when_closed(chunks, self, charge)
+
+    def record_shared_tokens(self) -> None:
+        """Count the tokens of a joined flight, which this request never saw."""
+        if self.flight is not None and self.timings.source == "shared":
+            self.timings.tokens = len(self.flight.chunks)
+
+    def record_route(self) -> None:
+        """Count a reply generated upstream under its route's rule and arm."""
+        if self.router is not None and self.timings.source == "upstream":
+            self.router.record(self.route, self.timings)
+
+
+@dataclass
+class ChatServices:
+    """Services a chat reply goes through; a missing one skips its step."""
+
+    cache: ResponseCache | None = None
+    singleflight: SingleFlight | None = None
+    context_builder: ContextBuilder | None = None
+    admission: AdmissionController | None = None
+    prompt_builder: PromptBuilder | None = None
+    intent_classifier: IntentClassifier | None = None
+    resilience: UpstreamResilience | None = None
+    paraphrase_index: ParaphraseIndex | None = None
+    model_router: ModelRouter | None = None
+    stream_buffer: StreamBuffer | None = None
+    drain: DrainController | None = None
+
+
+def get_chat_services(
+    cache: Annotated[ResponseCache, Depends(get_response_cache)],
+    singleflight: Annotated[SingleFlight, Depends(get_singleflight)],
+    context_builder: Annotated[ContextBuilder, Depends(get_context_builder)],
+    admission: Annotated[AdmissionController, Depends(get_admission_controller)],
+    prompt_builder: Annotated[PromptBuilder, Depends(get_prompt_builder)],
+    intent_classifier: Annotated[IntentClassifier, Depends(get_intent_classifier)],
+    resilience: Annotated[UpstreamResilience, Depends(get_upstream_resilience)],
+    paraphrase_index: Annotated[ParaphraseIndex, Depends(get_paraphrase_index)],
+    model_router: Annotated[ModelRouter, Depends(get_model_router)],
+    stream_buffer: Annotated[StreamBuffer, Depends(get_stream_buffer)],
+    drain: Annotated[DrainController, Depends(get_drain_controller)],
+) -> ChatServices:
+    """Get the process-wide chat services as one dependency."""
+    return ChatServices(
+        cache=cache,
+        singleflight=singleflight,
+        context_builder=context_builder,
+        admission=admission,
+        prompt_builder=prompt_builder,
+        intent_classifier=intent_classifier,
+        resilience=resilience,
+        paraphrase_index=paraphrase_index,
+        model_router=model_router,
+        stream_buffer=stream_buffer,
+        drain=drain,
+    )
+
+
+async def plan_reply(
+    service: OpenAIService,
+    message: str,
+    history: list[dict[str, str]],
+    services: ChatServices | None = None,
+    timings: StreamTimings | None = None,
+    conversation: str | None = None,
+) -> PlannedReply:
+    """
+    Decide how a message is answered, rejecting it if the upstream can't.
+
+    Local intent replies, cached and paraphrased answers are replayed;
+    anything else streams from the upstream with the routed parameters,
+    shared between identical concurrent requests.
+
+    Args:
+        service: OpenAI service instance.
+        message: User message.
+        history: Prior conversation messages.
+        services: Optional services the reply goes through.
+        timings: Optional request timings, filled in while streaming.
+        conversation: Conversation or client identifier for A/B routing.
+
+    Returns:
+        The planned reply, ready to ``open``.
+
+    Raises:
+        UpstreamOverloaded: If a new upstream stream could not start in time.
+        CircuitOpen: If the upstream is failing and no fallback is configured.
+    """
+    settings = get_settings()
+    services = services or ChatServices()
+    cache = services.cache
+    singleflight = services.singleflight
+    admission = services.admission
+    resilience = services.resilience
+    paraphrase_index = services.paraphrase_index
+    model_router = services.model_router
+    timings = timings or StreamTimings()
+    classifier = services.intent_classifier
+    # Classified once here for both the local reply and the model router
+    intent = None
+    if classifier is not None and (
+        classifier.enabled or (model_router is not None and model_router.rules)
+    ):
+        intent = classifier.classify(message)
+    local_reply = None
+    if classifier is not None:
+        local_reply = classifier.route(message, bool(history), intent)
+    history_messages = history
+    if services.context_builder is not None:
+        history_messages = services.context_builder.build(
+            history_messages, message
+        ).history
+    system_prompt = None
+    prompt_version = SYSTEM_PROMPT_VERSION
+    if services.prompt_builder is not None and local_reply is None:
+        prompt = services.prompt_builder.build(message, history_messages)
+        system_prompt, prompt_version = prompt.text, prompt.version
+    route = None
+    completion_options = {}
+    if model_router is not None and local_reply is None:
+        route = model_router.route(message, history, intent, conversation)
+        completion_options = {
+            "model": route.model,
+            "max_tokens": route.max_tokens,
+            "temperature": route.temperature,
+        }
+    cache_model = service.model if route is None else route.cache_model
+    cache_key = ResponseCache.make_key(
+        cache_model, prompt_version, history_messages, message
+    )
+    cached_chunks = local_reply
+    if cached_chunks is None and cache is not None and cache.enabled:
+        cached_chunks = await cache.lookup(cache_key)
+    replay_source = "cache" if local_reply is None else "intent"
+    # Answers to openers do not depend on anything but the question
+    use_index = paraphrase_index is not None and not history_messages
+    index_version = f"{cache_model}:{prompt_version}"
+    if cached_chunks is None and use_index:
+        cached_chunks = paraphrase_index.lookup(message, index_version)
+        if cached_chunks is not None:
+            replay_source = "paraphrase"
+    conversational = True
+    # Joined here, where followers skip the breaker and admission checks
+    flight = None
+    if singleflight is not None and cached_chunks is None:
+        flight = singleflight.find(cache_key)
+    joins_flight = flight is not None
+    if resilience is not None and cached_chunks is None and not joins_flight:
+        try:
+            resilience.check()
+        except CircuitOpen:
+            if not settings.upstream_breaker_fallback:
+                raise
+            resilience.fallbacks += 1
+            cached_chunks, replay_source = split_template(FALLBACK_REPLY), "fallback"
+            conversational = False
+    if admission is not None and cached_chunks is None and not joins_flight:
+        admission.check()
+
+    def open_upstream() -> AsyncIterator[str]:
+        def create(attempt_timings: StreamTimings) -> AsyncIterator[str]:
+            return service.create_chat_stream(
+                message,
+                history_messages,
+                timings=attempt_timings,
+                system_prompt=system_prompt,
+                **completion_options,
+            )
+
+        def attempt(attempt_timings: StreamTimings) -> AsyncIterator[str]:
+            if admission is None:
+                return create(attempt_timings)
+            return admission.admitted(partial(create, attempt_timings))
+
+        if resilience is None:
+            return attempt(timings)
+        return resilience.stream(attempt, timings)
+
+    def store(chunks: list[str]) -> None:
+        if cache is not None and chunks:
+            cache.set(cache_key, chunks)
+        if use_index:
+            paraphrase_index.add(message, chunks, index_version)
+
+    return PlannedReply(
+        cache_key=cache_key,
+        cached_chunks=cached_chunks,
+        replay_source=replay_source,
+        open_upstream=open_upstream,
+        store=store,
+        singleflight=singleflight,
+        timings=timings,
+        conversational=conversational,
+        flight=flight,
+        route=route,
+        router=model_router,
+    )
+
+
 async def generate_sse_stream(
     service: OpenAIService,
     message: str,
-    history: list[ChatRequest.ChatMessage],
+    history: list[dict[str, str]],
+    services: ChatServices | None = None,
+    on_response: Callable[[str], Awaitable[None]] | None = None,
+    timings: StreamTimings | None = None,
+    conversation: str | None = None,
+    charge: Callable[[int], Awaitable[None]] | None = None,
+    request_key: str | None = None,
 ) -> StreamingResponse:
     """
     Generate Server-Sent Events stream for chat response.
 
+    The reply is planned by ``plan_reply`` and its chunks are framed as
+    SSE. With a stream buffer, frames carry ``id:`` fields and the response
+    can be resumed after a disconnect (see ``resume_sse_stream``); its ID is
+    returned in the X-Stream-Id header. With a drain controller, the stream
+    is ended with a terminal event if it outlives the shutdown grace period.
+
     Args:
         service: OpenAI service instance.
         message: User message.
+        history: Prior conversation messages.
+        services: Optional services the reply goes through.
+        on_response: Called with the full reply once it streamed successfully.
+        timings: Optional request timings; recorded and logged at the end.
+        conversation: Conversation or client identifier for A/B routing.
+        charge: Called with the upstream tokens streamed, however the reply
+            ends (see ``PlannedReply.open``).
+        request_key: Key from ``StreamBuffer.make_key`` that a resuming
+            request must match.
 
     Yields:
         SSE formatted content chunks.
+
+    Raises:
+        UpstreamOverloaded: If a new upstream stream could not start in time.
+        CircuitOpen: If the upstream is failing and no fallback is configured.
     """
+    services = services or ChatServices()
+    stream_buffer = services.stream_buffer
+    drain = services.drain
+    timings = timings or StreamTimings()
+    reply = await plan_reply(
+        service, message, history, services, timings, conversation
+    )
+    if not reply.conversational:
+        on_response = None
+
+    async def finish(chunks: list[str]) -> None:
+        if on_response is not None:
+            await on_response("".join(chunks))
+
+    buffered = stream_buffer is not None and stream_buffer.enabled
+    stream_id = stream_buffer.new_id() if buffered else None
 
     async def event_generator():
         try:
-            async for chunk in service.create_chat_stream(
-                message,
-                [{"role": item.role, "content": item.content} for item in history],
-            ):
-                data = json.dumps({"content": chunk})
-                yield f"data: {data}\n\n"
-            yield "data: [DONE]\n\n"
-        except OpenAIError:
-            error_data = json.dumps({"error": "Failed to generate response"})
-            yield f"data: {error_data}\n\n"
+            chunks = reply.open(charge)
+            if buffered:
+                # The buffered stream owns the source: on disconnect it keeps
+                # generating for the resume grace period instead of closing
+                stream = stream_buffer.open(
+                    stream_id, chunks, on_complete=finish, request_key=request_key
+                )
+                frames = _buffered_frames(stream_id, stream)
+            else:
+                # Closed on disconnect so the upstream is released now
+                frames = _plain_frames(chunks, on_response)
+            if drain is not None:
+                frames = drain.guard(frames)
+            async with aclosing(frames):
+                async for frame in frames:
+                    if timings.first_frame is None and not frame.endswith(
+                        DONE_FRAME
+                    ):
+                        timings.first_frame = time.perf_counter()
+                    yield frame
+        except (OpenAIError, FlightCancelled, UpstreamOverloaded, UpstreamTimeout):
+            yield ERROR_FRAME
+        finally:
+            reply.record_shared_tokens()
+            reply.record_route()
+            logger.info("[CHAT_TIMING] %s", timings.record(get_metrics()))
 
-    return StreamingResponse(
-        event_generator(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-        },
+    response = _sse_response(event_generator())
+    if stream_id is not None:
+        response.headers["X-Stream-Id"] = stream_id
+    return response
+
+
+def resume_sse_stream(
+    stream_id: str,
+    stream: Flight,
+    offset: int,
+    drain: DrainController | None = None,
+) -> StreamingResponse:
+    """
+    Continue a buffered stream for a reconnecting client.
+
+    Chunks after ``offset`` are replayed from the buffer and, if the
+    generation is still running, followed live; no upstream call is made.
+
+    Args:
+        stream_id: ID of the buffered stream.
+        stream: The buffered stream.
+        offset: Number of chunks the client already received.
+        drain: Optional controller that can end the stream on shutdown.
+
+    Returns:
+        SSE response with the remaining frames.
+    """
+
+    async def event_generator():
+        frames = _buffered_frames(stream_id, stream, offset)
+        if drain is not None:
+            frames = drain.guard(frames)
+        try:
+            async with aclosing(frames):
+                async for frame in frames:
+                    yield frame
+        except (OpenAIError, FlightCancelled, UpstreamOverloaded, UpstreamTimeout):
+            yield ERROR_FRAME
+
+    response = _sse_response(event_generator())
+    response.headers["X-Stream-Id"] = stream_id
+    return response
+
+
+async def warm_response_cache(service: OpenAIService, questions: list[str]) -> int:
+    """
+    Pre-fill the response cache by answering questions in the background.
+
+    Questions already cached (in memory or on disk) are replayed without an
+    upstream call, so warming after a redeploy is cheap.
+
+    Args:
+        service: OpenAI service instance.
+        questions: Messages to answer, each as a new conversation.
+
+    Returns:
+        Number of questions answered successfully.
+    """
+    services = ChatServices(
+        cache=get_response_cache(),
+        singleflight=get_singleflight(),
+        context_builder=get_context_builder(),
+        admission=get_admission_controller(),
+        prompt_builder=get_prompt_builder(),
+        intent_classifier=get_intent_classifier(),
+        resilience=get_upstream_resilience(),
+        paraphrase_index=get_paraphrase_index(),
+        model_router=get_model_router(),
     )
+    warmed = 0
+    for question in questions:
+        try:
+            response = await generate_sse_stream(service, question, [], services)
+        except (UpstreamOverloaded, CircuitOpen):
+            continue
+        frames = [frame async for frame in response.body_iterator]
+        if frames and frames[-1] == DONE_FRAME:
+            warmed += 1
+    logger.info("[CACHE] Warmed %d/%d example questions", warmed, len(questions))
+    return warmed
 
 
 @router.post(
@@ -99,24 +653,96 @@ async def generate_sse_stream(
     responses={
         200: {"description": "Streaming chat response"},
         400: {"model": ErrorResponse, "description": "Invalid request"},
+        404: {"model": ErrorResponse, "description": "Conversation not found"},
         429: {"model": ErrorResponse, "description": "Rate limit exceeded"},
         500: {"model": ErrorResponse, "description": "Internal server error"},
+        503: {
+            "model": ErrorResponse,
+            "description": "Upstream busy or failing, or server shutting down; "
+            "retry later",
+        },
     },
+    dependencies=[Depends(enforce_chat_limit)],
 )
-@limiter.limit("20/hour")
 async def chat(
     request: Request,
     chat_request: ChatRequest,
     service: Annotated[OpenAIService, Depends(get_openai_service)],
+    services: Annotated[ChatServices, Depends(get_chat_services)],
+    sessions: Annotated[SessionStore, Depends(get_session_store)],
+    quota: Annotated[TokenQuota, Depends(get_token_quota)],
 ) -> StreamingResponse:
     """
     Send a message to the portfolio chatbot and receive a streaming response.
 
     The chatbot will respond with information about Vadym's professional
     background, skills, and experience as an AI QA Engineer.
+
+    In session mode the server keeps the conversation: start one with
+    ``session: true`` and send only ``message`` plus ``conversation_id`` on
+    later turns.
+
+    Frames carry ``id:`` fields. After a dropped connection, repeat the same
+    request with the last seen ID in the ``Last-Event-ID`` header to receive
+    the rest of the same response; the X-Stream-Id response header tells
+    whether it was resumed (same ID) or generated anew.
+
+    During a shutdown new requests get a 503, and a response still running
+    when the grace period ends finishes with ``{"error": ..., "retry": true}``.
     """
+    drain = services.drain
+    stream_buffer = services.stream_buffer
+    drain.check()
+    timings = StreamTimings()
     client_ip = request.client.host if request.client else "unknown"
-    logger.info(f"[CHAT] IP {client_ip} - Message: {chat_request.message[:50]}...")
-    return await generate_sse_stream(
-        service, chat_request.message, chat_request.history
+    await quota.check(client_ip)
+    # A different message sent with a stale header is answered anew
+    request_key = StreamBuffer.make_key(chat_request.model_dump_json())
+    last_event = parse_event_id(request.headers.get("last-event-id"))
+    if last_event is not None and stream_buffer.enabled:
+        stream_id, offset = last_event
+        stream = stream_buffer.get(stream_id, request_key)
+        if stream is not None:
+            return resume_sse_stream(stream_id, stream, offset, drain)
+    logger.info("[CHAT] IP %s - Message: %s...", client_ip, chat_request.message[:50])
+    history = [
+        {"role": item.role, "content": item.content} for item in chat_request.history
+    ]
+
+    conversation_id = chat_request.conversation_id
+    if conversation_id is not None:
+        stored = await sessions.load(conversation_id)
+        if stored is None:
+            return JSONResponse(
+                status_code=404, content={"error": "Conversation not found"}
+            )
+        history = stored
+    elif chat_request.session:
+        conversation_id = await sessions.create(history)
+
+    async def on_response(reply: str) -> None:
+        if conversation_id is not None:
+            await sessions.append(
+                conversation_id,
+                [
+                    {"role": "user", "content": chat_request.message},
+                    {"role": "assistant", "content": reply},
+                ],
+            )
+
+    response = await generate_sse_stream(
+        service,
+        chat_request.message,
+        history,
+        services,
+        on_response,
+        timings,
+        # Stateless clients resend their history, so their address is the
+        # closest stable identifier of the conversation
+        conversation_id or client_ip,
+        partial(quota.charge, client_ip),
+        request_key,
     )
+    if conversation_id is not None:
+        response.headers["X-Conversation-Id"] = conversation_id
+    return response
@@ -0,0 +1,232 @@
+"""WebSocket chat endpoint keeping one connection per conversation."""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from contextlib import aclosing, suppress
+from functools import partial
+from json.encoder import encode_basestring_ascii
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect
+from openai import OpenAIError
+from starlette.websockets import WebSocketState
+
+from app.api.chat import (
+    MAX_MESSAGE_LENGTH,
+    ChatServices,
+    get_chat_services,
+    plan_reply,
+)
+from app.config import get_settings
+from app.middleware.rate_limit import hit_chat_limit
+from app.middleware.token_quota import (
+    TokenQuota,
+    TokenQuotaExceeded,
+    get_token_quota,
+)
+from app.services.admission import UpstreamOverloaded
+from app.services.metrics import StreamTimings, get_metrics
+from app.services.openai_service import OpenAIService, get_openai_service
+from app.services.resilience import CircuitOpen, UpstreamTimeout
+from app.services.singleflight import FlightCancelled
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api", tags=["chat"])
+
+# Messages kept per connection; older turns are dropped first
+MAX_HISTORY_MESSAGES = 100
+# WebSocket close codes (RFC 6455 and the IANA registry)
+CLOSE_POLICY_VIOLATION = 1008
+CLOSE_SERVICE_RESTART = 1012
+
+# Server frames are compact JSON text: {"d": ...} per delta, then one {"e": ...}
+DONE_FRAME = '{"e":"done"}'
+CANCELLED_FRAME = '{"e":"cancelled"}'
+RESTART_FRAME = '{"e":"error","error":"Server restarting","retry":true}'
+
+
+def delta_frame(content: str) -> str:
+    """Build a ``{"d": ...}`` content frame without building a dict."""
+    return '{"d":' + encode_basestring_ascii(content) + "}"
+
+
+def error_frame(error: str, retry_after: int | None = None) -> str:
+    """Build an error frame, with the seconds to wait when retrying helps."""
+    frame: dict[str, str | int] = {"e": "error", "error": error}
+    if retry_after is not None:
+        frame["retry_after"] = retry_after
+    return json.dumps(frame, separators=(",", ":"))
+
+
+def origin_allowed(websocket: WebSocket) -> bool:
+    """
+    Apply the CORS origin list, which the CORS middleware skips for sockets.
+
+    Clients that send no ``Origin`` (not browsers) are allowed, like plain
+    HTTP requests.
+    """
+    origin = websocket.headers.get("origin")
+    allowed = get_settings().allowed_origins_list
+    return origin is None or origin in allowed or "*" in allowed
+
+
+@router.websocket("/chat/ws")
+async def chat_ws(
+    websocket: WebSocket,
+    service: Annotated[OpenAIService, Depends(get_openai_service)],
+    services: Annotated[ChatServices, Depends(get_chat_services)],
+    quota: Annotated[TokenQuota, Depends(get_token_quota)],
+) -> None:
+    """
+    Chat over one WebSocket per conversation.
+
+    The connection holds the conversation history, so each turn sends only
+    ``{"type": "message", "message": "..."}``. Replies stream as
+    ``{"d": "<delta>"}`` frames and end with ``{"e": "done"}``, or with
+    ``{"e": "error", ...}`` (``retry_after`` set when waiting helps). Send
+    ``{"type": "cancel"}`` to stop the running reply; it ends with
+    ``{"e": "cancelled"}`` and is not added to the history. The request
+    rate limit and token quota apply to every message.
+    """
+    if not origin_allowed(websocket):
+        await websocket.close(code=CLOSE_POLICY_VIOLATION)
+        return
+    drain = services.drain
+    if drain.draining:
+        await websocket.close(code=CLOSE_SERVICE_RESTART)
+        return
+    await websocket.accept()
+    client_ip = websocket.client.host if websocket.client else "unknown"
+    history: list[dict[str, str]] = []
+    # The connection is the conversation; keeps it in one routing A/B arm
+    conversation = uuid.uuid4().hex
+    reply_task: asyncio.Task | None = None
+
+    async def stream_reply(message: str) -> None:
+        timings = StreamTimings()
+        try:
+            reply = await plan_reply(
+                service, message, history, services, timings, conversation
+            )
+        except UpstreamOverloaded as exc:
+            await websocket.send_text(error_frame("Service busy", exc.retry_after))
+            return
+        except CircuitOpen as exc:
+            await websocket.send_text(
+                error_frame("Service unavailable", exc.retry_after)
+            )
+            return
+
+        parts: list[str] = []
+
+        async def frames():
+            charge = partial(quota.charge, client_ip)
+            async with aclosing(reply.open(charge)) as chunks:
+                async for chunk in chunks:
+                    parts.append(chunk)
+                    yield delta_frame(chunk)
+
+        try:
+            guarded = drain.guard(frames(), terminal=RESTART_FRAME)
+            async with aclosing(guarded):
+                async for frame in guarded:
+                    if timings.first_frame is None:
+                        timings.first_frame = time.perf_counter()
+                    await websocket.send_text(frame)
+                    if frame is RESTART_FRAME:
+                        await websocket.close(code=CLOSE_SERVICE_RESTART)
+                        return
+        except (OpenAIError, FlightCancelled, UpstreamOverloaded, UpstreamTimeout):
+            await websocket.send_text(error_frame("Failed to generate response"))
+            return
+        finally:
+            reply.record_shared_tokens()
+            reply.record_route()
+            logger.info("[CHAT_TIMING] ws %s", timings.record(get_metrics()))
+
+        text = "".join(parts)
+        if reply.conversational:
+            history.extend(
+                [
+                    {"role": "user", "content": message},
+                    {"role": "assistant", "content": text},
+                ]
+            )
+            del history[:-MAX_HISTORY_MESSAGES]
+        await websocket.send_text(DONE_FRAME)
+
+    async def send_reply(message: str) -> None:
+        try:
+            await stream_reply(message)
+        except asyncio.CancelledError:
+            # Cancelled by the client, or the connection is going away
+            if websocket.application_state is WebSocketState.CONNECTED:
+                with suppress(Exception):
+                    await websocket.send_text(CANCELLED_FRAME)
+            raise
+        except Exception:
+            logger.exception("[CHAT_WS] IP %s - Reply failed", client_ip)
+            if websocket.application_state is WebSocketState.CONNECTED:
+                with suppress(Exception):
+                    await websocket.send_text(
+                        error_frame("Failed to generate response")
+                    )
+
+    try:
+        while True:
+            received = await websocket.receive()
+            if received["type"] == "websocket.disconnect":
+                break
+            try:
+                # Binary frames carry "bytes" instead of "text"
+                request = json.loads(received.get("text") or "")
+            except ValueError:
+                await websocket.send_text(error_frame("Invalid JSON"))
+                continue
+            kind = request.get("type") if isinstance(request, dict) else None
+            if kind == "cancel":
+                if reply_task is not None:
+                    reply_task.cancel()
+                continue
+            message = request.get("message") if kind == "message" else None
+            if not isinstance(message, str) or not 0 < len(message) <= (
+                MAX_MESSAGE_LENGTH
+            ):
+                await websocket.send_text(error_frame("Validation error"))
+                continue
+            if reply_task is not None and not reply_task.done():
+                await websocket.send_text(error_frame("Reply in progress"))
+                continue
+            if drain.draining:
+                await websocket.send_text(RESTART_FRAME)
+                await websocket.close(code=CLOSE_SERVICE_RESTART)
+                return
+            retry_after = await asyncio.to_thread(hit_chat_limit, client_ip)
+            if retry_after is not None:
+                logger.warning("[RATE_LIMIT] IP %s exceeded rate limit (ws)", client_ip)
+                await websocket.send_text(
+                    error_frame("Rate limit exceeded", retry_after)
+                )
+                continue
+            try:
+                await quota.check(client_ip)
+            except TokenQuotaExceeded as exc:
+                logger.warning("[RATE_LIMIT] IP %s exceeded token quota", client_ip)
+                await websocket.send_text(
+                    error_frame("Rate limit exceeded", exc.retry_after)
+                )
+                continue
+            logger.info("[CHAT_WS] IP %s - Message: %s...", client_ip, message[:50])
+            # Runs next to the receive loop so a cancel can arrive mid-reply
+            reply_task = asyncio.create_task(send_reply(message))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if reply_task is not None and not reply_task.done():
+            reply_task.cancel()
+            with suppress(asyncio.CancelledError, Exception):
+                await reply_task
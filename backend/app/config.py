@@ -1,6 +1,7 @@
 """Application configuration using Pydantic Settings."""
 
 from functools import lru_cache
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -18,6 +19,125 @@ class Settings(BaseSettings):
     allowed_origins: str = "http://localhost:3000"
     rate_limit_requests: int = 20
     rate_limit_window: int = 3600
+    # memory://, sqlite:///limits.db (one host) or redis://host:6379 (shared)
+    rate_limit_storage_uri: str = "memory://"
+    # Generated tokens per client per rate limit window (0 disables)
+    token_quota: int = 0
+    admin_token: str | None = None
+    # Bearer token for scraping /metrics (the endpoint is hidden when unset)
+    metrics_token: str | None = None
+    # Seconds running chat streams get to finish after SIGTERM
+    shutdown_grace_period: float = 20.0
+
+    # Logging: written by a background thread; JSON lines or plain text
+    log_level: str = "INFO"
+    log_format: Literal["json", "text"] = "json"
+    log_queue_size: int = 10_000
+    # Share of INFO records kept per logger, e.g. "app.api.chat=0.1"
+    log_sample_rates: str = ""
+
+    # Opt-in /api/chat profiling: X-Profile: 1 with the admin token, or sampled
+    profile_sample_rate: float = 0.0
+    profile_interval_ms: float = 5.0
+    profile_dir: str = "profiles"
+    profile_max_files: int = 50
+
+    # Shared upstream HTTP client (one connection pool per process)
+    # Point at a compatible server, e.g. the local mock: http://127.0.0.1:8001/v1
+    openai_base_url: str | None = None
+    openai_max_connections: int = 100
+    openai_max_keepalive_connections: int = 20
+    openai_keepalive_expiry: float = 30.0
+    openai_http2: bool = False
+    openai_connect_timeout: float = 5.0
+    openai_read_timeout: float = 60.0
+    openai_write_timeout: float = 10.0
+    openai_pool_timeout: float = 10.0
+
+    # Per-request model routing, rules tried in order (empty: defaults for all),
+    # e.g. "contact:topic=contact,max_tokens=150;deep:min_chars=200,max_tokens=800"
+    model_routes: str = ""
+    # Share of conversations matching a rule kept on the defaults (A/B control)
+    model_routing_ab_split: float = 0.0
+
+    # Exact-match response cache (0 entries disables it)
+    response_cache_max_entries: int = 256
+    response_cache_max_bytes: int = 2_000_000
+    response_cache_ttl: int = 3600
+    # SQLite file shared by workers and kept across deploys (unset: memory only)
+    response_cache_path: str | None = None
+    response_cache_persistent_ttl: int = 7 * 24 * 3600
+    response_cache_persistent_max_entries: int = 5000
+    # Pre-fill the cache with the frontend's example questions at startup
+    response_cache_warm: bool = False
+    example_questions_path: str = "../frontend/src/types/example-questions.ts"
+
+    # Conversation history sent upstream
+    history_token_budget: int = 2000
+    history_summary_enabled: bool = False
+    history_summary_max_tokens: int = 200
+
+    # Local intent classifier answering greetings and off-topic openers
+    intent_classifier_enabled: bool = True
+    intent_confidence_threshold: float = 0.85
+
+    # Answers reused for reworded first questions (tune the threshold with
+    # python -m benchmarks.paraphrase_eval). 0.85 is the lowest threshold
+    # with precision 1.0 on benchmarks/paraphrases.tsv (recall 0.44); 0.80
+    # already serves a wrong answer
+    paraphrase_index_enabled: bool = False
+    paraphrase_index_max_entries: int = 1000
+    paraphrase_index_dims: int = 1024
+    paraphrase_threshold: float = 0.85
+
+    # System prompt assembled from retrieved knowledge sections
+    prompt_retrieval_enabled: bool = False
+    prompt_retrieval_top_k: int = 3
+    prompt_cache_size: int = 256
+
+    # Server-side conversation sessions
+    session_backend: Literal["memory", "sqlite"] = "memory"
+    session_ttl: int = 1800
+    session_max_bytes: int = 20_000_000
+    session_sqlite_path: str = "sessions.db"
+
+    # SSE framing: merge small deltas (0 bytes disables coalescing)
+    sse_flush_bytes: int = 64
+    sse_flush_interval_ms: int = 30
+
+    # Resumable SSE streams via Last-Event-ID (0 bytes disables the buffer).
+    # Off by default: a buffered stream keeps its upstream running after the
+    # client disconnects, for up to the grace period below
+    stream_buffer_max_bytes: int = 0
+    stream_buffer_ttl: int = 60
+    # Seconds a stream keeps generating after its client disconnects
+    stream_resume_grace: float = 10.0
+
+    # Upstream admission control (0 max concurrency disables it)
+    upstream_max_concurrency: int = 50
+    upstream_min_concurrency: int = 4
+    upstream_queue_size: int = 100
+    upstream_queue_timeout: float = 10.0
+    upstream_target_ttft: float = 2.0
+    upstream_adaptive_concurrency: bool = True
+
+    # Upstream failure policy: retries before the first token, hedging and
+    # a circuit breaker (0 error rate disables the breaker)
+    upstream_max_retries: int = 2
+    upstream_retry_backoff: float = 0.2
+    upstream_retry_budget_ratio: float = 0.1
+    upstream_retry_budget_max: float = 10.0
+    upstream_first_token_timeout: float = 15.0
+    upstream_stall_timeout: float = 20.0
+    upstream_hedge_enabled: bool = False
+    upstream_hedge_percentile: float = 95.0
+    upstream_hedge_min_delay: float = 0.5
+    upstream_breaker_error_rate: float = 0.5
+    upstream_breaker_min_requests: int = 10
+    upstream_breaker_window: float = 30.0
+    upstream_breaker_cooldown: float = 15.0
+    # While the circuit is open: serve a canned reply (else fail with 503)
+    upstream_breaker_fallback: bool = True
 
     @property
     def allowed_origins_list(self) -> list[str]:
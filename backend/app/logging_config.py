@@ -0,0 +1,188 @@
+"""Non-blocking structured logging with request IDs and sampling."""
+
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+from contextvars import ContextVar
+from datetime import UTC, datetime
+from logging.handlers import QueueHandler, QueueListener
+
+from app.config import Settings
+
+# Set per request by the request ID middleware
+request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+TEXT_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
+TEXT_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Writer started by ``setup_logging``; a later call stops it before replacing it
+_listener: QueueListener | None = None
+
+
+class JSONFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Render a record, including its request ID and any traceback."""
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, UTC).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id is not None:
+            entry["request_id"] = request_id
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a share of low-severity records from selected loggers.
+
+    Warnings and errors always pass, so throttling chat chatter under load
+    never hides a problem.
+    """
+
+    def __init__(self, rates: dict[str, float]) -> None:
+        """
+        Initialize the filter.
+
+        Args:
+            rates: Share of INFO/DEBUG records to keep per logger name; a name
+                also covers its child loggers.
+        """
+        super().__init__()
+        self._rates = rates
+        self.dropped = 0
+
+    def _rate(self, name: str) -> float:
+        while True:
+            if name in self._rates:
+                return self._rates[name]
+            if "." not in name:
+                return 1.0
+            name = name.rsplit(".", 1)[0]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Decide whether a record is kept."""
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        if rate >= 1 or random.random() < rate:
+            return True
+        self.dropped += 1
+        return False
+
+
+class AsyncQueueHandler(QueueHandler):
+    """
+    Hand records to the writer thread without touching them on the loop.
+
+    Unlike ``QueueHandler``, the message is not formatted here: ``%``-style
+    arguments travel with the record and are merged by the writer thread,
+    so callers must not mutate them after logging. When the queue is full
+    records are dropped instead of blocking the event loop.
+    """
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        """
+        Initialize the handler.
+
+        Args:
+            log_queue: Bounded queue drained by the listener thread.
+        """
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Attach the current request ID (only known on the calling side)."""
+        record.request_id = request_id_var.get()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Queue a record, dropping it if the writer has fallen behind."""
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def parse_sample_rates(value: str) -> dict[str, float]:
+    """
+    Parse ``logger=rate`` pairs, e.g. ``app.api.chat=0.1,app.services=0.5``.
+
+    Args:
+        value: Comma-separated pairs (empty for none).
+
+    Returns:
+        Keep rate per logger name.
+    """
+    rates = {}
+    for pair in value.split(","):
+        name, _, rate = pair.partition("=")
+        if name.strip():
+            rates[name.strip()] = float(rate)
+    return rates
+
+
+def setup_logging(settings: Settings) -> QueueListener:
+    """
+    Route all logging through a queue to a background writer thread.
+
+    The root logger gets a non-blocking queue handler that samples and
+    tags records; a listener thread formats them (JSON or text) and writes
+    to stderr. The listener is stopped, flushing the queue, at exit or when
+    logging is set up again (e.g. on reload), so only one writer runs.
+
+    Args:
+        settings: Application settings with the logging options.
+
+    Returns:
+        The started listener.
+    """
+    formatter: logging.Formatter = (
+        JSONFormatter()
+        if settings.log_format == "json"
+        else logging.Formatter(TEXT_FORMAT, TEXT_DATE_FORMAT)
+    )
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(formatter)
+
+    handler = AsyncQueueHandler(queue.Queue(maxsize=settings.log_queue_size))
+    handler.addFilter(SamplingFilter(parse_sample_rates(settings.log_sample_rates)))
+
+    global _listener
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        if isinstance(existing, AsyncQueueHandler):
+            root.removeHandler(existing)
+    if _listener is not None:
+        atexit.unregister(_listener.stop)
+        _listener.stop()
+    root.addHandler(handler)
+    root.setLevel(settings.log_level.upper())
+
+    _listener = QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _listener
+
+
+def logging_stats() -> dict[str, int]:
+    """Report records dropped by sampling and by a full queue."""
+    stats = {"sampled_out": 0, "queue_full": 0}
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, AsyncQueueHandler):
+            stats["queue_full"] += handler.dropped
+            for log_filter in handler.filters:
+                if isinstance(log_filter, SamplingFilter):
+                    stats["sampled_out"] += log_filter.dropped
+    return stats
@@ -1,24 +1,42 @@
 """FastAPI application entry point."""
 
+import asyncio
 import logging
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 
-from fastapi import FastAPI, Request
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import ValidationError
-from slowapi.errors import RateLimitExceeded
 
+from app.api.admin import require_metrics_token
+from app.api.admin import router as admin_router
 from app.api.chat import router as chat_router
+from app.api.chat import warm_response_cache
+from app.api.chat_ws import router as chat_ws_router
 from app.config import get_settings
-from app.middleware.rate_limit import limiter
+from app.logging_config import logging_stats, setup_logging
+from app.middleware.profiling import ProfilingMiddleware
+from app.middleware.rate_limit import ChatRateLimited, limiter
+from app.middleware.request_id import RequestIdMiddleware
+from app.middleware.token_quota import TokenQuotaExceeded
+from app.prompts.example_questions import load_example_questions
+from app.services.admission import UpstreamOverloaded, get_admission_controller
+from app.services.drain import ServerDraining, get_drain_controller
+from app.services.intent_classifier import get_intent_classifier
+from app.services.metrics import get_metrics
+from app.services.model_router import get_model_router
+from app.services.openai_client import OpenAIClientPool
+from app.services.openai_service import OpenAIService, get_stream_stats
+from app.services.paraphrase_index import get_paraphrase_index
+from app.services.prompt_builder import get_prompt_builder
+from app.services.resilience import CircuitOpen, get_upstream_resilience
+from app.services.response_cache import get_response_cache
+from app.services.singleflight import get_singleflight
+from app.services.stream_buffer import get_stream_buffer
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-)
+# Configure logging (off the event loop)
+setup_logging(get_settings())
 logger = logging.getLogger(__name__)
 
 
@@ -28,7 +46,28 @@ async def lifespan(app: FastAPI):
     settings = get_settings()
     if not settings.openai_api_key:
         raise RuntimeError("OPENAI_API_KEY environment variable is not set")
-    yield
+    app.state.openai_pool = OpenAIClientPool(settings)
+    # Parse MODEL_ROUTES now so a bad rule fails startup, not the first chat
+    get_model_router()
+    # SIGTERM drains running chat streams before the server exits
+    get_drain_controller().install_signal_handler()
+    warm_task = None
+    if settings.response_cache_warm:
+        # Runs in the background so readiness is not delayed
+        questions = load_example_questions(settings.example_questions_path)
+        service = OpenAIService(app.state.openai_pool.client)
+        warm_task = asyncio.create_task(warm_response_cache(service, questions))
+    try:
+        yield
+    finally:
+        if warm_task is not None:
+            warm_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await warm_task
+        pool = app.state.openai_pool
+        logger.info("[POOL] Closing upstream client pool: %s", pool.pool_stats())
+        await pool.aclose()
+        del app.state.openai_pool
 
 
 app = FastAPI(
@@ -42,19 +81,71 @@ app.state.limiter = limiter
 
 
 async def rate_limit_exceeded_handler(
-    request: Request, exc: RateLimitExceeded
+    request: Request, exc: ChatRateLimited
 ) -> JSONResponse:
     """Handle rate limit exceeded with logging."""
     client_ip = request.client.host if request.client else "unknown"
-    logger.warning(f"[RATE_LIMIT] IP {client_ip} exceeded rate limit")
+    logger.warning("[RATE_LIMIT] IP %s exceeded rate limit", client_ip)
     return JSONResponse(
         status_code=429,
         content={"error": "Rate limit exceeded"},
-        headers={"Retry-After": "3600"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+async def token_quota_exceeded_handler(
+    request: Request, exc: TokenQuotaExceeded
+) -> JSONResponse:
+    """Handle token quota exhaustion with logging."""
+    client_ip = request.client.host if request.client else "unknown"
+    logger.warning("[RATE_LIMIT] IP %s exceeded token quota", client_ip)
+    return JSONResponse(
+        status_code=429,
+        content={"error": "Rate limit exceeded"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+async def upstream_overloaded_handler(
+    request: Request, exc: UpstreamOverloaded
+) -> JSONResponse:
+    """Shed load early when upstream capacity is exhausted."""
+    client_ip = request.client.host if request.client else "unknown"
+    logger.warning("[ADMISSION] IP %s rejected: %s", client_ip, exc)
+    return JSONResponse(
+        status_code=503,
+        content={"error": "Service busy"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+async def circuit_open_handler(request: Request, exc: CircuitOpen) -> JSONResponse:
+    """Fail fast while the upstream is unhealthy."""
+    client_ip = request.client.host if request.client else "unknown"
+    logger.warning("[BREAKER] IP %s rejected: %s", client_ip, exc)
+    return JSONResponse(
+        status_code=503,
+        content={"error": "Service unavailable"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+async def server_draining_handler(
+    request: Request, exc: ServerDraining
+) -> JSONResponse:
+    """Turn new requests away while running streams drain."""
+    return JSONResponse(
+        status_code=503,
+        content={"error": "Server shutting down"},
+        headers={"Retry-After": str(exc.retry_after)},
     )
 
 
-app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
+app.add_exception_handler(ChatRateLimited, rate_limit_exceeded_handler)
+app.add_exception_handler(TokenQuotaExceeded, token_quota_exceeded_handler)
+app.add_exception_handler(UpstreamOverloaded, upstream_overloaded_handler)
+app.add_exception_handler(CircuitOpen, circuit_open_handler)
+app.add_exception_handler(ServerDraining, server_draining_handler)
 
 settings = get_settings()
 app.add_middleware(
@@ -63,9 +154,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST"],
     allow_headers=["*"],
+    expose_headers=["X-Conversation-Id", "X-Request-ID", "X-Stream-Id"],
 )
+# Outside CORS so profiles include it; inside the request ID for file names
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(RequestIdMiddleware)
 
 app.include_router(chat_router)
+app.include_router(chat_ws_router)
+app.include_router(admin_router)
 
 
 @app.get("/health", tags=["health"])
@@ -74,6 +171,74 @@ async def health_check() -> dict[str, str]:
     return {"status": "healthy"}
 
 
+@app.get("/ready", tags=["health"])
+async def readiness_check() -> JSONResponse:
+    """Readiness probe: fails once a shutdown drain has started."""
+    if get_drain_controller().draining:
+        return JSONResponse(status_code=503, content={"status": "draining"})
+    return JSONResponse(content={"status": "ready"})
+
+
+metrics = get_metrics()
+metrics.add_collector(
+    "chat_cache",
+    lambda: get_response_cache().stats(),
+    gauges={"entries", "bytes", "persistent_entries"},
+)
+metrics.add_collector(
+    "chat_paraphrase", lambda: get_paraphrase_index().stats(), gauges={"entries"}
+)
+metrics.add_collector(
+    "chat_singleflight", lambda: get_singleflight().stats(), gauges={"in_flight"}
+)
+metrics.add_collector("chat_streams", lambda: get_stream_stats().as_dict())
+metrics.add_collector(
+    "chat_admission",
+    lambda: get_admission_controller().stats(),
+    gauges={"limit", "in_flight", "queued"},
+)
+metrics.add_collector(
+    "chat_prompt", lambda: get_prompt_builder().stats(), gauges={"enabled", "entries"}
+)
+metrics.add_collector("chat_intent", lambda: get_intent_classifier().stats())
+metrics.add_collector(
+    "chat_stream_buffer",
+    lambda: get_stream_buffer().stats(),
+    gauges={"streams", "bytes"},
+)
+metrics.add_collector(
+    "chat_resilience",
+    lambda: get_upstream_resilience().stats(),
+    gauges={"circuit_open"},
+)
+metrics.add_collector(
+    "chat_routing", lambda: get_model_router().stats(), gauges={"rules"}
+)
+metrics.add_collector(
+    "drain",
+    lambda: get_drain_controller().stats(),
+    gauges={"draining", "active_streams"},
+)
+metrics.add_collector("logging", logging_stats)
+
+
+@app.get(
+    "/metrics",
+    tags=["health"],
+    response_class=PlainTextResponse,
+    dependencies=[Depends(require_metrics_token)],
+)
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    """Prometheus metrics: chat latency histograms and service counters."""
+    extra = {}
+    pool = getattr(request.app.state, "openai_pool", None)
+    if pool is not None:
+        extra["openai_pool"] = pool.pool_stats()
+    return PlainTextResponse(
+        metrics.render(extra), media_type="text/plain; version=0.0.4"
+    )
+
+
 @app.exception_handler(ValidationError)
 async def validation_exception_handler(
     request: Request, exc: ValidationError
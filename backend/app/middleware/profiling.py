@@ -0,0 +1,340 @@
+"""Opt-in sampling profiler for individual chat requests."""
+
+import asyncio
+import gc
+import logging
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+import weakref
+from collections import Counter
+from contextvars import ContextVar
+from functools import lru_cache
+from pathlib import Path
+from types import CodeType, FrameType
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import get_settings
+from app.logging_config import request_id_var
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+ADMIN_HEADER = b"x-admin-token"
+# Profiled path prefixes
+PROFILED_PATHS = ("/api/chat",)
+# Longest await chain followed from a suspended task
+MAX_AWAIT_DEPTH = 64
+# What ``await anext(generator[, default])`` suspends on
+ASYNC_GENERATOR_AWAITABLES = (
+    "anext_awaitable",
+    "async_generator_asend",
+    "async_generator_athrow",
+)
+# Names of stored profiles: <epoch ms>-<request id>-<duration>ms.folded
+PROFILE_NAME = re.compile(r"^(\d+)-([\w.-]+)-(\d+)ms\.folded$")
+
+_active_profile: ContextVar["RequestProfile | None"] = ContextVar(
+    "active_profile", default=None
+)
+
+
+def _label(code: CodeType) -> str:
+    path = "/".join(Path(code.co_filename).parts[-2:])
+    return f"{code.co_qualname} ({path}:{code.co_firstlineno})".replace(";", ":")
+
+
+def _thread_stack(frame: FrameType | None, task: asyncio.Task) -> list[str]:
+    """Call stack of the running task, root first, without event loop frames."""
+    root = getattr(task.get_coro(), "cr_code", None)
+    stack = []
+    while frame is not None:
+        stack.append(_label(frame.f_code))
+        # The task's coroutine is where the loop stepped into it
+        if frame.f_code is root:
+            break
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def _await_stack(task: asyncio.Task) -> list[str]:
+    """Where a suspended task is waiting, following its await chain."""
+    stack = []
+    awaitable = task.get_coro()
+    for _ in range(MAX_AWAIT_DEPTH):
+        if hasattr(awaitable, "cr_code"):
+            stack.append(_label(awaitable.cr_code))
+            awaitable = awaitable.cr_await
+        elif hasattr(awaitable, "ag_code"):
+            stack.append(_label(awaitable.ag_code))
+            awaitable = awaitable.ag_await
+        elif type(awaitable).__name__ in ASYNC_GENERATOR_AWAITABLES:
+            # ``anext()`` hides the generator; it is reachable as a referent
+            awaitable = next(
+                (
+                    ref
+                    for ref in gc.get_referents(awaitable)
+                    if hasattr(ref, "ag_code")
+                    or type(ref).__name__ in ASYNC_GENERATOR_AWAITABLES
+                ),
+                None,
+            )
+        else:
+            break
+    stack.append("[awaiting]")
+    return stack
+
+
+class RequestProfile:
+    """Wall-clock stack samples of one request and the tasks it spawned."""
+
+    def __init__(self, task: asyncio.Task) -> None:
+        """
+        Start tracking a request.
+
+        Args:
+            task: The task serving the request.
+        """
+        self.loop = task.get_loop()
+        self.thread_id = threading.get_ident()
+        self.tasks: weakref.WeakSet[asyncio.Task] = weakref.WeakSet([task])
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+
+    def sample(self, frames: dict[int, FrameType]) -> None:
+        """
+        Record one sample for every live task of the request.
+
+        The running task contributes its real call stack (on-CPU time);
+        suspended tasks contribute the await chain they are blocked in, so
+        time spent waiting on the upstream shows up as well.
+
+        Args:
+            frames: Current frame of every thread (``sys._current_frames``).
+        """
+        running = asyncio.current_task(self.loop)
+        for task in list(self.tasks):
+            if task.done():
+                continue
+            if task is running:
+                stack = _thread_stack(frames.get(self.thread_id), task)
+            else:
+                stack = _await_stack(task)
+            self.stacks[";".join([f"task:{task.get_name()}", *stack])] += 1
+        self.samples += 1
+
+    def folded(self) -> str:
+        """Render samples in the collapsed-stack format used by flamegraphs."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.items())
+
+
+# Task factory that was installed before ours, per event loop
+_previous_factories: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def _task_factory(loop, coro, **kwargs):
+    """Create a task and attach it to the profile of the request creating it."""
+    previous = _previous_factories.get(loop)
+    if previous is not None:
+        task = previous(loop, coro, **kwargs)
+    else:
+        task = asyncio.Task(coro, loop=loop, **kwargs)
+    profile = _active_profile.get()
+    if profile is not None:
+        profile.tasks.add(task)
+    return task
+
+
+class ProfileStore:
+    """Bounded on-disk ring of folded-stack profiles."""
+
+    def __init__(self, directory: str, max_files: int) -> None:
+        """
+        Initialize the store.
+
+        Args:
+            directory: Folder for profile files (created on first save).
+            max_files: Profiles kept; the oldest are deleted first.
+        """
+        self.directory = Path(directory)
+        self.max_files = max_files
+
+    def _files(self) -> list[Path]:
+        if not self.directory.is_dir():
+            return []
+        files = [p for p in self.directory.iterdir() if PROFILE_NAME.match(p.name)]
+        return sorted(files, key=lambda p: int(PROFILE_NAME.match(p.name)[1]))
+
+    def save(self, name: str, folded: str) -> None:
+        """Write a profile and delete the oldest ones beyond the limit."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / name).write_text(folded, encoding="utf-8")
+        files = self._files()
+        for old in files[: max(0, len(files) - self.max_files)]:
+            old.unlink(missing_ok=True)
+
+    def list(self) -> list[dict[str, str | int]]:
+        """Describe stored profiles, newest first."""
+        profiles = []
+        for path in reversed(self._files()):
+            created, request_id, duration = PROFILE_NAME.match(path.name).groups()
+            profiles.append(
+                {
+                    "name": path.name,
+                    "request_id": request_id,
+                    "created_ms": int(created),
+                    "duration_ms": int(duration),
+                    "bytes": path.stat().st_size,
+                }
+            )
+        return profiles
+
+    def read(self, name: str) -> str | None:
+        """Return a stored profile, or None for unknown names."""
+        if not PROFILE_NAME.match(name):
+            return None
+        path = self.directory / name
+        return path.read_text(encoding="utf-8") if path.is_file() else None
+
+
+class Profiler:
+    """
+    Samples the event loop thread for all requests being profiled.
+
+    One daemon thread runs while at least one profile is active and takes
+    a sample every ``interval`` seconds. Tasks created while a profiled
+    request runs (task groups, background producers) are attached to its
+    profile through a task factory installed on first use.
+    """
+
+    def __init__(self, interval: float, store: ProfileStore) -> None:
+        """
+        Initialize the profiler.
+
+        Args:
+            interval: Seconds between samples.
+            store: Where finished profiles are written.
+        """
+        self.interval = interval
+        self.store = store
+        self._active: set[RequestProfile] = set()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> RequestProfile:
+        """Start profiling the current task (call from the request task)."""
+        loop = asyncio.get_running_loop()
+        if loop.get_task_factory() is not _task_factory:
+            _previous_factories[loop] = loop.get_task_factory()
+            loop.set_task_factory(_task_factory)
+        profile = RequestProfile(asyncio.current_task())
+        with self._lock:
+            self._active.add(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="request-profiler", daemon=True
+                )
+                self._thread.start()
+        return profile
+
+    def stop(self, profile: RequestProfile) -> None:
+        """Stop sampling a request."""
+        with self._lock:
+            self._active.discard(profile)
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if not self._active:
+                    self._thread = None
+                    return
+                profiles = list(self._active)
+            frames = sys._current_frames()
+            for profile in profiles:
+                try:
+                    profile.sample(frames)
+                except Exception:
+                    # A task finishing mid-sample must not stop the sampler
+                    continue
+            del frames
+            time.sleep(self.interval)
+
+
+@lru_cache
+def get_profiler() -> Profiler:
+    """Get the process-wide request profiler."""
+    settings = get_settings()
+    return Profiler(
+        interval=settings.profile_interval_ms / 1000,
+        store=ProfileStore(settings.profile_dir, settings.profile_max_files),
+    )
+
+
+def _should_profile(scope: Scope) -> bool:
+    settings = get_settings()
+    headers = dict(scope["headers"])
+    if headers.get(PROFILE_HEADER) == b"1" and settings.admin_token:
+        token = headers.get(ADMIN_HEADER, b"").decode("latin-1")
+        if secrets.compare_digest(token, settings.admin_token):
+            return True
+    return random.random() < settings.profile_sample_rate
+
+
+class ProfilingMiddleware:
+    """
+    Profile sampled or explicitly requested chat requests end to end.
+
+    A request is profiled when it carries ``X-Profile: 1`` together with a
+    valid ``X-Admin-Token``, or when it falls within
+    ``PROFILE_SAMPLE_RATE``. The profile covers everything inside this
+    middleware (CORS, validation, rate limiting, the endpoint and the whole
+    streaming phase) and is saved as a folded-stack file for flamegraph
+    tools once the response has been sent.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        """
+        Wrap an ASGI application.
+
+        Args:
+            app: The application to wrap.
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run the request, profiling it when selected."""
+        if (
+            scope["type"] != "http"
+            or not scope["path"].startswith(PROFILED_PATHS)
+            or not _should_profile(scope)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        profiler = get_profiler()
+        profile = profiler.start()
+        token = _active_profile.set(profile)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _active_profile.reset(token)
+            profiler.stop(profile)
+            duration_ms = round((time.perf_counter() - started) * 1000)
+            request_id = re.sub(r"[^\w.-]", "_", request_id_var.get() or "request")
+            name = f"{int(time.time() * 1000)}-{request_id}-{duration_ms}ms.folded"
+            logger.info(
+                "[PROFILE] %s: %d samples over %dms",
+                name,
+                profile.samples,
+                duration_ms,
+            )
+            # Written off the event loop; the response is already complete
+            asyncio.get_running_loop().run_in_executor(
+                None, profiler.store.save, name, profile.folded()
+            )
@@ -1,15 +1,87 @@
 """Rate limiting middleware using slowapi."""
 
+import asyncio
+import math
+import time
+
+from fastapi import Request
+from limits import parse
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
 from app.config import get_settings
 
+# Registers the sqlite:// scheme with limits
+from app.middleware import sqlite_storage  # noqa: F401
+
 settings = get_settings()
 
+
+class ChatRateLimited(Exception):
+    """Raised when a client has sent too many chat messages."""
+
+    def __init__(self, retry_after: int) -> None:
+        """
+        Initialize the error.
+
+        Args:
+            retry_after: Seconds until the client's window resets.
+        """
+        super().__init__(f"Rate limit exceeded, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+# Limit scope shared by POST /api/chat and the WebSocket transport (slowapi's
+# name for the chat endpoint, so existing counters carry over)
+CHAT_LIMIT_SCOPE = "app.api.chat.chat"
+
+# Limits are applied by ``enforce_chat_limit``, not by slowapi decorators
 limiter = Limiter(
     key_func=get_remote_address,
-    default_limits=[
-        f"{settings.rate_limit_requests}/{settings.rate_limit_window}seconds"
-    ],
+    storage_uri=settings.rate_limit_storage_uri,
 )
+
+
+def chat_rate_limit() -> str:
+    """Per-client request limit for the chat endpoint, from settings."""
+    settings = get_settings()
+    return f"{settings.rate_limit_requests}/{settings.rate_limit_window}seconds"
+
+
+def hit_chat_limit(key: str) -> int | None:
+    """
+    Count one chat message against the client's limit.
+
+    Blocks on the limiter storage (SQLite waits for other workers' write
+    locks), so async callers run it in a worker thread.
+
+    Args:
+        key: Client identifier (the remote address, as slowapi uses).
+
+    Returns:
+        Seconds until the limit resets if the message is over the limit,
+        otherwise None.
+    """
+    if not limiter.enabled:
+        return None
+    limit = parse(chat_rate_limit())
+    if limiter.limiter.hit(limit, key, CHAT_LIMIT_SCOPE):
+        return None
+    reset_time, _ = limiter.limiter.get_window_stats(limit, key, CHAT_LIMIT_SCOPE)
+    return max(1, math.ceil(reset_time - time.time()))
+
+
+async def enforce_chat_limit(request: Request) -> None:
+    """
+    Count a chat request against the client's limit, off the event loop.
+
+    Args:
+        request: Incoming request; keyed by its remote address.
+
+    Raises:
+        ChatRateLimited: With the time until the client's window resets.
+    """
+    key = get_remote_address(request)
+    retry_after = await asyncio.to_thread(hit_chat_limit, key)
+    if retry_after is not None:
+        raise ChatRateLimited(retry_after)
@@ -0,0 +1,58 @@
+"""Request ID propagation for logs and responses."""
+
+import uuid
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.logging_config import request_id_var
+
+HEADER = "x-request-id"
+# Longest client-supplied ID that is trusted as-is
+MAX_LENGTH = 64
+
+
+class RequestIdMiddleware:
+    """
+    Tag every request with an ID available to log records.
+
+    Uses the client's ``X-Request-ID`` when it is reasonable, otherwise
+    generates one, and echoes it in the response. Implemented as plain ASGI
+    middleware so streaming responses pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        """
+        Wrap an ASGI application.
+
+        Args:
+            app: The application to wrap.
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run the request with its ID set in the logging context."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == HEADER.encode():
+                candidate = value.decode("latin-1")
+                if 0 < len(candidate) <= MAX_LENGTH and candidate.isprintable():
+                    request_id = candidate
+                break
+        request_id = request_id or uuid.uuid4().hex[:16]
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((HEADER.encode(), request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id_var.reset(token)
@@ -0,0 +1,125 @@
+"""SQLite (WAL) storage for slowapi/limits shared by workers on one host."""
+
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+from limits.storage import Storage
+
+
+def sqlite_path_from_uri(uri: str) -> str:
+    """
+    Extract the database path from a ``sqlite://`` URI.
+
+    ``sqlite:///limits.db`` is relative to the working directory and
+    ``sqlite:////var/lib/app/limits.db`` is absolute.
+    """
+    path = urlparse(uri).path
+    return path[1:] if path.startswith("/") else path
+
+
+def connect_wal(path: str) -> sqlite3.Connection:
+    """Open a SQLite connection in WAL mode suitable for multi-process use."""
+    connection = sqlite3.connect(
+        path, timeout=5.0, isolation_level=None, check_same_thread=False
+    )
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+class SQLiteStorage(Storage):
+    """
+    Fixed-window counters in a SQLite database.
+
+    Registered for the ``sqlite://`` scheme, so it is selected with
+    ``RATE_LIMIT_STORAGE_URI=sqlite:///limits.db``. Every uvicorn worker
+    opens the same file; increments run in ``BEGIN IMMEDIATE`` transactions
+    so concurrent workers never lose a hit.
+    """
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri: str, wrap_exceptions: bool = False, **options) -> None:
+        """
+        Open the database and create the counters table.
+
+        Args:
+            uri: ``sqlite:///<path>`` URI.
+            wrap_exceptions: Wrap storage errors in limits' StorageError.
+        """
+        self._lock = threading.Lock()
+        self._db = connect_wal(sqlite_path_from_uri(uri))
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits ("
+            "key TEXT PRIMARY KEY, count INTEGER NOT NULL, expires_at REAL NOT NULL)"
+        )
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def base_exceptions(self) -> type[Exception]:
+        """Errors raised by the underlying storage."""
+        return sqlite3.Error
+
+    def incr(self, key: str, expiry: float, amount: int = 1) -> int:
+        """Increment a counter, starting a new window if it has expired."""
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute(
+                    "DELETE FROM rate_limits WHERE key = ? AND expires_at <= ?",
+                    (key, now),
+                )
+                self._db.execute(
+                    "INSERT INTO rate_limits (key, count, expires_at) "
+                    "VALUES (?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET count = count + excluded.count",
+                    (key, amount, now + expiry),
+                )
+                (count,) = self._db.execute(
+                    "SELECT count FROM rate_limits WHERE key = ?", (key,)
+                ).fetchone()
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return count
+
+    def get(self, key: str) -> int:
+        """Current count of an unexpired counter."""
+        row = self._fetch(key)
+        return row[0] if row else 0
+
+    def get_expiry(self, key: str) -> float:
+        """Epoch time at which the counter's window resets."""
+        row = self._fetch(key)
+        return row[1] if row else time.time()
+
+    def check(self) -> bool:
+        """Health check used by limits."""
+        try:
+            with self._lock:
+                self._db.execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self) -> int | None:
+        """Drop all counters."""
+        with self._lock:
+            return self._db.execute("DELETE FROM rate_limits").rowcount
+
+    def clear(self, key: str) -> None:
+        """Drop one counter."""
+        with self._lock:
+            self._db.execute("DELETE FROM rate_limits WHERE key = ?", (key,))
+
+    def _fetch(self, key: str) -> tuple[int, float] | None:
+        with self._lock:
+            return self._db.execute(
+                "SELECT count, expires_at FROM rate_limits "
+                "WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
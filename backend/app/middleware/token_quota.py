@@ -0,0 +1,269 @@
+"""Token-bucket quotas charged by generated tokens."""
+
+import asyncio
+import math
+import threading
+import time
+from functools import lru_cache
+from typing import Protocol
+
+from app.config import get_settings
+from app.middleware.sqlite_storage import connect_wal, sqlite_path_from_uri
+
+# Seconds between sweeps of refilled buckets in per-process storage
+QUOTA_SWEEP_INTERVAL = 60.0
+
+
+class TokenQuotaExceeded(Exception):
+    """Raised when a client has used up its token budget."""
+
+    def __init__(self, retry_after: int) -> None:
+        """
+        Initialize the error.
+
+        Args:
+            retry_after: Seconds until the bucket has tokens again.
+        """
+        super().__init__(f"Token quota exceeded, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class QuotaStorage(Protocol):
+    """Atomic token-bucket state shared by all workers."""
+
+    async def apply(
+        self, key: str, amount: float, capacity: float, rate: float
+    ) -> float:
+        """
+        Refill a bucket, subtract ``amount`` and return the new level.
+
+        ``amount=0`` reads the level without charging. Levels may go negative
+        (debt) when a response costs more than what was left.
+        """
+        ...
+
+
+def _refill(level: float, updated_at: float, capacity: float, rate: float) -> float:
+    return min(capacity, level + (time.time() - updated_at) * rate)
+
+
+class MemoryQuotaStorage:
+    """
+    Per-process bucket state (for single-worker deployments and tests).
+
+    As in Redis, a bucket is forgotten once it has refilled (a missing
+    bucket is a full one), so state is only kept for recent spenders.
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty state."""
+        # key -> (level, updated_at, time the bucket is full again)
+        self._buckets: dict[str, tuple[float, float, float]] = {}
+        self._next_sweep = 0.0
+
+    async def apply(
+        self, key: str, amount: float, capacity: float, rate: float
+    ) -> float:
+        """Refill a bucket, subtract ``amount`` and return the new level."""
+        now = time.time()
+        if now >= self._next_sweep:
+            self._sweep(now)
+        level, updated_at, _ = self._buckets.get(key, (capacity, now, now))
+        level = _refill(level, updated_at, capacity, rate) - amount
+        if level >= capacity:
+            self._buckets.pop(key, None)
+        else:
+            full_at = now + (capacity - level) / rate if rate > 0 else math.inf
+            self._buckets[key] = (level, now, full_at)
+        return level
+
+    def _sweep(self, now: float) -> None:
+        self._buckets = {
+            key: bucket for key, bucket in self._buckets.items() if bucket[2] > now
+        }
+        self._next_sweep = now + QUOTA_SWEEP_INTERVAL
+
+
+class SQLiteQuotaStorage:
+    """Bucket state in SQLite (WAL), shared by workers on one host."""
+
+    def __init__(self, path: str) -> None:
+        """
+        Open the database and create the buckets table.
+
+        Args:
+            path: SQLite database file.
+        """
+        self._lock = threading.Lock()
+        self._db = connect_wal(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS token_buckets ("
+            "key TEXT PRIMARY KEY, level REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+
+    async def apply(
+        self, key: str, amount: float, capacity: float, rate: float
+    ) -> float:
+        """Refill a bucket, subtract ``amount`` and return the new level."""
+        return await asyncio.to_thread(self._apply, key, amount, capacity, rate)
+
+    def _apply(self, key: str, amount: float, capacity: float, rate: float) -> float:
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT level, updated_at FROM token_buckets WHERE key = ?",
+                    (key,),
+                ).fetchone()
+                level, updated_at = row or (capacity, time.time())
+                level = _refill(level, updated_at, capacity, rate) - amount
+                self._db.execute(
+                    "INSERT OR REPLACE INTO token_buckets VALUES (?, ?, ?)",
+                    (key, level, time.time()),
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return level
+
+
+# Refill and charge atomically on the server; state expires once full again
+_REDIS_APPLY = """
+local state = redis.call('HMGET', KEYS[1], 'level', 'updated_at')
+local capacity, rate = tonumber(ARGV[2]), tonumber(ARGV[3])
+local now = tonumber(ARGV[4])
+local level = tonumber(state[1]) or capacity
+local updated_at = tonumber(state[2]) or now
+level = math.min(capacity, level + (now - updated_at) * rate) - tonumber(ARGV[1])
+redis.call('HSET', KEYS[1], 'level', tostring(level), 'updated_at', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil((capacity - level) / rate) + 1)
+return tostring(level)
+"""
+
+
+class RedisQuotaStorage:
+    """
+    Bucket state in Redis (or any server speaking its protocol and Lua).
+
+    Works across hosts. Any client exposing an async ``eval`` can be passed
+    in, which lets tests substitute a local stand-in.
+    """
+
+    def __init__(self, client) -> None:
+        """
+        Initialize the storage.
+
+        Args:
+            client: ``redis.asyncio.Redis``-compatible client.
+        """
+        self._client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisQuotaStorage":
+        """Connect with ``redis.asyncio`` (requires the ``redis`` package)."""
+        try:
+            from redis.asyncio import Redis
+        except ImportError as exc:
+            raise RuntimeError(
+                "Redis rate limit storage requires the 'redis' package"
+            ) from exc
+        return cls(Redis.from_url(url))
+
+    async def apply(
+        self, key: str, amount: float, capacity: float, rate: float
+    ) -> float:
+        """Refill a bucket, subtract ``amount`` and return the new level."""
+        level = await self._client.eval(
+            _REDIS_APPLY, 1, key, amount, capacity, rate, time.time()
+        )
+        return float(level)
+
+
+def create_quota_storage(uri: str) -> QuotaStorage:
+    """
+    Build quota storage from the same URI as the request rate limiter.
+
+    Args:
+        uri: ``memory://``, ``sqlite:///<path>`` or ``redis://...``.
+
+    Returns:
+        Matching quota storage.
+    """
+    scheme = uri.split("://", 1)[0]
+    if scheme == "sqlite":
+        return SQLiteQuotaStorage(sqlite_path_from_uri(uri))
+    if scheme.startswith("redis"):
+        return RedisQuotaStorage.from_url(uri)
+    return MemoryQuotaStorage()
+
+
+class TokenQuota:
+    """
+    Per-client token bucket charged by the tokens of each response.
+
+    Each client may use ``capacity`` tokens, refilled continuously at
+    ``capacity / window`` tokens per second. Requests are admitted while the
+    bucket is positive; a response's tokens are charged when it ends, even
+    if it was cut short.
+    """
+
+    def __init__(self, storage: QuotaStorage, capacity: int, window: int) -> None:
+        """
+        Initialize the quota.
+
+        Args:
+            storage: Shared bucket storage.
+            capacity: Tokens per window (0 disables the quota).
+            window: Refill window in seconds.
+        """
+        self._storage = storage
+        self._capacity = capacity
+        self._rate = capacity / window if window > 0 else 0.0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the quota is enforced."""
+        return self._capacity > 0 and self._rate > 0
+
+    async def check(self, key: str) -> None:
+        """
+        Admit a request if the client's bucket has tokens left.
+
+        Args:
+            key: Client identity (remote address).
+
+        Raises:
+            TokenQuotaExceeded: With the time until the bucket refills.
+        """
+        if not self.enabled:
+            return
+        level = await self._storage.apply(
+            f"quota:{key}", 0, self._capacity, self._rate
+        )
+        if level <= 0:
+            raise TokenQuotaExceeded(math.ceil((1 - level) / self._rate))
+
+    async def charge(self, key: str, tokens: int) -> None:
+        """
+        Charge a client for the tokens of a finished response.
+
+        Args:
+            key: Client identity (remote address).
+            tokens: Tokens generated for the client.
+        """
+        if self.enabled and tokens > 0:
+            await self._storage.apply(
+                f"quota:{key}", tokens, self._capacity, self._rate
+            )
+
+
+@lru_cache
+def get_token_quota() -> TokenQuota:
+    """Get the process-wide token quota."""
+    settings = get_settings()
+    return TokenQuota(
+        create_quota_storage(settings.rate_limit_storage_uri),
+        capacity=settings.token_quota,
+        window=settings.rate_limit_window,
+    )
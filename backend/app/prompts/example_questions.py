@@ -0,0 +1,27 @@
+"""Example questions shown by the frontend, used to pre-warm the cache."""
+
+import logging
+import re
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+_QUESTION_PATTERN = re.compile(r'question:\s*"((?:[^"\\]|\\.)*)"')
+
+
+def load_example_questions(path: str | Path) -> list[str]:
+    """
+    Read the questions from the frontend's ``example-questions.ts``.
+
+    Args:
+        path: Path to the TypeScript module with ``EXAMPLE_QUESTIONS``.
+
+    Returns:
+        Questions in display order (empty if the file is unavailable).
+    """
+    try:
+        source = Path(path).read_text(encoding="utf-8")
+    except OSError:
+        logger.warning("[CACHE] Example questions not found at %s", path)
+        return []
+    return [match.replace('\\"', '"') for match in _QUESTION_PATTERN.findall(source)]
@@ -0,0 +1,247 @@
+"""Admission control for concurrent upstream streams."""
+
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Callable
+from contextlib import aclosing
+from functools import lru_cache
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Weight of the newest sample in the moving average of slot hold time
+HOLD_TIME_SMOOTHING = 0.2
+# Multiplicative decrease applied when TTFT exceeds the target or on errors
+BACKOFF_FACTOR = 0.9
+
+
+class UpstreamOverloaded(Exception):
+    """Raised when a request cannot get an upstream slot in time."""
+
+    def __init__(self, retry_after: int) -> None:
+        """
+        Initialize the error.
+
+        Args:
+            retry_after: Suggested seconds to wait before retrying.
+        """
+        super().__init__(f"Upstream overloaded, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Bounded upstream concurrency with a deadline-aware wait queue.
+
+    At most ``limit`` upstream streams run at once; further requests wait in
+    a FIFO queue. The limit adapts with AIMD: it grows by about one per
+    window of healthy streams and shrinks multiplicatively, at most once per
+    smoothed slot hold time, when time-to-first-token exceeds the target or
+    the upstream fails. Requests whose estimated wait exceeds the queue
+    deadline are rejected up front.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        min_concurrency: int,
+        max_queue: int,
+        queue_timeout: float,
+        target_ttft: float,
+        adaptive: bool = True,
+    ) -> None:
+        """
+        Initialize the controller.
+
+        Args:
+            max_concurrency: Upper bound on concurrent streams (0 disables).
+            min_concurrency: Lower bound for the adaptive limit.
+            max_queue: Maximum number of waiting requests.
+            queue_timeout: Longest time a request may wait for a slot.
+            target_ttft: Upstream time-to-first-token considered healthy.
+            adaptive: Adjust the limit from observed TTFT and errors.
+        """
+        self._max = max_concurrency
+        self._min = max(1, min(min_concurrency, max_concurrency))
+        self._max_queue = max_queue
+        self._queue_timeout = queue_timeout
+        self._target_ttft = target_ttft
+        self._adaptive = adaptive
+        self.limit = float(max_concurrency)
+        self.in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._hold_time: float | None = None
+        self._last_decrease: float | None = None
+        self.admissions = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether admission control is active."""
+        return self._max > 0
+
+    def estimated_wait(self, position: int) -> float:
+        """
+        Estimate how long the request at a queue position will wait.
+
+        Args:
+            position: 1-based position in the queue.
+
+        Returns:
+            Estimated seconds (0 until a hold time has been observed).
+        """
+        if self._hold_time is None:
+            return 0.0
+        return position * self._hold_time / max(1.0, self.limit)
+
+    def check(self) -> None:
+        """
+        Reject early if a new upstream request could not start in time.
+
+        Raises:
+            UpstreamOverloaded: If the queue is full or too slow.
+        """
+        if not self.enabled or self.in_flight < int(self.limit):
+            return
+        position = len(self._waiters) + 1
+        wait = self.estimated_wait(position)
+        if position > self._max_queue or wait > self._queue_timeout:
+            self.rejected += 1
+            raise UpstreamOverloaded(self._retry_after(wait))
+
+    async def admitted(
+        self, source_factory: Callable[[], AsyncIterator[str]]
+    ) -> AsyncIterator[str]:
+        """
+        Run an upstream stream inside a concurrency slot.
+
+        Args:
+            source_factory: Creates the upstream stream once admitted.
+
+        Yields:
+            Content chunks from the upstream stream.
+
+        Raises:
+            UpstreamOverloaded: If no slot frees up within the queue timeout.
+        """
+        if not self.enabled:
+            async with aclosing(source_factory()) as source:
+                async for chunk in source:
+                    yield chunk
+            return
+
+        await self._acquire()
+        started = time.perf_counter()
+        ttft = None
+        failed = False
+        try:
+            async with aclosing(source_factory()) as source:
+                async for chunk in source:
+                    if ttft is None:
+                        ttft = time.perf_counter() - started
+                    yield chunk
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._release(time.perf_counter() - started, ttft, failed)
+
+    def stats(self) -> dict[str, int]:
+        """Report the current limit, usage and rejection counters."""
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "admitted": self.admissions,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+        }
+
+    async def _acquire(self) -> None:
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            self.admissions += 1
+            return
+        if len(self._waiters) >= self._max_queue:
+            self.rejected += 1
+            raise UpstreamOverloaded(self._retry_after(self.estimated_wait(1)))
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            async with asyncio.timeout(self._queue_timeout):
+                await waiter
+        except TimeoutError:
+            self._abandon(waiter)
+            self.timeouts += 1
+            raise UpstreamOverloaded(
+                self._retry_after(self.estimated_wait(len(self._waiters) + 1))
+            ) from None
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        self.admissions += 1
+
+    def _abandon(self, waiter: asyncio.Future) -> None:
+        if waiter.done() and not waiter.cancelled():
+            # The slot was handed over just before we gave up: pass it on
+            self._release_slot()
+        else:
+            waiter.cancel()
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def _release(self, hold_time: float, ttft: float | None, failed: bool) -> None:
+        if self._hold_time is None:
+            self._hold_time = hold_time
+        else:
+            self._hold_time += HOLD_TIME_SMOOTHING * (hold_time - self._hold_time)
+        if self._adaptive:
+            if failed or (ttft is not None and ttft > self._target_ttft):
+                # Streams of the same burst report after the first decrease
+                now = time.monotonic()
+                if (
+                    self._last_decrease is None
+                    or now - self._last_decrease >= self._hold_time
+                ):
+                    self._last_decrease = now
+                    self.limit = max(float(self._min), self.limit * BACKOFF_FACTOR)
+                    logger.info(
+                        "[ADMISSION] Limit decreased to %d (ttft=%s, failed=%s)",
+                        self.limit,
+                        ttft,
+                        failed,
+                    )
+            elif ttft is not None:
+                self.limit = min(float(self._max), self.limit + 1 / self.limit)
+        self._release_slot()
+
+    def _release_slot(self) -> None:
+        self.in_flight -= 1
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def _retry_after(self, wait: float) -> int:
+        return max(1, math.ceil(wait or self._hold_time or 1.0))
+
+
+@lru_cache
+def get_admission_controller() -> AdmissionController:
+    """Get the process-wide upstream admission controller."""
+    settings = get_settings()
+    return AdmissionController(
+        max_concurrency=settings.upstream_max_concurrency,
+        min_concurrency=settings.upstream_min_concurrency,
+        max_queue=settings.upstream_queue_size,
+        queue_timeout=settings.upstream_queue_timeout,
+        target_ttft=settings.upstream_target_ttft,
+        adaptive=settings.upstream_adaptive_concurrency,
+    )
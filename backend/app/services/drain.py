@@ -0,0 +1,218 @@
+"""Graceful drain of in-flight chat streams on shutdown."""
+
+import asyncio
+import logging
+import signal
+import threading
+import time
+from collections.abc import AsyncIterator, Callable
+from contextlib import aclosing
+from functools import lru_cache
+from typing import TypeVar
+
+from app.config import get_settings
+from app.services.sse import SHUTDOWN_FRAME
+
+logger = logging.getLogger(__name__)
+
+Frame = TypeVar("Frame", bytes, str)
+
+# Seconds a refused client should wait (another instance takes over)
+RETRY_AFTER = 2
+# Seconds aborted streams get to write their terminal event
+ABORT_TIMEOUT = 1.0
+
+
+class ServerDraining(Exception):
+    """Raised when a new chat request arrives while the server drains."""
+
+    def __init__(self, retry_after: int = RETRY_AFTER) -> None:
+        """
+        Initialize the error.
+
+        Args:
+            retry_after: Suggested seconds to wait before retrying.
+        """
+        super().__init__(f"Server shutting down, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class _Stream:
+    """One guarded response stream."""
+
+    __slots__ = ("aborted", "task")
+
+    def __init__(self) -> None:
+        self.aborted = False
+        # Set while the stream waits for its next frame
+        self.task: asyncio.Task | None = None
+
+
+class DrainController:
+    """
+    Lets running chat streams finish before the process exits.
+
+    ``drain`` (started by SIGTERM) makes readiness fail and refuses new chat
+    requests, then waits up to ``grace`` seconds for the streams running
+    at that moment. Streams still running afterwards are interrupted and
+    end with a terminal event telling the client to retry, instead of
+    being cut mid-answer by the exiting process.
+    """
+
+    def __init__(self, grace: float) -> None:
+        """
+        Initialize the controller.
+
+        Args:
+            grace: Seconds running streams get to finish (0 aborts at once).
+        """
+        self.grace = grace
+        self.draining = False
+        self._streams: set[_Stream] = set()
+        self._idle = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self.drained = 0
+        self.aborted = 0
+
+    @property
+    def active(self) -> int:
+        """Number of streams currently running."""
+        return len(self._streams)
+
+    def check(self) -> None:
+        """
+        Refuse new work while draining.
+
+        Raises:
+            ServerDraining: If a drain has started.
+        """
+        if self.draining:
+            raise ServerDraining()
+
+    async def guard(
+        self, frames: AsyncIterator[Frame], terminal: Frame = SHUTDOWN_FRAME
+    ) -> AsyncIterator[Frame]:
+        """
+        Pass a response's frames through, ending it early if a drain aborts it.
+
+        Args:
+            frames: Encoded frames of one response.
+            terminal: Frame sent when the stream is aborted (SSE by default).
+
+        Yields:
+            The frames, followed by ``terminal`` if the stream was aborted.
+        """
+        stream = _Stream()
+        self._streams.add(stream)
+        try:
+            async with aclosing(frames):
+                while not stream.aborted:
+                    stream.task = asyncio.current_task()
+                    try:
+                        frame = await anext(frames)
+                    except StopAsyncIteration:
+                        return
+                    except asyncio.CancelledError:
+                        # Only the drain's own interruption is turned into
+                        # the terminal event; other cancellations propagate
+                        if not stream.aborted:
+                            raise
+                        stream.task.uncancel()
+                        break
+                    finally:
+                        stream.task = None
+                    yield frame
+            yield terminal
+        finally:
+            self._streams.discard(stream)
+            if not self._streams:
+                self._idle.set()
+
+    async def _wait_idle(self, timeout: float) -> None:
+        deadline = time.monotonic() + timeout
+        while self._streams:
+            self._idle.clear()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                await asyncio.wait_for(self._idle.wait(), remaining)
+            except TimeoutError:
+                return
+
+    async def drain(self) -> tuple[int, int]:
+        """
+        Stop taking chat requests and wind down the running streams.
+
+        Returns:
+            Streams that finished within the grace period, and streams that
+            were aborted.
+        """
+        self.draining = True
+        running = self.active
+        logger.warning(
+            "[DRAIN] Shutting down: %d streams, %.0fs grace", running, self.grace
+        )
+        await self._wait_idle(self.grace)
+        aborted = self.active
+        for stream in list(self._streams):
+            stream.aborted = True
+            if stream.task is not None:
+                stream.task.cancel()
+        await self._wait_idle(ABORT_TIMEOUT)
+        self.drained += running - aborted
+        self.aborted += aborted
+        logger.warning(
+            "[DRAIN] Done: %d streams drained, %d aborted",
+            running - aborted,
+            aborted,
+        )
+        return running - aborted, aborted
+
+    def install_signal_handler(self) -> None:
+        """
+        Drain on SIGTERM before handing the signal to the server.
+
+        The server's own handler (uvicorn stops accepting connections and
+        exits) runs once the drain is over. Further SIGTERMs during the
+        drain are ignored; SIGINT still stops the server at once.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return
+        previous = signal.getsignal(signal.SIGTERM)
+        if not callable(previous):
+            return
+        loop = asyncio.get_running_loop()
+
+        def exit_after_drain(signum: int, frame) -> None:
+            if self._task is None:
+                loop.call_soon_threadsafe(self._start, lambda: previous(signum, frame))
+
+        signal.signal(signal.SIGTERM, exit_after_drain)
+
+    def _start(self, then: Callable[[], None]) -> None:
+        if self._task is not None:
+            return
+
+        async def run() -> None:
+            try:
+                await self.drain()
+            finally:
+                then()
+
+        self._task = asyncio.create_task(run())
+
+    def stats(self) -> dict[str, int]:
+        """Report drain state and stream counts."""
+        return {
+            "draining": int(self.draining),
+            "active_streams": self.active,
+            "drained": self.drained,
+            "aborted": self.aborted,
+        }
+
+
+@lru_cache
+def get_drain_controller() -> DrainController:
+    """Get the process-wide drain controller."""
+    return DrainController(grace=get_settings().shutdown_grace_period)
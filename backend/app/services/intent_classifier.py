@@ -0,0 +1,208 @@
+"""Local intent classifier that answers greetings and off-topic messages."""
+
+import logging
+import math
+import re
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+EXAMPLES_PATH = Path(__file__).resolve().parent.parent / "prompts" / "intents.tsv"
+
+# Intents answered locally with a template; everything else goes upstream
+TEMPLATES = {
+    "greeting": [
+        "Hi! I'm Vadym, a QA Engineer specializing in AI-powered test "
+        "automation and quality processes. Ask me anything about my skills "
+        "or background!",
+    ],
+    "off_topic": [
+        "Ha! I'm better at debugging code than geography. Ask me about "
+        "testing instead!",
+        "That's outside my test coverage! Try asking about my QA experience.",
+        "I only have answers for QA-related questions. Feel free to ask about "
+        "my work instead!",
+    ],
+}
+
+# Additive smoothing for unseen features
+SMOOTHING = 0.5
+
+
+def extract_features(text: str) -> list[str]:
+    """Lowercase word unigrams plus bigrams (with start/end markers)."""
+    words = re.findall(r"[a-z0-9+#']+", text.lower())
+    padded = ["<s>", *words, "</s>"]
+    bigrams = [f"{a} {b}" for a, b in zip(padded, padded[1:])]
+    return words + bigrams
+
+
+def load_examples(path: Path) -> list[tuple[str, str]]:
+    """
+    Read labeled examples from a ``label<TAB>text`` file.
+
+    Blank lines and lines starting with ``#`` are ignored.
+
+    Args:
+        path: Examples file.
+
+    Returns:
+        ``(label, text)`` pairs.
+    """
+    examples = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if not line.strip() or line.startswith("#"):
+            continue
+        label, _, text = line.partition("\t")
+        examples.append((label.strip(), text.strip()))
+    return examples
+
+
+def split_template(text: str) -> list[str]:
+    """Split a templated reply into word-sized chunks for streaming."""
+    return re.findall(r"\s*\S+", text)
+
+
+@dataclass(frozen=True)
+class Intent:
+    """Classification result for one message."""
+
+    label: str
+    confidence: float
+    # Share of the message's features seen in training
+    known: float = 0.0
+
+
+class IntentClassifier:
+    """
+    Multinomial naive Bayes over word and bigram features.
+
+    Trained in-process from a small labeled file. Labels have uniform
+    priors, so a message with no known features comes out with low
+    confidence and is passed upstream.
+    """
+
+    def __init__(
+        self, examples: list[tuple[str, str]], threshold: float, enabled: bool = True
+    ) -> None:
+        """
+        Train the model.
+
+        Args:
+            examples: ``(label, text)`` training pairs.
+            threshold: Minimum confidence to answer locally.
+            enabled: Answer locally; when False every message goes upstream.
+        """
+        self.enabled = enabled
+        self.threshold = threshold
+        self._counts: dict[str, Counter] = {}
+        for label, text in examples:
+            self._counts.setdefault(label, Counter()).update(extract_features(text))
+        self._vocabulary = {
+            feature for counts in self._counts.values() for feature in counts
+        }
+        self._totals = {
+            label: sum(counts.values()) for label, counts in self._counts.items()
+        }
+        self.routes: Counter = Counter()
+
+    @classmethod
+    def from_file(
+        cls, path: Path, threshold: float, enabled: bool = True
+    ) -> "IntentClassifier":
+        """Train a classifier from a labeled examples file."""
+        return cls(load_examples(path), threshold, enabled)
+
+    def classify(self, text: str) -> Intent:
+        """
+        Predict the intent of a message.
+
+        Args:
+            text: User message.
+
+        Returns:
+            Most likely label, its posterior probability and the share of
+            the message's features seen in training.
+        """
+        all_features = extract_features(text)
+        features = [f for f in all_features if f in self._vocabulary]
+        if not features:
+            return Intent("unknown", 0.0)
+        size = len(self._vocabulary)
+        scores = {}
+        for label, counts in self._counts.items():
+            denominator = self._totals[label] + SMOOTHING * size
+            scores[label] = sum(
+                math.log((counts[f] + SMOOTHING) / denominator) for f in features
+            )
+        best = max(scores, key=scores.get)
+        total = sum(math.exp(score - scores[best]) for score in scores.values())
+        return Intent(best, 1 / total, len(features) / len(all_features))
+
+    def route(
+        self, message: str, has_history: bool = False, intent: Intent | None = None
+    ) -> list[str] | None:
+        """
+        Decide whether a message can be answered locally.
+
+        Off-topic detection only applies to conversation openers: a short
+        follow-up depends on context the classifier does not see. Unknown
+        features count against a local answer: the confidence is scaled by
+        the share of known features, so "Hi, whats your email?" is not
+        answered as a plain greeting on the strength of "hi" alone.
+
+        Args:
+            message: User message.
+            has_history: Whether the message continues a conversation.
+            intent: The message's classification, if already made.
+
+        Returns:
+            Reply chunks to stream for a local answer, or None to go upstream.
+        """
+        if not self.enabled:
+            return None
+        intent = intent or self.classify(message)
+        local = (
+            intent.label in TEMPLATES
+            and intent.confidence * intent.known >= self.threshold
+            and not (intent.label == "off_topic" and has_history)
+        )
+        route = intent.label if local else "upstream"
+        self.routes[route] += 1
+        logger.info(
+            "[INTENT] %s (%.2f, %.0f%% known) -> %s",
+            intent.label,
+            intent.confidence,
+            intent.known * 100,
+            route,
+        )
+        if not local:
+            return None
+        templates = TEMPLATES[intent.label]
+        # Stable choice per message so cached and repeated answers agree
+        reply = templates[zlib.crc32(message.encode()) % len(templates)]
+        return split_template(reply)
+
+    def stats(self) -> dict[str, int]:
+        """Report how many messages took each route."""
+        return {
+            f"route_{route}": self.routes[route]
+            for route in ("greeting", "off_topic", "upstream")
+        }
+
+
+@lru_cache
+def get_intent_classifier() -> IntentClassifier:
+    """Get the process-wide intent classifier."""
+    settings = get_settings()
+    return IntentClassifier.from_file(
+        EXAMPLES_PATH,
+        settings.intent_confidence_threshold,
+        settings.intent_classifier_enabled,
+    )
@@ -0,0 +1,242 @@
+"""In-process latency metrics with Prometheus text exposition."""
+
+import asyncio
+import re
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Collection
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+# Latency buckets in seconds, from sub-millisecond to a slow full answer
+LATENCY_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+TOKEN_BUCKETS = (10, 25, 50, 100, 200, 300, 400, 500, 1000)
+
+_INVALID_NAME_CHARS = re.compile(r"[^a-zA-Z0-9_:]")
+
+
+def metric_name(name: str) -> str:
+    """
+    Make a string a valid Prometheus metric name.
+
+    Args:
+        name: Name built from stats keys, rule or route names.
+
+    Returns:
+        The name with invalid characters replaced by ``_``.
+    """
+    name = _INVALID_NAME_CHARS.sub("_", name)
+    if not name or name[0].isdigit():
+        name = f"_{name}"
+    return name
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram.
+
+    ``observe`` only bisects and increments preallocated counters, so it is
+    safe to call per token.
+    """
+
+    def __init__(self, name: str, help_text: str, buckets: tuple) -> None:
+        """
+        Initialize the histogram.
+
+        Args:
+            name: Prometheus metric name.
+            help_text: Metric description.
+            buckets: Sorted upper bounds (``+Inf`` is implicit).
+        """
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Record one observation."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self) -> list[str]:
+        """Render as Prometheus text lines with cumulative buckets."""
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} histogram",
+        ]
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {self.count}')
+        lines.append(f"{self.name}_sum {self.sum}")
+        lines.append(f"{self.name}_count {self.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Histograms plus callbacks exposing existing counters and gauges."""
+
+    def __init__(self) -> None:
+        """Create the chat stream histograms."""
+        self.queue_wait = Histogram(
+            "chat_queue_wait_seconds",
+            "Time from request arrival to the upstream call",
+            LATENCY_BUCKETS,
+        )
+        self.upstream_connect = Histogram(
+            "chat_upstream_connect_seconds",
+            "Time for the upstream to accept the request and start streaming",
+            LATENCY_BUCKETS,
+        )
+        self.ttft = Histogram(
+            "chat_time_to_first_token_seconds",
+            "Time from request arrival to the first content frame",
+            LATENCY_BUCKETS,
+        )
+        self.inter_chunk_gap = Histogram(
+            "chat_inter_chunk_gap_seconds",
+            "Gap between consecutive upstream content chunks",
+            LATENCY_BUCKETS,
+        )
+        self.tokens = Histogram(
+            "chat_stream_tokens",
+            "Content chunks (about one token each) per response",
+            TOKEN_BUCKETS,
+        )
+        self.duration = Histogram(
+            "chat_stream_duration_seconds",
+            "Time from request arrival to the end of the stream",
+            LATENCY_BUCKETS,
+        )
+        self._histograms = [
+            self.queue_wait,
+            self.upstream_connect,
+            self.ttft,
+            self.inter_chunk_gap,
+            self.tokens,
+            self.duration,
+        ]
+        self._collectors: list[
+            tuple[str, Callable[[], dict[str, int]], Collection[str]]
+        ] = []
+
+    def add_collector(
+        self,
+        prefix: str,
+        collect: Callable[[], dict[str, int]],
+        gauges: Collection[str] = (),
+    ) -> None:
+        """
+        Expose a stats dict as metrics named ``<prefix>_<key>``.
+
+        Keys are monotonic counters, exported as ``<prefix>_<key>_total``,
+        unless listed in ``gauges``.
+
+        Args:
+            prefix: Metric name prefix.
+            collect: Returns the current stats.
+            gauges: Keys whose values can go down (sizes, states, limits).
+        """
+        self._collectors.append((prefix, collect, gauges))
+
+    def render(self, extra: dict[str, dict[str, int]] | None = None) -> str:
+        """
+        Render all metrics in Prometheus text format.
+
+        Args:
+            extra: Additional stats dicts keyed by metric prefix, exposed as
+                gauges.
+
+        Returns:
+            Exposition text.
+        """
+        lines: list[str] = []
+        for histogram in self._histograms:
+            lines.extend(histogram.render())
+        sources = [
+            (prefix, collect(), gauges) for prefix, collect, gauges in self._collectors
+        ]
+        for prefix, stats in (extra or {}).items():
+            sources.append((prefix, stats, stats.keys()))
+        for prefix, stats, gauges in sources:
+            for key, value in stats.items():
+                name = metric_name(f"{prefix}_{key}")
+                kind = "gauge" if key in gauges else "counter"
+                if kind == "counter":
+                    name = f"{name}_total"
+                lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+@dataclass(slots=True)
+class StreamTimings:
+    """Timestamps (``time.perf_counter``) of one chat request's stream."""
+
+    received_at: float = field(default_factory=time.perf_counter)
+    upstream_started: float | None = None
+    connected: float | None = None
+    first_frame: float | None = None
+    tokens: int = 0
+    source: str = "upstream"
+    # Set when the resilience policy drops this attempt itself (hedge loser,
+    # timeout), so it isn't counted as a client cancellation
+    dropped: str | None = None
+    # Set once the upstream call starts, after any wait for admission
+    upstream_ready: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def start_upstream(self) -> None:
+        """Stamp the start of the upstream call."""
+        self.upstream_started = time.perf_counter()
+        self.upstream_ready.set()
+
+    def adopt(self, attempt: "StreamTimings") -> None:
+        """Take the upstream timings and token count of the attempt in use."""
+        self.upstream_started = attempt.upstream_started
+        self.connected = attempt.connected
+        self.tokens = attempt.tokens
+
+    def record(self, metrics: MetricsRegistry) -> str:
+        """
+        Observe the finished stream and build a one-line summary.
+
+        Args:
+            metrics: Registry to record into.
+
+        Returns:
+            Summary suitable for a log line.
+        """
+        finished = time.perf_counter()
+        parts = [f"source={self.source}"]
+        if self.upstream_started is not None:
+            queue_wait = self.upstream_started - self.received_at
+            metrics.queue_wait.observe(queue_wait)
+            parts.append(f"queue={queue_wait * 1000:.0f}ms")
+            if self.connected is not None:
+                connect = self.connected - self.upstream_started
+                metrics.upstream_connect.observe(connect)
+                parts.append(f"connect={connect * 1000:.0f}ms")
+        if self.first_frame is not None:
+            ttft = self.first_frame - self.received_at
+            metrics.ttft.observe(ttft)
+            parts.append(f"ttft={ttft * 1000:.0f}ms")
+        duration = finished - self.received_at
+        metrics.tokens.observe(self.tokens)
+        metrics.duration.observe(duration)
+        parts.append(f"tokens={self.tokens}")
+        parts.append(f"duration={duration * 1000:.0f}ms")
+        if self.tokens and duration > 0:
+            parts.append(f"tps={self.tokens / duration:.1f}")
+        return " ".join(parts)
+
+
+@lru_cache
+def get_metrics() -> MetricsRegistry:
+    """Get the process-wide metrics registry."""
+    return MetricsRegistry()
@@ -0,0 +1,295 @@
+"""Per-request choice of model, generation budget and temperature."""
+
+import logging
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass, replace
+from functools import lru_cache
+
+from app.config import get_settings
+from app.services.intent_classifier import (
+    Intent,
+    IntentClassifier,
+    get_intent_classifier,
+)
+from app.services.metrics import StreamTimings
+from app.services.openai_service import DEFAULT_MAX_TOKENS, DEFAULT_MODEL
+from app.services.prompt_builder import PromptBuilder, get_prompt_builder
+
+logger = logging.getLogger(__name__)
+
+# Rule name of requests no rule matched
+DEFAULT_RULE = "default"
+
+# Value type of each rule key: conditions first, then parameters
+RULE_KEYS = {
+    "intent": str,
+    "topic": str,
+    "min_chars": int,
+    "max_chars": int,
+    "min_history": int,
+    "max_history": int,
+    "model": str,
+    "max_tokens": int,
+    "temperature": float,
+}
+
+
+@dataclass(frozen=True)
+class RouteFeatures:
+    """Cheap local features of one request."""
+
+    chars: int
+    # Prior user turns in the conversation
+    history: int
+    # Intent classifier label, "unknown" below its confidence threshold
+    intent: str
+    # Best matching optional prompt section, if any
+    topic: str | None
+
+
+@dataclass(frozen=True)
+class ModelRoute:
+    """Completion parameters chosen for one request."""
+
+    model: str = DEFAULT_MODEL
+    max_tokens: int = DEFAULT_MAX_TOKENS
+    # None leaves the API default
+    temperature: float | None = None
+    rule: str = DEFAULT_RULE
+    # With a rule: "routed" when its parameters apply, "control" when held back
+    arm: str | None = None
+
+    @property
+    def name(self) -> str:
+        """Rule and A/B arm, e.g. ``brief_control``; used in logs and stats."""
+        return self.rule if self.arm is None else f"{self.rule}_{self.arm}"
+
+    @property
+    def cache_model(self) -> str:
+        """Model identity for cache keys (plain model name for the defaults)."""
+        if (self.max_tokens, self.temperature) == (DEFAULT_MAX_TOKENS, None):
+            return self.model
+        return f"{self.model}|{self.max_tokens}|{self.temperature}"
+
+
+@dataclass(frozen=True)
+class RouteRule:
+    """
+    Conditions on the request features plus the parameters they select.
+
+    Unset conditions match anything; unset parameters keep the default.
+    """
+
+    name: str
+    intent: str | None = None
+    topic: str | None = None
+    min_chars: int | None = None
+    max_chars: int | None = None
+    min_history: int | None = None
+    max_history: int | None = None
+    model: str | None = None
+    max_tokens: int | None = None
+    temperature: float | None = None
+
+    def matches(self, features: RouteFeatures) -> bool:
+        """Whether every set condition holds for the features."""
+        bounds = (
+            (self.min_chars, features.chars, self.max_chars),
+            (self.min_history, features.history, self.max_history),
+        )
+        return (
+            self.intent in (None, features.intent)
+            and self.topic in (None, features.topic)
+            and all(
+                (low is None or value >= low) and (high is None or value <= high)
+                for low, value, high in bounds
+            )
+        )
+
+    def apply(self, default: ModelRoute) -> ModelRoute:
+        """The default route with this rule's parameters filled in."""
+        return ModelRoute(
+            model=self.model or default.model,
+            max_tokens=self.max_tokens or default.max_tokens,
+            temperature=(
+                default.temperature if self.temperature is None else self.temperature
+            ),
+            rule=self.name,
+            arm="routed",
+        )
+
+
+def parse_routes(value: str) -> list[RouteRule]:
+    """
+    Parse rules like ``brief:max_chars=60,max_history=0,max_tokens=200``.
+
+    Rules are separated by ``;`` and tried in order. Each is a name, then
+    ``key=value`` pairs: conditions (``intent``, ``topic``, ``min_chars``,
+    ``max_chars``, ``min_history``, ``max_history``) and parameters
+    (``model``, ``max_tokens``, ``temperature``).
+
+    Args:
+        value: Rule list (empty for none).
+
+    Returns:
+        Parsed rules.
+
+    Raises:
+        ValueError: On an unknown key or a malformed rule.
+    """
+    rules = []
+    for spec in value.split(";"):
+        name, _, pairs = spec.partition(":")
+        if not name.strip():
+            continue
+        options = {}
+        for pair in pairs.split(","):
+            key, _, raw = pair.partition("=")
+            key = key.strip()
+            if not key:
+                continue
+            if key not in RULE_KEYS:
+                raise ValueError(f"Unknown model route key {key!r} in {name!r}")
+            options[key] = RULE_KEYS[key](raw.strip())
+        rules.append(RouteRule(name.strip(), **options))
+    return rules
+
+
+class ModelRouter:
+    """
+    Choose completion parameters per request from configurable rules.
+
+    The first rule matching the request's features (message length, intent,
+    topic, history depth) selects its model, ``max_tokens`` and temperature.
+    With an A/B split, that share of the conversations matching a rule is
+    kept on the defaults instead (the ``control`` arm). Assignment hashes
+    the caller's conversation or client identifier, so a conversation stays
+    in one arm whatever it asks.
+    Upstream requests are counted per rule and arm with their tokens and
+    latency, so each rule's effect can be compared against its control.
+    """
+
+    def __init__(
+        self,
+        rules: list[RouteRule],
+        classifier: IntentClassifier,
+        prompt_builder: PromptBuilder,
+        ab_split: float = 0.0,
+        default: ModelRoute | None = None,
+    ) -> None:
+        """
+        Initialize the router.
+
+        Args:
+            rules: Rules tried in order.
+            classifier: Intent classifier providing the ``intent`` feature.
+            prompt_builder: Section index providing the ``topic`` feature.
+            ab_split: Share of matching conversations kept on the defaults.
+            default: Parameters when no rule applies.
+        """
+        self.rules = rules
+        self.ab_split = ab_split
+        self.default = default or ModelRoute()
+        self._classifier = classifier
+        self._prompt_builder = prompt_builder
+        self.counts: Counter = Counter()
+
+    def features(
+        self,
+        message: str,
+        history: list[dict[str, str]],
+        intent: Intent | None = None,
+    ) -> RouteFeatures:
+        """Extract the routing features of a request, reusing its intent."""
+        intent = intent or self._classifier.classify(message)
+        return RouteFeatures(
+            chars=len(message),
+            history=sum(1 for item in history if item["role"] == "user"),
+            # Unsure predictions are not worth routing on
+            intent=(
+                intent.label
+                if intent.confidence >= self._classifier.threshold
+                else "unknown"
+            ),
+            topic=self._prompt_builder.topic(message),
+        )
+
+    def route(
+        self,
+        message: str,
+        history: list[dict[str, str]],
+        intent: Intent | None = None,
+        conversation: str | None = None,
+    ) -> ModelRoute:
+        """
+        Choose the completion parameters for a request.
+
+        Args:
+            message: The user's message.
+            history: Prior conversation messages.
+            intent: The message's classification, if already made.
+            conversation: Conversation or client identifier picking the A/B
+                arm; without one the rule always applies.
+
+        Returns:
+            The chosen route; logged with its features.
+        """
+        if not self.rules:
+            return self.default
+        features = self.features(message, history, intent)
+        rule = next((rule for rule in self.rules if rule.matches(features)), None)
+        route = self.default if rule is None else rule.apply(self.default)
+        if rule is not None and self.ab_split > 0 and conversation is not None:
+            if zlib.crc32(conversation.encode()) / 2**32 < self.ab_split:
+                route = replace(self.default, rule=rule.name, arm="control")
+        logger.info(
+            "[ROUTE] %s -> %s max_tokens=%d temperature=%s "
+            "(chars=%d history=%d intent=%s topic=%s)",
+            route.name,
+            route.model,
+            route.max_tokens,
+            route.temperature,
+            features.chars,
+            features.history,
+            features.intent,
+            features.topic,
+        )
+        return route
+
+    def record(self, route: ModelRoute, timings: StreamTimings) -> None:
+        """
+        Count a finished upstream response under its rule and arm.
+
+        Args:
+            route: Route the request took.
+            timings: The request's finished timings.
+        """
+        prefix = route.name
+        self.counts[f"{prefix}_requests"] += 1
+        self.counts[f"{prefix}_tokens"] += timings.tokens
+        finished = time.perf_counter()
+        self.counts[f"{prefix}_duration_ms"] += round(
+            (finished - timings.received_at) * 1000
+        )
+        if timings.first_frame is not None:
+            self.counts[f"{prefix}_ttft_ms"] += round(
+                (timings.first_frame - timings.received_at) * 1000
+            )
+
+    def stats(self) -> dict[str, int]:
+        """Report requests, tokens and summed latencies per rule and arm."""
+        return {"rules": len(self.rules), **self.counts}
+
+
+@lru_cache
+def get_model_router() -> ModelRouter:
+    """Get the process-wide model router."""
+    settings = get_settings()
+    return ModelRouter(
+        rules=parse_routes(settings.model_routes),
+        classifier=get_intent_classifier(),
+        prompt_builder=get_prompt_builder(),
+        ab_split=settings.model_routing_ab_split,
+    )
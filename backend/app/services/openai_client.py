@@ -0,0 +1,66 @@
+"""Shared AsyncOpenAI client backed by a pooled HTTP transport."""
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+from app.config import Settings
+
+
+class OpenAIClientPool:
+    """Process-wide AsyncOpenAI client with a tunable connection pool."""
+
+    def __init__(self, settings: Settings) -> None:
+        """
+        Build the HTTP transport and the OpenAI client on top of it.
+
+        Args:
+            settings: Application settings with pool and timeout options.
+        """
+        self._limits = httpx.Limits(
+            max_connections=settings.openai_max_connections,
+            max_keepalive_connections=settings.openai_max_keepalive_connections,
+            keepalive_expiry=settings.openai_keepalive_expiry,
+        )
+        self._http_client = DefaultAsyncHttpxClient(
+            limits=self._limits,
+            http2=settings.openai_http2,
+            timeout=httpx.Timeout(
+                connect=settings.openai_connect_timeout,
+                read=settings.openai_read_timeout,
+                write=settings.openai_write_timeout,
+                pool=settings.openai_pool_timeout,
+            ),
+        )
+        self.client = AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            base_url=settings.openai_base_url or None,
+            http_client=self._http_client,
+            # Retries are budgeted by the resilience layer instead
+            max_retries=0,
+        )
+
+    def pool_stats(self) -> dict[str, int]:
+        """
+        Report current connection pool usage.
+
+        Returns:
+            Counts of open, in-use and idle connections plus configured limits.
+        """
+        # httpx does not expose its pool publicly; read it defensively so a
+        # transport change degrades to zeros instead of breaking the endpoint.
+        transport = getattr(self._http_client, "_transport", None)
+        pool = getattr(transport, "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {
+            "connections": len(connections),
+            "in_use": len(connections) - idle,
+            "idle": idle,
+            "max_connections": self._limits.max_connections or 0,
+            "max_keepalive_connections": self._limits.max_keepalive_connections
+            or 0,
+        }
+
+    async def aclose(self) -> None:
+        """Close the client and release all pooled connections."""
+        await self.client.close()
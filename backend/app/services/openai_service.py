@@ -1,31 +1,89 @@
 """OpenAI service for chat completions."""
 
+import asyncio
+import logging
+import time
 from collections.abc import AsyncGenerator
+from dataclasses import asdict, dataclass
+from functools import lru_cache
 
+import anyio
+from fastapi.requests import HTTPConnection
 from openai import AsyncOpenAI
 
-from app.config import get_settings
 from app.prompts.system_prompt import SYSTEM_PROMPT
+from app.services.metrics import StreamTimings, get_metrics
+from app.services.openai_client import OpenAIClientPool
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gpt-4o-mini"
+DEFAULT_MAX_TOKENS = 500
+
+
+@dataclass
+class StreamStats:
+    """Counters for upstream streams their consumer abandoned early."""
+
+    cancelled: int = 0
+    # Estimated from the unused generation budget (one chunk ~ one token)
+    tokens_saved: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        """Return counters as a plain dict."""
+        return asdict(self)
+
+
+@lru_cache
+def get_stream_stats() -> StreamStats:
+    """Get the process-wide stream cancellation counters."""
+    return StreamStats()
 
 
 class OpenAIService:
     """Service for interacting with OpenAI API."""
 
-    def __init__(self) -> None:
-        """Initialize the OpenAI client."""
-        settings = get_settings()
-        self._client = AsyncOpenAI(api_key=settings.openai_api_key)
-        self._model = "gpt-4o-mini"
-        self._max_tokens = 500
+    def __init__(self, client: AsyncOpenAI) -> None:
+        """
+        Initialize the service.
+
+        Args:
+            client: Shared AsyncOpenAI client (owned by the application).
+        """
+        self._client = client
+        self._model = DEFAULT_MODEL
+        self._max_tokens = DEFAULT_MAX_TOKENS
+
+    @property
+    def model(self) -> str:
+        """Model used for completions."""
+        return self._model
 
     async def create_chat_stream(
-        self, message: str, history: list[dict[str, str]] | None = None
+        self,
+        message: str,
+        history: list[dict[str, str]] | None = None,
+        timings: StreamTimings | None = None,
+        system_prompt: str | None = None,
+        model: str | None = None,
+        max_tokens: int | None = None,
+        temperature: float | None = None,
     ) -> AsyncGenerator[str, None]:
         """
         Create a streaming chat completion.
 
+        If the consumer stops early (client disconnect or cancellation), the
+        upstream HTTP response is closed right away so the connection and the
+        remaining tokens are released.
+
         Args:
             message: The user's message.
+            history: Prior conversation messages.
+            timings: Optional timings to record upstream latency into.
+            system_prompt: Prompt to send instead of the full system prompt.
+            model: Model to use instead of the service's default.
+            max_tokens: Generation budget instead of the service's default.
+            temperature: Sampling temperature (None leaves the API default).
 
         Yields:
             Content chunks from the streaming response.
@@ -34,22 +92,71 @@ class OpenAIService:
             OpenAIError: If the API request fails.
         """
         history_messages = history or []
-        stream = await self._client.chat.completions.create(
-            model=self._model,
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                *history_messages,
-                {"role": "user", "content": message},
-            ],
-            max_tokens=self._max_tokens,
-            stream=True,
-        )
+        timings = timings or StreamTimings()
+        max_tokens = max_tokens or self._max_tokens
+        options = {} if temperature is None else {"temperature": temperature}
+        gaps = get_metrics().inter_chunk_gap
+        stream = None
+        received = 0
+        try:
+            timings.start_upstream()
+            stream = await self._client.chat.completions.create(
+                model=model or self._model,
+                messages=[
+                    {"role": "system", "content": system_prompt or SYSTEM_PROMPT},
+                    *history_messages,
+                    {"role": "user", "content": message},
+                ],
+                max_tokens=max_tokens,
+                stream=True,
+                **options,
+            )
+            last_chunk_at = timings.connected = time.perf_counter()
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    now = time.perf_counter()
+                    if received:
+                        gaps.observe(now - last_chunk_at)
+                    last_chunk_at = now
+                    received += 1
+                    timings.tokens = received
+                    yield chunk.choices[0].delta.content
+        except (asyncio.CancelledError, GeneratorExit):
+            if timings.dropped is not None:
+                logger.info(
+                    "[STREAM] Upstream dropped (%s) after %d chunks",
+                    timings.dropped,
+                    received,
+                )
+                raise
+            stats = get_stream_stats()
+            stats.cancelled += 1
+            stats.tokens_saved += max(0, max_tokens - received)
+            logger.info("[STREAM] Upstream cancelled after %d chunks", received)
+            raise
+        finally:
+            if stream is not None:
+                # Shield the close so a cancelled caller still releases the socket
+                with anyio.CancelScope(shield=True):
+                    await stream.close()
+
 
-        async for chunk in stream:
-            if chunk.choices and chunk.choices[0].delta.content:
-                yield chunk.choices[0].delta.content
+def get_openai_service(request: HTTPConnection) -> OpenAIService:
+    """
+    Get OpenAI service bound to the application's shared client.
 
+    Used by both HTTP and WebSocket endpoints.
 
-def get_openai_service() -> OpenAIService:
-    """Get OpenAI service instance."""
-    return OpenAIService()
+    The shared client pool is opened and closed by the application lifespan,
+    so the app must run with it (for example ``with TestClient(app)``); a
+    pool opened here would never be closed and would leak its connections.
+
+    Raises:
+        RuntimeError: If the app was started without its lifespan.
+    """
+    pool: OpenAIClientPool | None = getattr(request.app.state, "openai_pool", None)
+    if pool is None:
+        raise RuntimeError(
+            "Upstream client pool is not open; run the app with its lifespan"
+        )
+    return OpenAIService(pool.client)
@@ -0,0 +1,283 @@
+"""Similarity index serving stored answers to reworded first questions."""
+
+import logging
+import re
+import time
+import zlib
+from functools import lru_cache
+
+import numpy as np
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Character n-gram lengths hashed into each vector
+NGRAM_SIZES = (3, 4)
+# Words that carry no meaning for telling questions apart
+STOPWORDS = frozenset(
+    "a an and are at be can could did do does for have i in is it me of on "
+    "or please so tell the to us was what which would you your".split()
+)
+# Words that flip or invert a question's meaning while barely changing its
+# wording; questions only match when they share the same ones
+NEGATIONS = frozenset(
+    "not no never none nothing nobody nowhere cannot cant dont doesnt didnt "
+    "wont wouldnt isnt arent wasnt werent havent hasnt hadnt without".split()
+)
+OPPOSITES = frozenset(
+    "least most weakest strongest hardest easiest dislike hate".split()
+)
+
+
+def normalize_question(text: str) -> str:
+    """Lowercase words without punctuation and filler words."""
+    words = re.findall(r"[a-z0-9+#]+", text.casefold().replace("'", ""))
+    return " ".join(word for word in words if word not in STOPWORDS)
+
+
+def polarity(text: str) -> str:
+    """
+    Summarize the negation and opposite words of a question.
+
+    Args:
+        text: Question, normalized or not.
+
+    Returns:
+        Sorted marker words (any negation counts as ``not``), or ``""``.
+    """
+    markers = set()
+    for word in normalize_question(text).split():
+        if word in NEGATIONS:
+            markers.add("not")
+        elif word in OPPOSITES:
+            markers.add(word)
+    return " ".join(sorted(markers))
+
+
+def hash_vector(text: str, dims: int) -> np.ndarray:
+    """
+    Embed a question as a unit vector of hashed character n-grams.
+
+    N-grams are taken per word with boundary markers, so shared word stems
+    count even when the words differ ("worked" and "working"). Each n-gram
+    is hashed into one of ``dims`` buckets with a hash-derived sign, which
+    keeps collisions from adding up to spurious similarity.
+
+    Args:
+        text: Question, normalized or not.
+        dims: Vector length.
+
+    Returns:
+        ``float32`` vector of length ``dims`` (all zeros for empty text).
+    """
+    buckets: list[int] = []
+    for word in normalize_question(text).split():
+        padded = f" {word} "
+        for size in NGRAM_SIZES:
+            buckets.extend(
+                zlib.crc32(padded[i : i + size].encode())
+                for i in range(max(1, len(padded) - size + 1))
+            )
+    vector = np.zeros(dims, dtype=np.float32)
+    if not buckets:
+        return vector
+    hashes = np.array(buckets, dtype=np.uint32)
+    signs = np.where(hashes >> 31, -1.0, 1.0).astype(np.float32)
+    np.add.at(vector, hashes % dims, signs)
+    # Sublinear term frequency, then unit length for cosine by dot product
+    vector = np.sign(vector) * np.log1p(np.abs(vector))
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class ParaphraseIndex:
+    """
+    Bounded nearest-neighbour index of answered first-turn questions.
+
+    Questions are stored as rows of one preallocated ``float32`` matrix, so
+    a lookup is a single matrix-vector product over all entries. A match at
+    or above ``threshold`` cosine similarity returns the stored answer, but
+    only between questions with the same negation and opposite words
+    (``polarity``): "What skills do you not have?" is close in wording to
+    "What skills do you have?" yet asks the opposite. When full, the least
+    recently used entry is replaced. Each entry records the version (model,
+    generation parameters and system prompt) its answer was made with, and
+    only entries of the requested version match, so answers of other routes
+    or prompts are never reused and age out instead.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        dims: int,
+        threshold: float,
+        enabled: bool = True,
+    ) -> None:
+        """
+        Initialize the index.
+
+        Args:
+            max_entries: Questions kept (0 disables the index).
+            dims: Hashed vector length.
+            threshold: Minimum cosine similarity to reuse an answer.
+            enabled: Whether lookups and inserts do anything.
+        """
+        self.enabled = enabled and max_entries > 0
+        self.dims = dims
+        self.threshold = threshold
+        self._matrix = np.zeros((max(max_entries, 0), dims), dtype=np.float32)
+        self._last_used = np.zeros(max(max_entries, 0))
+        # Per entry, its version and that version's number in ``_version_ids``
+        self._versions: list[str] = []
+        self._version_of = np.zeros(max(max_entries, 0), dtype=np.int32)
+        self._version_ids: dict[str, int] = {}
+        # Per entry, the number of its ``polarity`` in ``_polarity_ids``
+        self._polarity_of = np.zeros(max(max_entries, 0), dtype=np.int32)
+        self._polarity_ids: dict[str, int] = {}
+        self._questions: list[str] = []
+        self._answers: list[list[str]] = []
+        # (version, normalized question) -> entry, for replacing in place
+        self._entries: dict[tuple[str, str], int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def search(
+        self, question: str, version: str | None = None
+    ) -> tuple[int, float] | None:
+        """
+        Find the most similar stored question.
+
+        Args:
+            question: User message.
+            version: Only consider entries of this version (None for all).
+
+        Returns:
+            ``(entry, similarity)`` of the best match, or None if no entry
+            of the version shares the question's polarity.
+        """
+        count = len(self._questions)
+        version_id = self._version_ids.get(version)
+        polarity_id = self._polarity_ids.get(polarity(question))
+        if not count or polarity_id is None:
+            return None
+        if version is not None and version_id is None:
+            return None
+        scores = self._matrix[:count] @ hash_vector(question, self.dims)
+        scores[self._polarity_of[:count] != polarity_id] = -np.inf
+        if version is not None:
+            scores[self._version_of[:count] != version_id] = -np.inf
+        best = int(np.argmax(scores))
+        if np.isneginf(scores[best]):
+            return None
+        return best, float(scores[best])
+
+    def lookup(self, question: str, version: str) -> list[str] | None:
+        """
+        Return the stored answer of a paraphrase of ``question``.
+
+        Args:
+            question: First message of a conversation.
+            version: Model, parameters and system prompt the answer must match.
+
+        Returns:
+            Answer chunks, or None if nothing is similar enough.
+        """
+        if not self.enabled:
+            return None
+        match = self.search(question, version)
+        if match is None or match[1] < self.threshold:
+            self.misses += 1
+            return None
+        entry, similarity = match
+        self._last_used[entry] = time.monotonic()
+        self.hits += 1
+        logger.info(
+            "[PARAPHRASE] Hit (%.2f): %.50r ~ %.50r",
+            similarity,
+            question,
+            self._questions[entry],
+        )
+        return self._answers[entry]
+
+    def add(self, question: str, chunks: list[str], version: str) -> None:
+        """
+        Store the answer to a first-turn question.
+
+        A question normalizing to an already stored one of the same version
+        replaces its answer.
+
+        Args:
+            question: First message of a conversation.
+            chunks: Answer content chunks in streaming order.
+            version: Model, parameters and system prompt of the answer.
+        """
+        if not self.enabled or not chunks:
+            return
+        normalized = normalize_question(question)
+        if not normalized:
+            return
+        key = (version, normalized)
+        entry = self._entries.get(key)
+        if entry is None and len(self._questions) < len(self._matrix):
+            entry = len(self._questions)
+            self._questions.append("")
+            self._answers.append([])
+            self._versions.append("")
+        elif entry is None:
+            entry = int(np.argmin(self._last_used))
+            evicted = normalize_question(self._questions[entry])
+            del self._entries[(self._versions[entry], evicted)]
+            self.evictions += 1
+        self._entries[key] = entry
+        self._versions[entry] = version
+        self._version_of[entry] = self._version_ids.setdefault(
+            version, len(self._version_ids)
+        )
+        self._polarity_of[entry] = self._polarity_ids.setdefault(
+            polarity(question), len(self._polarity_ids)
+        )
+        self._matrix[entry] = hash_vector(question, self.dims)
+        self._last_used[entry] = time.monotonic()
+        self._questions[entry] = question
+        self._answers[entry] = chunks
+
+    def clear(self) -> int:
+        """
+        Drop all entries.
+
+        Returns:
+            Number of entries removed.
+        """
+        count = len(self._questions)
+        self._matrix[:count] = 0
+        self._last_used[:count] = 0
+        self._questions.clear()
+        self._answers.clear()
+        self._entries.clear()
+        self._versions.clear()
+        self._version_ids.clear()
+        self._polarity_ids.clear()
+        return count
+
+    def stats(self) -> dict[str, int]:
+        """Report index size and hit/miss/eviction counters."""
+        return {
+            "entries": len(self._questions),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+@lru_cache
+def get_paraphrase_index() -> ParaphraseIndex:
+    """Get the process-wide paraphrase index."""
+    settings = get_settings()
+    return ParaphraseIndex(
+        max_entries=settings.paraphrase_index_max_entries,
+        dims=settings.paraphrase_index_dims,
+        threshold=settings.paraphrase_threshold,
+        enabled=settings.paraphrase_index_enabled,
+    )
@@ -0,0 +1,256 @@
+"""Retrieval-based system prompt assembly."""
+
+import hashlib
+import logging
+import math
+import re
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+
+from app.config import get_settings
+from app.prompts.system_prompt import (
+    CORE_SECTIONS,
+    PROMPT_SECTIONS,
+    SYSTEM_PROMPT,
+    SYSTEM_PROMPT_VERSION,
+    assemble_prompt,
+)
+from app.services.context_builder import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Extra retrieval terms per section (indexed only, never sent upstream)
+SECTION_KEYWORDS = {
+    "summary": "about yourself who are you background overview introduce",
+    "skills": "skill tool stack technology language framework know use",
+    "experience": "work job company employer career role position current "
+    "recent previous before last first history worked",
+    "projects": "project built build product app application responsibility "
+    "responsibilities",
+    "facts": "years how long certification certified istqb",
+    "achievements": "achievement accomplishment proud impact result",
+    "availability": "available availability hire hiring open opportunity "
+    "contract freelance remote timezone notice start rate",
+    "github": "github code repository open source portfolio",
+    "contact": "contact reach email mail linkedin connect touch message",
+    "booking": "book booking call meeting schedule intro chat calendar",
+}
+
+STOPWORDS = frozenset(
+    "a about an and are as at be but by can do does for from has have i in is it me "
+    "my of on or so that the this to was were what when where which who will "
+    "with you your".split()
+)
+
+# BM25 parameters (standard defaults)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokens without stopwords, with plural endings folded."""
+    tokens = []
+    for word in re.findall(r"[a-z0-9+#]+", text.lower()):
+        if word in STOPWORDS:
+            continue
+        if len(word) > 4 and word.endswith("ies"):
+            word = word[:-3] + "y"
+        elif len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+class BM25Index:
+    """Okapi BM25 over a small, fixed set of named documents."""
+
+    def __init__(self, documents: dict[str, str]) -> None:
+        """
+        Index the documents.
+
+        Args:
+            documents: Text to index keyed by document name.
+        """
+        self._names = list(documents)
+        self._term_counts = [Counter(tokenize(text)) for text in documents.values()]
+        self._lengths = [sum(counts.values()) for counts in self._term_counts]
+        self._avg_length = sum(self._lengths) / max(1, len(self._lengths))
+        frequencies = Counter(
+            term for counts in self._term_counts for term in counts
+        )
+        total = len(self._names)
+        self._idf = {
+            term: math.log(1 + (total - df + 0.5) / (df + 0.5))
+            for term, df in frequencies.items()
+        }
+
+    def search(self, terms: frozenset[str], top_k: int) -> list[str]:
+        """
+        Rank documents for a query.
+
+        Args:
+            terms: Distinct query terms.
+            top_k: Maximum number of documents to return.
+
+        Returns:
+            Names of matching documents, best first (no zero scores).
+        """
+        scores = []
+        for name, counts, length in zip(
+            self._names, self._term_counts, self._lengths
+        ):
+            score = 0.0
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / self._avg_length)
+            for term in terms:
+                tf = counts.get(term, 0)
+                if tf:
+                    score += self._idf[term] * tf * (BM25_K1 + 1) / (tf + norm)
+            if score > 0:
+                scores.append((score, name))
+        scores.sort(key=lambda item: item[0], reverse=True)
+        return [name for _, name in scores[:top_k]]
+
+
+@dataclass(frozen=True)
+class AssembledPrompt:
+    """System prompt chosen for one request."""
+
+    text: str
+    sections: tuple[str, ...]
+    tokens: int
+    tokens_saved: int
+    # Short content hash, used in response cache keys
+    version: str
+
+
+class PromptBuilder:
+    """
+    Assemble a per-request system prompt from retrieved sections.
+
+    The persona, core sections and guidelines are always included; other
+    knowledge sections are added when BM25 ranks them among the top matches
+    for the message and the latest history. Assembled prompts are kept in
+    an LRU cache keyed by the query terms.
+    """
+
+    def __init__(self, enabled: bool, top_k: int, cache_size: int) -> None:
+        """
+        Initialize the builder.
+
+        Args:
+            enabled: Retrieve sections; otherwise always send the full prompt.
+            top_k: Maximum retrieved sections per request.
+            cache_size: Maximum cached assembled prompts.
+        """
+        self.enabled = enabled
+        self._top_k = top_k
+        self._cache_size = cache_size
+        self._cache: OrderedDict[frozenset[str], AssembledPrompt] = OrderedDict()
+        self._index = BM25Index(
+            {
+                name: f"{text} {SECTION_KEYWORDS.get(name, '')}"
+                for name, text in PROMPT_SECTIONS.items()
+                if name not in CORE_SECTIONS
+            }
+        )
+        self._full_tokens = estimate_tokens(SYSTEM_PROMPT)
+        self._full = AssembledPrompt(
+            SYSTEM_PROMPT,
+            tuple(PROMPT_SECTIONS),
+            self._full_tokens,
+            0,
+            SYSTEM_PROMPT_VERSION,
+        )
+        self.hits = 0
+        self.misses = 0
+        self.tokens_saved = 0
+
+    def build(
+        self, message: str, history: list[dict[str, str]] | None = None
+    ) -> AssembledPrompt:
+        """
+        Choose the system prompt for a request.
+
+        Args:
+            message: The user's message.
+            history: Conversation history (the last turn informs retrieval,
+                so follow-ups like "and before that?" keep their context).
+
+        Returns:
+            The assembled prompt.
+        """
+        if not self.enabled:
+            return self._full
+        recent = [item["content"] for item in (history or [])[-2:]]
+        terms = frozenset(tokenize(" ".join([*recent, message])))
+
+        prompt = self._cache.get(terms)
+        if prompt is not None:
+            self._cache.move_to_end(terms)
+            self.hits += 1
+        else:
+            self.misses += 1
+            prompt = self._assemble(terms)
+            self._cache[terms] = prompt
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+        self.tokens_saved += prompt.tokens_saved
+        logger.info(
+            "[PROMPT] Sections %s: %d tokens (%d saved)",
+            ",".join(prompt.sections),
+            prompt.tokens,
+            prompt.tokens_saved,
+        )
+        return prompt
+
+    def topic(self, message: str) -> str | None:
+        """
+        Name the optional section that best matches a message.
+
+        Works whether or not retrieval is enabled.
+
+        Args:
+            message: The user's message.
+
+        Returns:
+            Section name, or None when no section shares a term with it.
+        """
+        matches = self._index.search(frozenset(tokenize(message)), 1)
+        return matches[0] if matches else None
+
+    def _assemble(self, terms: frozenset[str]) -> AssembledPrompt:
+        retrieved = self._index.search(terms, self._top_k)
+        sections = tuple(
+            name
+            for name in PROMPT_SECTIONS
+            if name in CORE_SECTIONS or name in retrieved
+        )
+        text = assemble_prompt(sections)
+        tokens = estimate_tokens(text)
+        version = hashlib.sha256(text.encode()).hexdigest()[:12]
+        return AssembledPrompt(
+            text, sections, tokens, self._full_tokens - tokens, version
+        )
+
+    def stats(self) -> dict[str, int]:
+        """Report prompt cache counters and total prompt tokens saved."""
+        return {
+            "enabled": int(self.enabled),
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._cache),
+            "tokens_saved": self.tokens_saved,
+        }
+
+
+@lru_cache
+def get_prompt_builder() -> PromptBuilder:
+    """Get the process-wide system prompt builder."""
+    settings = get_settings()
+    return PromptBuilder(
+        enabled=settings.prompt_retrieval_enabled,
+        top_k=settings.prompt_retrieval_top_k,
+        cache_size=settings.prompt_cache_size,
+    )
@@ -0,0 +1,495 @@
+"""Upstream resilience: budgeted retries, hedged requests, circuit breaker."""
+
+import asyncio
+import logging
+import math
+import random
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Callable
+from contextlib import aclosing
+from functools import lru_cache
+
+from openai import APIConnectionError, InternalServerError
+
+from app.config import get_settings
+from app.services.metrics import StreamTimings
+
+logger = logging.getLogger(__name__)
+
+# Served while the circuit is open and no cached answer exists
+FALLBACK_REPLY = (
+    "I'm having trouble reaching my AI backend right now. Please try again "
+    "in a minute, or reach out to me directly via LinkedIn or email!"
+)
+
+# Recent upstream TTFTs kept for the hedging percentile
+TTFT_SAMPLES = 200
+# Hedging starts once this many TTFTs have been observed
+HEDGE_MIN_SAMPLES = 20
+
+# Why the policy dropped an attempt itself (see ``StreamTimings.dropped``)
+HEDGE_LOST = "hedge_lost"
+FIRST_TOKEN_TIMEOUT = "first_token_timeout"
+STALLED = "stalled"
+
+_END = object()
+
+
+class UpstreamTimeout(Exception):
+    """Raised when the upstream sends nothing within the allowed time."""
+
+
+class CircuitOpen(Exception):
+    """Raised when the circuit breaker rejects an upstream call."""
+
+    def __init__(self, retry_after: int) -> None:
+        """
+        Initialize the error.
+
+        Args:
+            retry_after: Suggested seconds to wait before retrying.
+        """
+        super().__init__(f"Upstream circuit open, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+# Failures worth retrying, and the ones that count against upstream health
+RETRYABLE_ERRORS = (APIConnectionError, InternalServerError, UpstreamTimeout)
+
+
+class RetryBudget:
+    """
+    Token bucket capping retries at a fraction of requests.
+
+    Every request deposits ``ratio`` tokens and every retry spends one, so
+    during an outage retries add at most ``ratio`` extra load instead of
+    multiplying it.
+    """
+
+    def __init__(self, ratio: float, max_tokens: float) -> None:
+        """
+        Initialize a full budget.
+
+        Args:
+            ratio: Retry tokens earned per request.
+            max_tokens: Bucket capacity (burst of retries allowed).
+        """
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.balance = max_tokens
+
+    def deposit(self) -> None:
+        """Credit the budget for one request."""
+        self.balance = min(self.max_tokens, self.balance + self.ratio)
+
+    def withdraw(self) -> bool:
+        """Spend one retry token if available."""
+        if self.balance < 1:
+            return False
+        self.balance -= 1
+        return True
+
+
+class CircuitBreaker:
+    """
+    Error-rate circuit breaker over a sliding time window.
+
+    The circuit opens when at least ``min_requests`` calls finished in the
+    window and the share of failures reaches ``error_rate``. After
+    ``cooldown`` seconds one probe call is let through (half-open); its
+    outcome closes the circuit or opens it again.
+    """
+
+    def __init__(
+        self, error_rate: float, min_requests: int, window: float, cooldown: float
+    ) -> None:
+        """
+        Initialize a closed breaker.
+
+        Args:
+            error_rate: Failure share that opens the circuit (0 disables).
+            min_requests: Outcomes needed in the window before it can open.
+            window: Sliding window length in seconds.
+            cooldown: Seconds the circuit stays open before a probe.
+        """
+        self.error_rate = error_rate
+        self.min_requests = min_requests
+        self.window = window
+        self.cooldown = cooldown
+        self._outcomes: deque[tuple[float, bool]] = deque()
+        self._opened_at: float | None = None
+        self._probe_started: float | None = None
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        """``closed``, ``open`` or ``half_open``."""
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at < self.cooldown:
+            return "open"
+        return "half_open"
+
+    def retry_after(self) -> int:
+        """Seconds until the next probe is allowed."""
+        if self._opened_at is None:
+            return 0
+        remaining = self._opened_at + self.cooldown - time.monotonic()
+        return max(1, math.ceil(remaining))
+
+    def allow(self) -> bool:
+        """
+        Decide whether an upstream call may start.
+
+        Returns:
+            True when closed, or for the single probe of a half-open circuit.
+        """
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "open":
+            return False
+        now = time.monotonic()
+        # A probe that never reported back (e.g. abandoned) expires
+        if self._probe_started is None or now - self._probe_started > self.cooldown:
+            self._probe_started = now
+            return True
+        return False
+
+    def record(self, ok: bool | None) -> None:
+        """
+        Record the outcome of a call that was allowed.
+
+        Args:
+            ok: True on success, False on an upstream failure, None when the
+                call ended without telling anything about upstream health.
+        """
+        probing = self._probe_started is not None
+        self._probe_started = None
+        if ok is None:
+            return
+        now = time.monotonic()
+        if probing:
+            if ok:
+                logger.info("[BREAKER] Probe succeeded, closing circuit")
+                self._opened_at = None
+                self._outcomes.clear()
+            else:
+                self._opened_at = now
+            return
+        self._outcomes.append((now, ok))
+        while self._outcomes and now - self._outcomes[0][0] > self.window:
+            self._outcomes.popleft()
+        failures = sum(1 for _, success in self._outcomes if not success)
+        if (
+            self._opened_at is None
+            and self.error_rate > 0
+            and len(self._outcomes) >= self.min_requests
+            and failures / len(self._outcomes) >= self.error_rate
+        ):
+            self._opened_at = now
+            self.opened += 1
+            logger.warning(
+                "[BREAKER] Opening circuit: %d/%d upstream calls failed in %.0fs",
+                failures,
+                len(self._outcomes),
+                self.window,
+            )
+
+
+async def _next(source: AsyncIterator[str]) -> object:
+    return await anext(source, _END)
+
+
+class UpstreamResilience:
+    """
+    Failure policy around one upstream chat stream.
+
+    Before the first token is sent to the client, connection failures,
+    5xx responses and first-token timeouts are retried with exponential
+    backoff, within a retry budget. Optionally, when the first token is
+    slower than a percentile of recent upstream TTFTs (admission queue time
+    excluded), a second (hedged) request is started and whichever answers
+    first is kept; the other is cancelled.
+    After the first token nothing is retried, but a stall between chunks
+    ends the stream. A circuit breaker tracks the outcomes and fails fast
+    while the upstream is unhealthy.
+
+    Each attempt records into its own ``StreamTimings``; the request's
+    timings take the values of the attempt that is streamed. Attempts the
+    policy drops (hedge losers, timeouts) are counted here, not as client
+    cancellations.
+    """
+
+    def __init__(
+        self,
+        max_retries: int,
+        backoff: float,
+        budget: RetryBudget,
+        breaker: CircuitBreaker,
+        first_token_timeout: float,
+        stall_timeout: float,
+        hedge: bool = False,
+        hedge_percentile: float = 95.0,
+        hedge_min_delay: float = 0.5,
+    ) -> None:
+        """
+        Initialize the policy.
+
+        Args:
+            max_retries: Retries per request before the first token.
+            backoff: Delay before the first retry in seconds (doubles after).
+            budget: Shared retry budget.
+            breaker: Shared circuit breaker.
+            first_token_timeout: Max seconds to the first token per attempt.
+            stall_timeout: Max seconds between chunks once streaming.
+            hedge: Start a hedged request when the first token is slow.
+            hedge_percentile: TTFT percentile that triggers the hedge.
+            hedge_min_delay: Lower bound of the hedge delay in seconds.
+        """
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.budget = budget
+        self.breaker = breaker
+        self.first_token_timeout = first_token_timeout
+        self.stall_timeout = stall_timeout
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self._ttfts: deque[float] = deque(maxlen=TTFT_SAMPLES)
+        self.retries = 0
+        self.retries_denied = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.hedge_losers = 0
+        self.first_token_timeouts = 0
+        self.stall_timeouts = 0
+        self.rejected = 0
+        self.fallbacks = 0
+
+    def check(self) -> None:
+        """
+        Fail fast before starting an upstream call.
+
+        Raises:
+            CircuitOpen: If the circuit breaker is open.
+        """
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise CircuitOpen(self.breaker.retry_after())
+
+    def hedge_delay(self) -> float | None:
+        """Wait before hedging, or None while hedging is off or uncalibrated."""
+        if not self.hedge or len(self._ttfts) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self._ttfts)
+        rank = min(len(ordered) - 1, int(len(ordered) * self.hedge_percentile / 100))
+        return max(self.hedge_min_delay, ordered[rank])
+
+    async def stream(
+        self,
+        source_factory: Callable[[StreamTimings], AsyncIterator[str]],
+        timings: StreamTimings | None = None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream an upstream completion under the failure policy.
+
+        Call ``check`` first; the outcome is reported to the breaker.
+
+        Args:
+            source_factory: Opens a new upstream content stream per attempt,
+                recording into the timings it is given.
+            timings: Request timings, updated from the streamed attempt.
+
+        Yields:
+            Content chunks of the winning attempt.
+
+        Raises:
+            OpenAIError: If the upstream fails and retries are exhausted.
+            UpstreamTimeout: If the upstream stalls.
+        """
+        ok = None
+        timings = timings or StreamTimings()
+        try:
+            self.budget.deposit()
+            attempt = 0
+            while True:
+                try:
+                    source, first, winner = await self._first_chunk(source_factory)
+                    break
+                except RETRYABLE_ERRORS as exc:
+                    if attempt >= self.max_retries:
+                        raise
+                    if not self.budget.withdraw():
+                        self.retries_denied += 1
+                        raise
+                    attempt += 1
+                    self.retries += 1
+                    logger.warning(
+                        "[RESILIENCE] Retry %d after %s", attempt, type(exc).__name__
+                    )
+                    delay = self.backoff * 2 ** (attempt - 1)
+                    await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+            async with aclosing(source):
+                timings.adopt(winner)
+                if first is not _END:
+                    yield first
+                    while True:
+                        chunk = await self._next_chunk(source, winner)
+                        if chunk is _END:
+                            break
+                        timings.tokens = winner.tokens
+                        yield chunk
+            ok = True
+        except RETRYABLE_ERRORS:
+            ok = False
+            raise
+        finally:
+            self.breaker.record(ok)
+
+    async def _first_chunk(
+        self, source_factory: Callable[[StreamTimings], AsyncIterator[str]]
+    ) -> tuple[AsyncIterator[str], object, StreamTimings]:
+        """Open the upstream (hedged if due) and wait for its first chunk."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.first_token_timeout
+        hedge_delay = self.hedge_delay()
+        racers: dict[asyncio.Task, tuple[AsyncIterator[str], StreamTimings]] = {}
+
+        def start() -> tuple[AsyncIterator[str], StreamTimings]:
+            attempt = StreamTimings()
+            source = source_factory(attempt)
+            racers[asyncio.create_task(_next(source))] = (source, attempt)
+            return source, attempt
+
+        primary, primary_attempt = start()
+        dropped = None
+        try:
+            if hedge_delay is not None:
+                # The hedge clock starts when the primary reaches the upstream:
+                # while it waits for admission, a hedge would only queue too
+                admitted = asyncio.create_task(primary_attempt.upstream_ready.wait())
+                try:
+                    await asyncio.wait(
+                        [*racers, admitted],
+                        timeout=max(0.0, deadline - loop.time()),
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+                finally:
+                    admitted.cancel()
+                if (
+                    primary_attempt.upstream_ready.is_set()
+                    and loop.time() + hedge_delay < deadline
+                ):
+                    done, _ = await asyncio.wait(racers, timeout=hedge_delay)
+                    if not done:
+                        self.hedges += 1
+                        logger.info("[RESILIENCE] Hedging after %.2fs", hedge_delay)
+                        start()
+            error: BaseException | None = None
+            while racers:
+                done, _ = await asyncio.wait(
+                    racers,
+                    timeout=max(0.0, deadline - loop.time()),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    dropped = FIRST_TOKEN_TIMEOUT
+                    self.first_token_timeouts += 1
+                    raise UpstreamTimeout(
+                        f"No first token within {self.first_token_timeout}s"
+                    )
+                for task in done:
+                    source, attempt = racers.pop(task)
+                    if task.exception() is None:
+                        if source is not primary:
+                            self.hedge_wins += 1
+                        dropped = HEDGE_LOST
+                        self.hedge_losers += len(racers)
+                        if attempt.upstream_started is not None:
+                            self._ttfts.append(
+                                time.perf_counter() - attempt.upstream_started
+                            )
+                        return source, task.result(), attempt
+                    error = task.exception()
+                    await source.aclose()
+            raise error
+        finally:
+            # Cancel the losing (or timed out) attempts and release them
+            for task, (_, attempt) in racers.items():
+                attempt.dropped = dropped
+                task.cancel()
+            if racers:
+                await asyncio.wait(racers)
+            for source, _ in racers.values():
+                await source.aclose()
+
+    async def _next_chunk(
+        self, source: AsyncIterator[str], attempt: StreamTimings
+    ) -> object:
+        """
+        Wait for the next chunk, ending the attempt if the upstream stalls.
+
+        Raises:
+            UpstreamTimeout: If nothing arrives within the stall timeout.
+        """
+        task = asyncio.current_task()
+
+        def stall() -> None:
+            # Mark the attempt first so it isn't counted as a client cancel
+            attempt.dropped = STALLED
+            task.cancel()
+
+        watchdog = asyncio.get_running_loop().call_later(self.stall_timeout, stall)
+        try:
+            return await anext(source, _END)
+        except asyncio.CancelledError:
+            if attempt.dropped != STALLED or task.uncancel() > 0:
+                raise
+            self.stall_timeouts += 1
+            raise UpstreamTimeout(
+                f"No upstream chunk for {self.stall_timeout}s"
+            ) from None
+        finally:
+            watchdog.cancel()
+
+    def stats(self) -> dict[str, int]:
+        """Report breaker state and retry, hedge, timeout and fallback counters."""
+        return {
+            "circuit_open": int(self.breaker.state != "closed"),
+            "circuit_opened": self.breaker.opened,
+            "rejected": self.rejected,
+            "fallbacks": self.fallbacks,
+            "retries": self.retries,
+            "retries_denied": self.retries_denied,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_losers": self.hedge_losers,
+            "first_token_timeouts": self.first_token_timeouts,
+            "stall_timeouts": self.stall_timeouts,
+        }
+
+
+@lru_cache
+def get_upstream_resilience() -> UpstreamResilience:
+    """Get the process-wide upstream failure policy."""
+    settings = get_settings()
+    return UpstreamResilience(
+        max_retries=settings.upstream_max_retries,
+        backoff=settings.upstream_retry_backoff,
+        budget=RetryBudget(
+            settings.upstream_retry_budget_ratio, settings.upstream_retry_budget_max
+        ),
+        breaker=CircuitBreaker(
+            error_rate=settings.upstream_breaker_error_rate,
+            min_requests=settings.upstream_breaker_min_requests,
+            window=settings.upstream_breaker_window,
+            cooldown=settings.upstream_breaker_cooldown,
+        ),
+        first_token_timeout=settings.upstream_first_token_timeout,
+        stall_timeout=settings.upstream_stall_timeout,
+        hedge=settings.upstream_hedge_enabled,
+        hedge_percentile=settings.upstream_hedge_percentile,
+        hedge_min_delay=settings.upstream_hedge_min_delay,
+    )
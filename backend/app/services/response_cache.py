@@ -0,0 +1,343 @@
+"""Exact-match cache for completed chat responses (memory plus disk tier)."""
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+
+from app.config import get_settings
+from app.middleware.sqlite_storage import connect_wal
+from app.prompts.system_prompt import SYSTEM_PROMPT_VERSION
+from app.services.openai_service import DEFAULT_MODEL
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _CacheEntry:
+    """Cached response chunks with their size and expiry time."""
+
+    chunks: list[str]
+    size: int
+    expires_at: float
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text for cache keys (case and whitespace insensitive)."""
+    return " ".join(text.split()).casefold()
+
+
+class SQLiteResponseStore:
+    """
+    Completed responses persisted in SQLite (WAL mode).
+
+    Every uvicorn worker on the host opens the same file, so an answer
+    generated by one worker, or before a redeploy, is served by all of them.
+    Rows are tagged with a namespace (model and system prompt hash) and
+    only the current namespace is served. Other namespaces are left alone,
+    so versions deployed side by side don't wipe each other's answers; they
+    age out through the TTL and the size cap.
+    """
+
+    def __init__(
+        self, path: str, namespace: str, ttl_seconds: float, max_entries: int
+    ) -> None:
+        """
+        Open (or create) the database and drop expired rows.
+
+        Args:
+            path: SQLite database file.
+            namespace: Model and prompt identity of the current deployment.
+            ttl_seconds: Time-to-live of each entry.
+            max_entries: Maximum stored responses (oldest are dropped first).
+        """
+        self._namespace = namespace
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._db = connect_wal(path)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                namespace TEXT NOT NULL,
+                chunks TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS responses_created ON responses (created_at);
+            """
+        )
+        with self._lock:
+            dropped = self._db.execute(
+                "DELETE FROM responses WHERE expires_at <= ?", (time.time(),)
+            ).rowcount
+            self._count = self._count_rows()
+        if dropped:
+            logger.info("[CACHE] Dropped %d expired persisted responses", dropped)
+
+    def get(self, key: str) -> list[str] | None:
+        """Return stored chunks for a key, or None if missing or expired."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT chunks FROM responses "
+                "WHERE key = ? AND namespace = ? AND expires_at > ?",
+                (key, self._namespace, time.time()),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, chunks: list[str]) -> None:
+        """Store a completed response and trim the oldest beyond the cap."""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, self._namespace, json.dumps(chunks), now, now + self._ttl),
+            )
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self._max_entries,),
+            )
+            self._count = self._count_rows()
+
+    def clear(self) -> int:
+        """Drop this namespace's responses and return how many were removed."""
+        with self._lock:
+            removed = self._db.execute(
+                "DELETE FROM responses WHERE namespace = ?", (self._namespace,)
+            ).rowcount
+            self._count = self._count_rows()
+        return removed
+
+    def count(self) -> int:
+        """
+        Number of stored responses, as of this worker's last write.
+
+        Read from memory so metrics scrapes never touch the database.
+        """
+        return self._count
+
+    def _count_rows(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+class ResponseCache:
+    """
+    Bounded LRU cache of streamed responses with TTL expiry.
+
+    Entries are bounded both by count and by total content bytes. The least
+    recently used entries are evicted first. An optional persistent store
+    acts as a second tier shared by workers and kept across restarts.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int,
+        ttl_seconds: float,
+        persistent: SQLiteResponseStore | None = None,
+    ) -> None:
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached responses (0 disables caching).
+            max_bytes: Maximum total UTF-8 size of cached content.
+            ttl_seconds: Time-to-live of each entry.
+            persistent: Optional disk tier consulted on in-memory misses.
+        """
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._ttl = ttl_seconds
+        self._persistent = persistent
+        self._entries: OrderedDict[str, _CacheEntry] = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.persistent_hits = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._writes: set[asyncio.Future] = set()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the cache stores anything at all."""
+        return self._max_entries > 0 and self._max_bytes > 0
+
+    @staticmethod
+    def make_key(
+        model: str,
+        prompt_version: str,
+        history: list[dict[str, str]],
+        message: str,
+    ) -> str:
+        """
+        Build a cache key from everything that shapes the completion.
+
+        Args:
+            model: Upstream model name.
+            prompt_version: Version hash of the system prompt.
+            history: Conversation history messages.
+            message: The user's message.
+
+        Returns:
+            Hex digest identifying the request.
+        """
+        payload = json.dumps(
+            [
+                model,
+                prompt_version,
+                [[item["role"], normalize_text(item["content"])] for item in history],
+                normalize_text(message),
+            ],
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> list[str] | None:
+        """
+        Look up a cached response.
+
+        Args:
+            key: Cache key from ``make_key``.
+
+        Returns:
+            Cached content chunks, or None on a miss.
+        """
+        if not self.enabled:
+            return None
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.chunks
+
+    async def lookup(self, key: str) -> list[str] | None:
+        """
+        Look up a response in memory, then in the persistent tier.
+
+        Persistent hits are promoted to memory.
+
+        Args:
+            key: Cache key from ``make_key``.
+
+        Returns:
+            Cached content chunks, or None on a miss.
+        """
+        chunks = self.get(key)
+        if chunks is not None or self._persistent is None or not self.enabled:
+            return chunks
+        chunks = await asyncio.to_thread(self._persistent.get, key)
+        if chunks is not None:
+            self.persistent_hits += 1
+            self._store(key, chunks)
+        return chunks
+
+    def set(self, key: str, chunks: list[str]) -> None:
+        """
+        Store a completed response, evicting old entries as needed.
+
+        The persistent tier, if any, is written in a worker thread; a failed
+        write is logged and leaves the memory entry in place.
+
+        Args:
+            key: Cache key from ``make_key``.
+            chunks: Content chunks in the order they were streamed.
+        """
+        if self.enabled and self._persistent is not None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self._persistent.set(key, chunks)
+            else:
+                write = loop.run_in_executor(None, self._persistent.set, key, chunks)
+                self._writes.add(write)
+                write.add_done_callback(self._write_done)
+        self._store(key, chunks)
+
+    def _write_done(self, write: asyncio.Future) -> None:
+        self._writes.discard(write)
+        error = None if write.cancelled() else write.exception()
+        if error is not None:
+            logger.error("[CACHE] Persistent write failed", exc_info=error)
+
+    def _store(self, key: str, chunks: list[str]) -> None:
+        size = sum(len(chunk.encode()) for chunk in chunks)
+        if not self.enabled or size > self._max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = _CacheEntry(
+            chunks=chunks, size=size, expires_at=time.monotonic() + self._ttl
+        )
+        self._bytes += size
+        while len(self._entries) > self._max_entries or self._bytes > self._max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def clear(self) -> dict[str, int]:
+        """
+        Drop all cached responses, including the persisted current version.
+
+        Returns:
+            Entries removed from memory (``entries``) and, with a persistent
+            store, from disk (``persistent_entries``).
+        """
+        removed = {"entries": len(self._entries)}
+        self._entries.clear()
+        self._bytes = 0
+        if self._persistent is not None:
+            removed["persistent_entries"] = self._persistent.clear()
+        return removed
+
+    def stats(self) -> dict[str, int]:
+        """Report cache size and hit/miss/eviction counters."""
+        stats = {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+        if self._persistent is not None:
+            stats["persistent_hits"] = self.persistent_hits
+            stats["persistent_entries"] = self._persistent.count()
+        return stats
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+
+@lru_cache
+def get_response_cache() -> ResponseCache:
+    """Get the process-wide response cache."""
+    settings = get_settings()
+    persistent = None
+    if settings.response_cache_path:
+        persistent = SQLiteResponseStore(
+            settings.response_cache_path,
+            namespace=f"{DEFAULT_MODEL}:{SYSTEM_PROMPT_VERSION}",
+            ttl_seconds=settings.response_cache_persistent_ttl,
+            max_entries=settings.response_cache_persistent_max_entries,
+        )
+    return ResponseCache(
+        max_entries=settings.response_cache_max_entries,
+        max_bytes=settings.response_cache_max_bytes,
+        ttl_seconds=settings.response_cache_ttl,
+        persistent=persistent,
+    )
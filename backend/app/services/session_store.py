@@ -0,0 +1,323 @@
+"""Server-side conversation sessions."""
+
+import asyncio
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Protocol
+
+from app.config import get_settings
+from app.middleware.sqlite_storage import connect_wal
+
+
+def new_conversation_id() -> str:
+    """Generate an unguessable conversation ID."""
+    return secrets.token_urlsafe(16)
+
+
+def _message_size(message: dict[str, str]) -> int:
+    return len(message["content"].encode()) + len(message["role"])
+
+
+class SessionStore(Protocol):
+    """Storage for conversation turns keyed by conversation ID."""
+
+    async def create(self, history: list[dict[str, str]] | None = None) -> str:
+        """Start a conversation, optionally seeded with history."""
+        ...
+
+    async def load(self, conversation_id: str) -> list[dict[str, str]] | None:
+        """Return stored history, or None if the conversation is unknown."""
+        ...
+
+    async def append(
+        self, conversation_id: str, messages: list[dict[str, str]]
+    ) -> None:
+        """Append messages to a conversation."""
+        ...
+
+    def stats(self) -> dict[str, int]:
+        """Report store size."""
+        ...
+
+
+@dataclass
+class _Session:
+    """Messages of one conversation with their size and expiry."""
+
+    messages: list[dict[str, str]] = field(default_factory=list)
+    size: int = 0
+    expires_at: float = 0.0
+
+
+class MemorySessionStore:
+    """
+    Bounded in-memory session store.
+
+    Sessions expire after ``ttl_seconds`` without activity. When the total
+    size of all sessions exceeds ``max_bytes``, the least recently used
+    sessions are evicted.
+    """
+
+    def __init__(self, ttl_seconds: float, max_bytes: int) -> None:
+        """
+        Initialize the store.
+
+        Args:
+            ttl_seconds: Idle lifetime of a session.
+            max_bytes: Global cap on stored message content.
+        """
+        self._ttl = ttl_seconds
+        self._max_bytes = max_bytes
+        self._sessions: OrderedDict[str, _Session] = OrderedDict()
+        self._bytes = 0
+        self.evictions = 0
+
+    async def create(self, history: list[dict[str, str]] | None = None) -> str:
+        """Start a conversation, optionally seeded with history."""
+        conversation_id = new_conversation_id()
+        self._sessions[conversation_id] = _Session(
+            expires_at=time.monotonic() + self._ttl
+        )
+        if history:
+            await self.append(conversation_id, history)
+        return conversation_id
+
+    async def load(self, conversation_id: str) -> list[dict[str, str]] | None:
+        """Return stored history, or None if the conversation is unknown."""
+        session = self._touch(conversation_id)
+        return list(session.messages) if session is not None else None
+
+    async def append(
+        self, conversation_id: str, messages: list[dict[str, str]]
+    ) -> None:
+        """Append messages to a conversation (no-op if it has expired)."""
+        session = self._touch(conversation_id)
+        if session is None:
+            return
+        size = sum(_message_size(message) for message in messages)
+        session.messages.extend(messages)
+        session.size += size
+        self._bytes += size
+        self._enforce_memory_cap()
+
+    def stats(self) -> dict[str, int]:
+        """Report store size."""
+        self._expire()
+        return {
+            "sessions": len(self._sessions),
+            "bytes": self._bytes,
+            "evictions": self.evictions,
+        }
+
+    def _touch(self, conversation_id: str) -> _Session | None:
+        self._expire()
+        session = self._sessions.get(conversation_id)
+        if session is None:
+            return None
+        session.expires_at = time.monotonic() + self._ttl
+        self._sessions.move_to_end(conversation_id)
+        return session
+
+    def _expire(self) -> None:
+        # Sessions are ordered by last activity, so expired ones come first
+        now = time.monotonic()
+        while self._sessions:
+            conversation_id, session = next(iter(self._sessions.items()))
+            if session.expires_at > now:
+                break
+            self._remove(conversation_id)
+
+    def _enforce_memory_cap(self) -> None:
+        while self._bytes > self._max_bytes and len(self._sessions) > 1:
+            self._remove(next(iter(self._sessions)))
+            self.evictions += 1
+
+    def _remove(self, conversation_id: str) -> None:
+        session = self._sessions.pop(conversation_id)
+        self._bytes -= session.size
+
+
+class SQLiteSessionStore:
+    """
+    Session store persisted in SQLite.
+
+    Survives restarts and can be shared by workers on one host. Queries run
+    in a worker thread so the event loop is never blocked on disk I/O, and
+    ``stats`` reports totals kept in memory as of this worker's last query.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float, max_bytes: int) -> None:
+        """
+        Open (or create) the database and drop expired sessions.
+
+        Args:
+            path: SQLite database file.
+            ttl_seconds: Idle lifetime of a session.
+            max_bytes: Global cap on stored message content.
+        """
+        self._ttl = ttl_seconds
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = connect_wal(path)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS sessions (
+                id TEXT PRIMARY KEY,
+                updated_at REAL NOT NULL,
+                size INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS messages (
+                session_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                PRIMARY KEY (session_id, seq)
+            );
+            CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated_at);
+            """
+        )
+        self.evictions = 0
+        self._session_count = self._bytes = 0
+        with self._transaction():
+            self._expire()
+
+    async def create(self, history: list[dict[str, str]] | None = None) -> str:
+        """Start a conversation, optionally seeded with history."""
+        conversation_id = new_conversation_id()
+        await asyncio.to_thread(self._create, conversation_id)
+        if history:
+            await self.append(conversation_id, history)
+        return conversation_id
+
+    async def load(self, conversation_id: str) -> list[dict[str, str]] | None:
+        """Return stored history, or None if the conversation is unknown."""
+        return await asyncio.to_thread(self._load, conversation_id)
+
+    async def append(
+        self, conversation_id: str, messages: list[dict[str, str]]
+    ) -> None:
+        """Append messages to a conversation (no-op if it has expired)."""
+        await asyncio.to_thread(self._append, conversation_id, messages)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Report store size, as of this worker's last query.
+
+        Read from memory so admin requests never touch the database.
+        """
+        return {
+            "sessions": self._session_count,
+            "bytes": self._bytes,
+            "evictions": self.evictions,
+        }
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        # The connection autocommits, so group each operation explicitly
+        # and refresh the in-memory totals before committing
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+                self._session_count, self._bytes = self._db.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM sessions"
+                ).fetchone()
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def _create(self, conversation_id: str) -> None:
+        with self._transaction():
+            self._db.execute(
+                "INSERT INTO sessions (id, updated_at) VALUES (?, ?)",
+                (conversation_id, time.time()),
+            )
+
+    def _load(self, conversation_id: str) -> list[dict[str, str]] | None:
+        with self._transaction():
+            self._expire()
+            updated = self._db.execute(
+                "UPDATE sessions SET updated_at = ? WHERE id = ?",
+                (time.time(), conversation_id),
+            )
+            if updated.rowcount == 0:
+                return None
+            rows = self._db.execute(
+                "SELECT role, content FROM messages WHERE session_id = ? "
+                "ORDER BY seq",
+                (conversation_id,),
+            ).fetchall()
+        return [{"role": role, "content": content} for role, content in rows]
+
+    def _append(self, conversation_id: str, messages: list[dict[str, str]]) -> None:
+        size = sum(_message_size(message) for message in messages)
+        with self._transaction():
+            updated = self._db.execute(
+                "UPDATE sessions SET updated_at = ?, size = size + ? WHERE id = ?",
+                (time.time(), size, conversation_id),
+            )
+            if updated.rowcount == 0:
+                return
+            (next_seq,) = self._db.execute(
+                "SELECT COALESCE(MAX(seq), -1) + 1 FROM messages "
+                "WHERE session_id = ?",
+                (conversation_id,),
+            ).fetchone()
+            self._db.executemany(
+                "INSERT INTO messages (session_id, seq, role, content) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (conversation_id, next_seq + offset, item["role"], item["content"])
+                    for offset, item in enumerate(messages)
+                ],
+            )
+            self._enforce_memory_cap()
+
+    def _expire(self) -> None:
+        expired = self._db.execute(
+            "SELECT id FROM sessions WHERE updated_at <= ?",
+            (time.time() - self._ttl,),
+        ).fetchall()
+        self._delete([conversation_id for (conversation_id,) in expired])
+
+    def _enforce_memory_cap(self) -> None:
+        rows = self._db.execute(
+            "SELECT id, size FROM sessions ORDER BY updated_at DESC"
+        ).fetchall()
+        total = 0
+        evicted = []
+        for index, (conversation_id, size) in enumerate(rows):
+            total += size
+            if total > self._max_bytes and index > 0:
+                evicted.append(conversation_id)
+        self._delete(evicted)
+        self.evictions += len(evicted)
+
+    def _delete(self, conversation_ids: list[str]) -> None:
+        for conversation_id in conversation_ids:
+            self._db.execute(
+                "DELETE FROM messages WHERE session_id = ?", (conversation_id,)
+            )
+            self._db.execute("DELETE FROM sessions WHERE id = ?", (conversation_id,))
+
+
+@lru_cache
+def get_session_store() -> SessionStore:
+    """Get the process-wide session store for the configured backend."""
+    settings = get_settings()
+    if settings.session_backend == "sqlite":
+        return SQLiteSessionStore(
+            settings.session_sqlite_path,
+            ttl_seconds=settings.session_ttl,
+            max_bytes=settings.session_max_bytes,
+        )
+    return MemorySessionStore(
+        ttl_seconds=settings.session_ttl, max_bytes=settings.session_max_bytes
+    )
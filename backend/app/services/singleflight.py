@@ -0,0 +1,223 @@
+"""Coalescing of identical in-flight chat completions."""
+
+import asyncio
+import inspect
+import logging
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import aclosing
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+
+class FlightCancelled(Exception):
+    """Raised to subscribers when the shared completion was cancelled."""
+
+
+class Flight:
+    """
+    One upstream completion shared by any number of subscribers.
+
+    The upstream stream is consumed by a background task into an append-only
+    chunk log. Every subscriber keeps its own read cursor into that log, so
+    late joiners replay the chunks they missed and a slow client never holds
+    back the producer or the other subscribers. When the last subscriber
+    leaves before the stream ends, the upstream stream is cancelled, after
+    an optional grace period in which a new subscriber may still arrive.
+    """
+
+    def __init__(self, source: AsyncIterator[str], linger: float = 0.0) -> None:
+        """
+        Initialize the flight.
+
+        Args:
+            source: Upstream content chunk iterator to drive.
+            linger: Seconds to keep streaming once the last subscriber left.
+        """
+        self._source = source
+        self._linger = linger
+        self.chunks: list[str] = []
+        # Total characters in ``chunks``
+        self.size = 0
+        self.done = False
+        self.finished_at: float | None = None
+        self.error: BaseException | None = None
+        self.subscribers = 0
+        self._changed = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._idle_timer: asyncio.TimerHandle | None = None
+
+    def start(
+        self,
+        on_complete: Callable[[list[str]], Awaitable[None] | None] | None = None,
+    ) -> asyncio.Task:
+        """
+        Start consuming the upstream stream in the background.
+
+        Args:
+            on_complete: Called with all chunks once the stream succeeds, and
+                awaited if it returns an awaitable, before subscribers see
+                the end of the stream.
+
+        Returns:
+            The producer task.
+        """
+        self._task = asyncio.create_task(self._produce(on_complete))
+        return self._task
+
+    async def _produce(
+        self, on_complete: Callable[[list[str]], Awaitable[None] | None] | None
+    ) -> None:
+        try:
+            async with aclosing(self._source) as source:
+                async for chunk in source:
+                    self.chunks.append(chunk)
+                    self.size += len(chunk)
+                    self._notify()
+            if on_complete is not None:
+                result = on_complete(self.chunks)
+                if inspect.isawaitable(result):
+                    await result
+        except asyncio.CancelledError:
+            self.error = FlightCancelled("Upstream completion was cancelled")
+            raise
+        except Exception as exc:
+            self.error = exc
+        finally:
+            self.done = True
+            self.finished_at = time.monotonic()
+            if self._idle_timer is not None:
+                self._idle_timer.cancel()
+            self._notify()
+
+    def _notify(self) -> None:
+        # Swap in a fresh event so waiters wake once per change
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def subscribe(self, start: int = 0) -> AsyncIterator[str]:
+        """
+        Iterate over the chunks of the completion from an offset.
+
+        Args:
+            start: Index of the first chunk to yield.
+
+        Yields:
+            Content chunks, including ones produced before joining.
+
+        Raises:
+            Exception: The upstream error, if the completion failed.
+        """
+        self.subscribers += 1
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+        try:
+            cursor = start
+            while True:
+                changed = self._changed
+                if cursor < len(self.chunks):
+                    yield self.chunks[cursor]
+                    cursor += 1
+                elif self.done:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                else:
+                    await changed.wait()
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done and self._task is not None:
+                # Nobody is listening any more: stop paying for the stream
+                if self._linger > 0:
+                    self._idle_timer = asyncio.get_running_loop().call_later(
+                        self._linger, self._cancel_if_idle
+                    )
+                else:
+                    self._task.cancel()
+
+    def _cancel_if_idle(self) -> None:
+        self._idle_timer = None
+        if self.subscribers == 0 and self._task is not None:
+            self._task.cancel()
+
+
+class SingleFlight:
+    """Registry that lets identical concurrent requests share one flight."""
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self._flights: dict[str, Flight] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    def find(self, key: str) -> Flight | None:
+        """
+        Look up the live flight for a key, if there is one.
+
+        Joining it is counted by ``record_join`` once the caller subscribes,
+        so requests rejected in between do not count as coalesced.
+
+        Args:
+            key: Request identity (the response cache key).
+
+        Returns:
+            The in-flight completion to subscribe to, or None.
+        """
+        flight = self._flights.get(key)
+        if flight is None or flight.done:
+            return None
+        return flight
+
+    def record_join(self, key: str) -> None:
+        """Count a request served by another request's flight."""
+        self.coalesced += 1
+        logger.info("[SINGLEFLIGHT] Joined in-flight completion %s", key[:12])
+
+    def join(
+        self,
+        key: str,
+        source_factory: Callable[[], AsyncIterator[str]],
+        on_complete: Callable[[list[str]], None] | None = None,
+    ) -> Flight:
+        """
+        Attach to the in-flight completion for a key, starting one if needed.
+
+        Args:
+            key: Request identity (the response cache key).
+            source_factory: Creates the upstream stream for a new flight.
+            on_complete: Called with all chunks when a new flight succeeds.
+
+        Returns:
+            The shared flight to subscribe to.
+        """
+        flight = self.find(key)
+        if flight is not None:
+            self.record_join(key)
+            return flight
+
+        flight = Flight(source_factory())
+        self._flights[key] = flight
+        self.started += 1
+        task = flight.start(on_complete)
+        task.add_done_callback(lambda _: self._forget(key, flight))
+        return flight
+
+    def _forget(self, key: str, flight: Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def stats(self) -> dict[str, int]:
+        """Report in-flight completions and coalescing counters."""
+        return {
+            "in_flight": len(self._flights),
+            "started": self.started,
+            "coalesced": self.coalesced,
+        }
+
+
+@lru_cache
+def get_singleflight() -> SingleFlight:
+    """Get the process-wide single-flight registry."""
+    return SingleFlight()
@@ -0,0 +1,170 @@
+"""Short-lived buffer of recent chat streams for Last-Event-ID resume."""
+
+import hashlib
+import logging
+import secrets
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Callable
+from functools import lru_cache
+
+from app.config import get_settings
+from app.services.singleflight import Flight
+
+logger = logging.getLogger(__name__)
+
+
+def parse_event_id(value: str | None) -> tuple[str, int] | None:
+    """
+    Split a ``Last-Event-ID`` value into stream ID and chunk offset.
+
+    Args:
+        value: Header value in ``<stream_id>:<offset>`` form.
+
+    Returns:
+        ``(stream_id, offset)``, or None if the value is missing or malformed.
+    """
+    if not value:
+        return None
+    stream_id, _, offset = value.strip().rpartition(":")
+    if not stream_id or not offset.isdigit():
+        return None
+    return stream_id, int(offset)
+
+
+class StreamBuffer:
+    """
+    Registry of recent chat streams keyed by stream ID.
+
+    Each stream is a ``Flight`` over the response's (coalesced) content
+    chunks, so a reconnecting client subscribes from the offset it last
+    saw: chunks already produced are replayed from memory and a running
+    generation is followed live, without a new upstream call. Each stream
+    keeps a key of the request that started it, and only a repeat of that
+    request resumes it. A stream keeps generating for ``linger`` seconds
+    after its client disconnects to leave time for the reconnect. Finished
+    streams expire after ``ttl`` seconds, and the oldest finished streams
+    are evicted first when the buffered content exceeds ``max_bytes``.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float, linger: float) -> None:
+        """
+        Initialize the buffer.
+
+        Args:
+            max_bytes: Content characters kept across all streams (0 disables).
+            ttl: Seconds a finished stream stays resumable.
+            linger: Seconds a stream keeps generating without a client.
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.linger = linger
+        self._streams: OrderedDict[str, Flight] = OrderedDict()
+        self._request_keys: dict[str, str | None] = {}
+        self.resumed = 0
+        self.evicted = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether streams are buffered for resume."""
+        return self.max_bytes > 0
+
+    @staticmethod
+    def new_id() -> str:
+        """Generate an unguessable stream ID."""
+        return secrets.token_hex(8)
+
+    @staticmethod
+    def make_key(body: str) -> str:
+        """
+        Build the key a resume request must match.
+
+        Args:
+            body: Canonical serialization of the request.
+
+        Returns:
+            Hex digest identifying the request.
+        """
+        return hashlib.sha256(body.encode()).hexdigest()
+
+    def open(
+        self,
+        stream_id: str,
+        source: AsyncIterator[str],
+        on_complete: Callable[[list[str]], Awaitable[None] | None] | None = None,
+        request_key: str | None = None,
+    ) -> Flight:
+        """
+        Start buffering a new stream.
+
+        Args:
+            stream_id: ID from ``new_id``, sent to the client in event IDs.
+            source: Content chunk iterator to drive.
+            on_complete: Called with all chunks once the stream succeeds.
+            request_key: Key from ``make_key`` of the request being answered.
+
+        Returns:
+            The stream's flight to subscribe to.
+        """
+        flight = Flight(source, linger=self.linger)
+        self._streams[stream_id] = flight
+        self._request_keys[stream_id] = request_key
+        flight.start(on_complete)
+        self._evict()
+        return flight
+
+    def get(self, stream_id: str, request_key: str | None = None) -> Flight | None:
+        """
+        Look up a stream for resuming.
+
+        Args:
+            stream_id: Stream ID from the client's ``Last-Event-ID``.
+            request_key: Key of the resuming request.
+
+        Returns:
+            The stream, or None if it is unknown, already evicted or was
+            started by a different request.
+        """
+        self._evict()
+        flight = self._streams.get(stream_id)
+        if flight is not None and self._request_keys[stream_id] != request_key:
+            logger.info("[RESUME] Stream %s belongs to another request", stream_id)
+            return None
+        if flight is not None:
+            self.resumed += 1
+            logger.info("[RESUME] Stream %s (%d chunks)", stream_id, len(flight.chunks))
+        return flight
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        total = sum(flight.size for flight in self._streams.values())
+        # Oldest first; running streams are never evicted
+        for stream_id, flight in list(self._streams.items()):
+            if not flight.done:
+                continue
+            expired = now - flight.finished_at > self.ttl
+            if expired or total > self.max_bytes:
+                del self._streams[stream_id]
+                del self._request_keys[stream_id]
+                total -= flight.size
+                self.evicted += 1
+
+    def stats(self) -> dict[str, int]:
+        """Report buffered streams, their size and resume counters."""
+        return {
+            "streams": len(self._streams),
+            "bytes": sum(flight.size for flight in self._streams.values()),
+            "resumed": self.resumed,
+            "evicted": self.evicted,
+        }
+
+
+@lru_cache
+def get_stream_buffer() -> StreamBuffer:
+    """Get the process-wide resumable stream buffer."""
+    settings = get_settings()
+    return StreamBuffer(
+        max_bytes=settings.stream_buffer_max_bytes,
+        ttl=settings.stream_buffer_ttl,
+        linger=settings.stream_resume_grace,
+    )
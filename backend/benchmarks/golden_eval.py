@@ -0,0 +1,261 @@
+"""
+Run golden-answer cases against the chat API in parallel.
+
+Each case in the data file is a question (optionally with history) and the
+markers its answer must or must not contain, checked with the helpers the
+smoke tests use (``PORTFOLIO_MARKERS``, ``assert_*``). Cases run
+concurrently against the in-process ASGI app, at most ``--concurrency`` at
+a time, so adding cases barely adds wall time. The report has the pass
+rate, latency percentiles, upstream tokens per case and the failures.
+
+With ``--repeat N`` every case runs N times, one round after another, and
+cases that both passed and failed are listed as ``flaky``. The response
+cache, paraphrase index, local intent replies and model routing are
+bypassed so every run reaches the model with the default parameters, and
+the rate limit and token quota are off. The upstream is whatever
+OPENAI_BASE_URL points at, as for the smoke tests (real OpenAI by default,
+or a replaying mock server). The command exits with status 1 when the pass
+rate is below ``--min-pass-rate``.
+
+Run with: python -m benchmarks.golden_eval --concurrency 8 --repeat 3
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections.abc import AsyncGenerator, Iterator
+from contextlib import aclosing, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import httpx
+
+from app.config import get_settings
+from app.main import app
+from app.middleware.rate_limit import limiter
+from app.middleware.token_quota import MemoryQuotaStorage, TokenQuota, get_token_quota
+from app.services.intent_classifier import get_intent_classifier
+from app.services.model_router import get_model_router
+from app.services.openai_client import OpenAIClientPool
+from app.services.openai_service import OpenAIService, get_openai_service
+from app.services.paraphrase_index import get_paraphrase_index
+from app.services.response_cache import get_response_cache
+from benchmarks.load import percentile
+from tests.config import PORTFOLIO_MARKERS
+from tests.helpers import (
+    assert_contains_text,
+    assert_not_contains_text,
+    assert_portfolio_response,
+    events_text,
+    parse_sse,
+)
+
+DATA_PATH = Path(__file__).resolve().parent / "golden_cases.json"
+
+# Upstream chunk counter of the case running in the current task
+case_tokens: ContextVar[list[int] | None] = ContextVar("case_tokens", default=None)
+
+
+@dataclass
+class GoldenCase:
+    """A question and the markers its answer is checked against."""
+
+    id: str
+    question: str
+    history: list[dict[str, str]] = field(default_factory=list)
+    # Answer must mention the portfolio (any of PORTFOLIO_MARKERS)
+    portfolio: bool = False
+    any_of: list[str] = field(default_factory=list)
+    contains: list[str] = field(default_factory=list)
+    not_contains: list[str] = field(default_factory=list)
+
+    def check(self, answer: str) -> str | None:
+        """Return why the answer fails the case, or None if it passes."""
+        try:
+            if self.portfolio:
+                assert_portfolio_response(answer, PORTFOLIO_MARKERS)
+            if self.any_of:
+                assert_portfolio_response(answer, self.any_of)
+            for expected in self.contains:
+                assert_contains_text(answer, expected)
+            for unexpected in self.not_contains:
+                assert_not_contains_text(answer, unexpected)
+        except AssertionError as exc:
+            # The helpers append the whole answer; keep the report readable
+            return str(exc).split(". Got:")[0]
+        return None
+
+
+def load_cases(path: Path) -> list[GoldenCase]:
+    """Load golden cases from a JSON list of objects."""
+    return [GoldenCase(**case) for case in json.loads(path.read_text())]
+
+
+class MeteredService(OpenAIService):
+    """OpenAI service counting upstream chunks (~ tokens) per eval case."""
+
+    async def create_chat_stream(self, *args, **kwargs) -> AsyncGenerator[str, None]:
+        """Stream a completion, adding its chunks to the running case."""
+        counter = case_tokens.get()
+        async with aclosing(super().create_chat_stream(*args, **kwargs)) as chunks:
+            async for chunk in chunks:
+                if counter is not None:
+                    counter[0] += 1
+                yield chunk
+
+
+@contextmanager
+def eval_app(service: OpenAIService) -> Iterator[None]:
+    """Route the app to ``service`` with shortcuts, routing and limits off."""
+    overrides = {
+        get_openai_service: lambda: service,
+        # Each run must reach the model to tell whether the answer is stable
+        get_response_cache: lambda: None,
+        get_paraphrase_index: lambda: None,
+        get_intent_classifier: lambda: None,
+        # Keep every case on the default model and parameters
+        get_model_router: lambda: None,
+        get_token_quota: lambda: TokenQuota(MemoryQuotaStorage(), 0, 0),
+    }
+    app.dependency_overrides.update(overrides)
+    limiter.enabled = False
+    try:
+        yield
+    finally:
+        limiter.enabled = True
+        for dependency in overrides:
+            app.dependency_overrides.pop(dependency, None)
+
+
+async def run_case(
+    client: httpx.AsyncClient, case: GoldenCase, slots: asyncio.Semaphore
+) -> dict:
+    """Ask one case's question and check the answer."""
+    tokens = [0]
+    case_tokens.set(tokens)
+    async with slots:
+        started = time.perf_counter()
+        response = await client.post(
+            "/api/chat", json={"message": case.question, "history": case.history}
+        )
+        latency = time.perf_counter() - started
+    if response.status_code != 200:
+        error = f"HTTP {response.status_code}"
+    else:
+        events = parse_sse([response.content])
+        failed = [event.payload for event in events if "error" in event.payload]
+        error = failed[0]["error"] if failed else case.check(events_text(events))
+    return {
+        "id": case.id,
+        "passed": error is None,
+        "latency_ms": latency * 1000,
+        "tokens": tokens[0],
+        "error": error,
+    }
+
+
+async def evaluate(
+    cases: list[GoldenCase], service: OpenAIService, concurrency: int, repeat: int
+) -> list[list[dict]]:
+    """
+    Run every case ``repeat`` times against the ASGI app.
+
+    Args:
+        cases: Golden cases to run.
+        service: OpenAI service answering the questions.
+        concurrency: Maximum cases in flight at once.
+        repeat: Number of rounds; each round runs all cases.
+
+    Returns:
+        Per round, the result of each case in ``cases`` order.
+    """
+    slots = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    rounds = []
+    with eval_app(service):
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://eval", timeout=None
+        ) as client:
+            for _ in range(repeat):
+                results = await asyncio.gather(
+                    *(run_case(client, case, slots) for case in cases)
+                )
+                rounds.append(list(results))
+    return rounds
+
+
+def summarize(cases: list[GoldenCase], rounds: list[list[dict]]) -> dict:
+    """Pass rates, latency and tokens overall and per case."""
+    per_case = []
+    for index, case in enumerate(cases):
+        runs = [results[index] for results in rounds]
+        latencies = [run["latency_ms"] for run in runs]
+        tokens = sum(run["tokens"] for run in runs)
+        per_case.append(
+            {
+                "id": case.id,
+                "passed": sum(run["passed"] for run in runs),
+                "runs": len(runs),
+                "latency_p50_ms": round(percentile(latencies, 50), 1),
+                "latency_max_ms": round(max(latencies), 1),
+                "tokens_mean": round(tokens / len(runs), 1),
+                "errors": sorted({run["error"] for run in runs if run["error"]}),
+            }
+        )
+    runs = [run for results in rounds for run in results]
+    latencies = [run["latency_ms"] for run in runs]
+    return {
+        "cases": len(cases),
+        "runs": len(runs),
+        "pass_rate": round(sum(run["passed"] for run in runs) / len(runs), 3),
+        "latency_p50_ms": round(percentile(latencies, 50), 1),
+        "latency_p95_ms": round(percentile(latencies, 95), 1),
+        "latency_max_ms": round(max(latencies), 1),
+        "tokens_total": sum(run["tokens"] for run in runs),
+        "failing": [c["id"] for c in per_case if c["passed"] == 0],
+        "flaky": [c["id"] for c in per_case if 0 < c["passed"] < c["runs"]],
+        "per_case": per_case,
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    """Run the cases against the configured upstream and build the report."""
+    cases = load_cases(args.data)
+    pool = OpenAIClientPool(get_settings())
+    try:
+        started = time.perf_counter()
+        rounds = await evaluate(
+            cases, MeteredService(pool.client), args.concurrency, args.repeat
+        )
+        wall = time.perf_counter() - started
+    finally:
+        await pool.aclose()
+    report = summarize(cases, rounds)
+    report["wall_s"] = round(wall, 3)
+    return report
+
+
+def main() -> None:
+    """Parse arguments, print the report and fail below the pass rate."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--data", type=Path, default=DATA_PATH)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--min-pass-rate", type=float, default=1.0)
+    parser.add_argument("--output", type=Path, help="Also write the report here")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output is not None:
+        args.output.write_text(text + "\n")
+    if report["pass_rate"] < args.min_pass_rate:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
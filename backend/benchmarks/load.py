@@ -0,0 +1,352 @@
+"""
+Load-test the /api/chat streaming path against the mock upstream.
+
+Starts the mock OpenAI server and a fresh backend process per scenario,
+drives /api/chat with N concurrent streaming clients and reports client
+side TTFT and total latency percentiles, streams per second, plus the
+backend's peak RSS and CPU time per stream. Each backend first serves one
+unmeasured request that shares nothing with the batch. Scenarios:
+
+- ``cold``: every request is unique, so each one streams from upstream
+- ``warm``: a few distinct questions, primed once, then served from cache
+- ``long_history``: unique requests carrying a long conversation history
+- ``disconnect``: clients hang up after the first content frame
+
+Results are printed (or written) as JSON. With ``--baseline`` the run is
+compared against a stored result and exits non-zero on regressions.
+
+Run with: python -m benchmarks.load --streams 100 --output results.json
+          python -m benchmarks.load --baseline results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import secrets
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+
+SCENARIOS = ("cold", "warm", "long_history", "disconnect")
+WARM_QUESTIONS = 5
+HISTORY_TURNS = 20
+
+# Metric -> True when higher is better; compared against the baseline
+COMPARED_METRICS = {
+    "ttft_p95_ms": False,
+    "latency_p95_ms": False,
+    "streams_per_sec": True,
+    "cpu_ms_per_stream": False,
+    "peak_rss_mb": False,
+}
+
+# Scrape token of the spawned backends
+METRICS_TOKEN = secrets.token_hex(16)
+# Backend counters read from /metrics after each scenario
+SERVER_COUNTERS = (
+    "chat_cache_hits_total",
+    "chat_streams_cancelled_total",
+    "chat_admission_rejected_total",
+)
+
+
+def free_port() -> int:
+    """Ask the OS for an unused local port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def process_usage(pid: int) -> tuple[float, float]:
+    """
+    Read CPU seconds and peak RSS of a process from /proc (Linux only).
+
+    Returns:
+        ``(cpu_seconds, peak_rss_mb)``, or zeros when /proc is unavailable.
+    """
+    try:
+        stat = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+        status = Path(f"/proc/{pid}/status").read_text()
+    except OSError:
+        return 0.0, 0.0
+    ticks = os.sysconf("SC_CLK_TCK")
+    cpu = (int(stat[11]) + int(stat[12])) / ticks
+    peak_kb = 0
+    for line in status.splitlines():
+        if line.startswith("VmHWM"):
+            peak_kb = int(line.split()[1])
+    return cpu, peak_kb / 1024
+
+
+def spawn(args: list[str], env: dict[str, str]) -> subprocess.Popen:
+    """Start a Python module in a child process with the given environment."""
+    return subprocess.Popen(
+        [sys.executable, "-m", *args],
+        env={**os.environ, **env},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+async def wait_ready(url: str, timeout: float = 15.0) -> None:
+    """Poll a health endpoint until it answers."""
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{url} did not become ready")
+            await asyncio.sleep(0.1)
+
+
+def build_request(scenario: str, index: int, run_id: str) -> dict:
+    """Build the chat request body for one client in a scenario."""
+    if scenario == "warm":
+        return {"message": f"Warm question {index % WARM_QUESTIONS}"}
+    body = {"message": f"Question {run_id}-{index} about QA experience"}
+    if scenario == "long_history":
+        body["history"] = [
+            {
+                "role": "user" if turn % 2 == 0 else "assistant",
+                "content": f"Turn {turn}: " + "tell me about test automation " * 8,
+            }
+            for turn in range(HISTORY_TURNS * 2)
+        ]
+    return body
+
+
+async def run_stream(
+    client: httpx.AsyncClient, body: dict, disconnect: bool
+) -> dict | None:
+    """
+    Stream one chat response and time it from the client side.
+
+    Returns:
+        ``{"ttft": seconds, "latency": seconds}``, or None on failure.
+    """
+    started = time.perf_counter()
+    ttft = None
+    try:
+        async with client.stream("POST", "/api/chat", json=body) as response:
+            if response.status_code != 200:
+                return None
+            async for line in response.aiter_lines():
+                if ttft is None and line.startswith('data: {"content"'):
+                    ttft = time.perf_counter() - started
+                    if disconnect:
+                        break
+                if line == "data: [DONE]":
+                    break
+    except httpx.HTTPError:
+        return None
+    if ttft is None:
+        return None
+    return {"ttft": ttft, "latency": time.perf_counter() - started}
+
+
+async def read_counters(client: httpx.AsyncClient) -> dict[str, float]:
+    """Read selected backend counters from /metrics."""
+    counters = dict.fromkeys(SERVER_COUNTERS, 0.0)
+    headers = {"Authorization": f"Bearer {METRICS_TOKEN}"}
+    for line in (await client.get("/metrics", headers=headers)).text.splitlines():
+        name, _, value = line.partition(" ")
+        if name in counters:
+            counters[name] = float(value)
+    return counters
+
+
+async def run_scenario(scenario: str, args: argparse.Namespace, mock_url: str) -> dict:
+    """Run one scenario against a fresh backend process."""
+    port = free_port()
+    backend = spawn(
+        ["uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        {
+            "OPENAI_API_KEY": "benchmark",
+            "OPENAI_BASE_URL": mock_url,
+            "RATE_LIMIT_REQUESTS": "1000000",
+            "TOKEN_QUOTA": "0",
+            "METRICS_TOKEN": METRICS_TOKEN,
+            # Cancel abandoned streams at once so ``disconnect`` measures it
+            "STREAM_RESUME_GRACE": "0",
+        },
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        await wait_ready(f"{base_url}/health")
+        limits = httpx.Limits(max_connections=args.streams)
+        async with httpx.AsyncClient(
+            base_url=base_url, limits=limits, timeout=args.timeout
+        ) as client:
+            run_id = uuid.uuid4().hex[:8]
+            # Open the upstream pool and import lazily loaded code first, with
+            # a message no request in the batch shares (nothing cached for it)
+            await run_stream(client, {"message": f"Warm-up {run_id}"}, False)
+            if scenario == "warm":
+                await asyncio.gather(
+                    *(
+                        run_stream(client, build_request(scenario, i, run_id), False)
+                        for i in range(WARM_QUESTIONS)
+                    )
+                )
+            cpu_before, _ = process_usage(backend.pid)
+            wall_start = time.perf_counter()
+            results = await asyncio.gather(
+                *(
+                    run_stream(
+                        client,
+                        build_request(scenario, i, run_id),
+                        scenario == "disconnect",
+                    )
+                    for i in range(args.streams)
+                )
+            )
+            wall = time.perf_counter() - wall_start
+            # Give the server a moment to finish cancelled streams
+            await asyncio.sleep(0.2)
+            cpu_after, peak_rss = process_usage(backend.pid)
+            counters = await read_counters(client)
+    finally:
+        backend.terminate()
+        backend.wait()
+
+    completed = [result for result in results if result is not None]
+    ttfts = [result["ttft"] * 1000 for result in completed]
+    latencies = [result["latency"] * 1000 for result in completed]
+    report = {
+        "streams": args.streams,
+        "completed": len(completed),
+        "errors": args.streams - len(completed),
+        "wall_s": round(wall, 3),
+        "streams_per_sec": round(len(completed) / wall, 2),
+        "cpu_ms_per_stream": round((cpu_after - cpu_before) * 1000 / args.streams, 3),
+        "peak_rss_mb": round(peak_rss, 1),
+    }
+    for name, values in (("ttft", ttfts), ("latency", latencies)):
+        for q in (50, 95, 99):
+            report[f"{name}_p{q}_ms"] = round(percentile(values, q), 1)
+    report["server"] = counters
+    return report
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Compare scenario results against a baseline.
+
+    Args:
+        current: Report from this run.
+        baseline: Stored report from an earlier run.
+        tolerance: Allowed relative change before flagging (0.1 = 10%).
+
+    Returns:
+        Human-readable regression descriptions (empty when none).
+    """
+    regressions = []
+    for scenario, result in current["scenarios"].items():
+        reference = baseline.get("scenarios", {}).get(scenario)
+        if reference is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = reference.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (higher_is_better and change < -tolerance) or (
+                not higher_is_better and change > tolerance
+            ):
+                regressions.append(
+                    f"{scenario}.{metric}: {old} -> {new} ({change:+.0%})"
+                )
+    return regressions
+
+
+async def run(args: argparse.Namespace) -> dict:
+    """Start the mock upstream and run the selected scenarios."""
+    port = free_port()
+    mock = spawn(
+        [
+            "mock_openai.server",
+            "--port",
+            str(port),
+            "--ttft-ms",
+            str(args.ttft_ms),
+            "--token-ms",
+            str(args.token_ms),
+            "--jitter-ms",
+            str(args.jitter_ms),
+            "--seed",
+            "1",
+        ],
+        {},
+    )
+    try:
+        await wait_ready(f"http://127.0.0.1:{port}/health")
+        mock_url = f"http://127.0.0.1:{port}/v1"
+        scenarios = {}
+        for scenario in args.scenarios:
+            scenarios[scenario] = await run_scenario(scenario, args, mock_url)
+    finally:
+        mock.terminate()
+        mock.wait()
+    return {
+        "config": {
+            "streams": args.streams,
+            "ttft_ms": args.ttft_ms,
+            "token_ms": args.token_ms,
+            "jitter_ms": args.jitter_ms,
+        },
+        "scenarios": scenarios,
+    }
+
+
+def main() -> None:
+    """Parse arguments, run the benchmark and compare with a baseline."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--streams", type=int, default=50)
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS)
+    )
+    parser.add_argument("--ttft-ms", type=float, default=200.0)
+    parser.add_argument("--token-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=5.0)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="Stored report to compare against")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.1, help="Allowed relative change"
+    )
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        report["regressions"] = compare(report, baseline, args.tolerance)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    print(output)
+    if report.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
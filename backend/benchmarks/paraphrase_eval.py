@@ -0,0 +1,113 @@
+"""
+Evaluate the paraphrase index on a labeled set of questions.
+
+Indexes the first question of every group in the data file as answered,
+looks up all other questions and reports, for a sweep of similarity
+thresholds, the precision (reused answers that belong to the right
+question) and recall (paraphrases that reuse their answer). A wrong reuse
+serves an unrelated answer, so pick the lowest threshold whose precision
+is acceptable and set it as PARAPHRASE_THRESHOLD. Misses and wrong matches
+at the chosen threshold are listed for inspection.
+
+Run with: python -m benchmarks.paraphrase_eval --threshold 0.85
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+from app.services.intent_classifier import load_examples
+from app.services.paraphrase_index import ParaphraseIndex
+
+DATA_PATH = Path(__file__).resolve().parent / "paraphrases.tsv"
+# Group label of questions that must not match anything
+NEGATIVE = "-"
+
+
+def score(
+    examples: list[tuple[str, str]], dims: int
+) -> tuple[list[str], list[tuple[str, str, str, float]]]:
+    """
+    Index the first question of each group and match all others.
+
+    Args:
+        examples: ``(group, question)`` pairs.
+        dims: Hashed vector length.
+
+    Returns:
+        Indexed questions and, per other question, its group, text, the
+        group of its best match and the similarity.
+    """
+    index = ParaphraseIndex(len(examples), dims, threshold=0.0)
+    groups: list[str] = []
+    anchors: list[str] = []
+    queries = []
+    for group, question in examples:
+        if group != NEGATIVE and group not in groups:
+            groups.append(group)
+            anchors.append(question)
+            index.add(question, [group], "eval")
+        else:
+            queries.append((group, question))
+    results = []
+    for group, question in queries:
+        match = index.search(question)
+        if match is None:
+            # Nothing indexed shares the question's negation words
+            results.append((group, question, NEGATIVE, 0.0))
+            continue
+        entry, similarity = match
+        results.append((group, question, groups[entry], similarity))
+    return anchors, results
+
+
+def evaluate(
+    results: list[tuple[str, str, str, float]], threshold: float
+) -> dict[str, float | int]:
+    """Precision and recall of reusing answers at one threshold."""
+    positives = sum(1 for group, *_ in results if group != NEGATIVE)
+    matched = [r for r in results if r[3] >= threshold]
+    correct = sum(1 for group, _, match, _ in matched if group == match)
+    return {
+        "threshold": round(threshold, 3),
+        "matched": len(matched),
+        "correct": correct,
+        "precision": round(correct / len(matched), 3) if matched else 1.0,
+        "recall": round(correct / positives, 3) if positives else 0.0,
+    }
+
+
+def main() -> None:
+    """Parse arguments and print the threshold sweep as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--data", type=Path, default=DATA_PATH)
+    parser.add_argument("--dims", type=int, default=1024)
+    parser.add_argument(
+        "--threshold", type=float, default=0.85, help="Threshold to inspect"
+    )
+    args = parser.parse_args()
+
+    anchors, results = score(load_examples(args.data), args.dims)
+    sweep = [step / 20 for step in range(8, 20)]
+    report = {
+        "indexed": len(anchors),
+        "queries": len(results),
+        "sweep": [evaluate(results, threshold) for threshold in sweep],
+        "selected": evaluate(results, args.threshold),
+        "misses": [
+            f"{question} ({similarity:.2f})"
+            for group, question, match, similarity in results
+            if group != NEGATIVE
+            and (match != group or similarity < args.threshold)
+        ],
+        "wrong_matches": [
+            f"{question} -> {match} ({similarity:.2f})"
+            for group, question, match, similarity in results
+            if match != group and similarity >= args.threshold
+        ],
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark SSE framing on the chat stream path.
+
+Runs many concurrent fake token streams through the legacy per-token
+``json.dumps`` framing and through the current pipeline (chunk coalescing
+plus pre-encoded frames), then reports frames and tokens per second and CPU
+time per stream for each. Fewer frames for the same tokens is the point of
+coalescing; CPU per stream is the number to compare.
+
+Run with: python -m benchmarks.sse_framing --streams 200 --tokens 300
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from app.api.chat import generate_sse_stream
+
+# Typical gpt-4o-mini deltas are a few characters long
+TOKENS = ["I", " have", " 10", "+", " years", " of", " QA", " experience", "."]
+
+
+class FakeService:
+    """Streams a fixed number of short tokens at a steady pace."""
+
+    model = "benchmark"
+
+    def __init__(self, tokens: int, interval: float) -> None:
+        self._tokens = tokens
+        self._interval = interval
+
+    async def create_chat_stream(
+        self, message, history=None, timings=None, system_prompt=None
+    ):
+        for index in range(self._tokens):
+            await asyncio.sleep(self._interval)
+            yield TOKENS[index % len(TOKENS)]
+
+
+async def legacy_body(service: FakeService):
+    """The original framing: one json.dumps and f-string per delta."""
+    async for chunk in service.create_chat_stream("Hi"):
+        data = json.dumps({"content": chunk})
+        yield f"data: {data}\n\n".encode()
+    yield b"data: [DONE]\n\n"
+
+
+async def current_body(service: FakeService):
+    """The production framing from generate_sse_stream."""
+    response = await generate_sse_stream(service, "Hi", [])
+    async for frame in response.body_iterator:
+        yield frame
+
+
+async def drain(body) -> tuple[int, int]:
+    """Consume one stream as the ASGI server would; return frames and bytes."""
+    frames = size = 0
+    async for frame in body:
+        frames += 1
+        size += len(frame)
+        await asyncio.sleep(0)  # Stand-in for the per-frame ASGI send
+    return frames, size
+
+
+async def run(variant, streams: int, tokens: int, interval: float) -> dict:
+    """Run concurrent streams through one framing variant."""
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    results = await asyncio.gather(
+        *(drain(variant(FakeService(tokens, interval))) for _ in range(streams))
+    )
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    frames = sum(result[0] for result in results)
+    return {
+        "frames": frames,
+        "bytes": sum(result[1] for result in results),
+        "frames_per_sec": round(frames / wall),
+        "tokens_per_sec": round(streams * tokens / wall),
+        "cpu_ms_per_stream": round(cpu * 1000 / streams, 3),
+        "wall_s": round(wall, 3),
+    }
+
+
+def main() -> None:
+    """Parse arguments and print before/after results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--streams", type=int, default=200)
+    parser.add_argument("--tokens", type=int, default=300)
+    parser.add_argument(
+        "--interval-ms", type=float, default=2.0, help="Delay between tokens"
+    )
+    args = parser.parse_args()
+    interval = args.interval_ms / 1000
+
+    report = {
+        "before": asyncio.run(run(legacy_body, args.streams, args.tokens, interval)),
+        "after": asyncio.run(run(current_body, args.streams, args.tokens, interval)),
+    }
+    report["cpu_reduction"] = round(
+        1 - report["after"]["cpu_ms_per_stream"] / report["before"]["cpu_ms_per_stream"],
+        3,
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Compare multi-turn chat over WebSocket against POST /api/chat (SSE).
+
+Starts the mock OpenAI server and a fresh backend per transport, then runs
+N concurrent conversations of T turns each. Over SSE every turn is a new
+POST carrying the whole history, as the frontend sends it; over WebSocket
+each conversation keeps one connection and sends only the new message.
+Reports per-turn TTFT and latency percentiles and backend CPU time per
+turn for both transports.
+
+Run with: python -m benchmarks.ws_vs_sse --conversations 50 --turns 5
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import httpx
+from websockets.asyncio.client import connect
+
+from benchmarks.load import free_port, percentile, process_usage, spawn, wait_ready
+
+TRANSPORTS = ("sse", "ws")
+
+
+async def sse_conversation(base_url: str, turns: int, tag: str) -> list[dict]:
+    """Run one conversation as separate POSTs with client-side history."""
+    results = []
+    history: list[dict[str, str]] = []
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        for turn in range(turns):
+            message = f"Question {tag}-{turn} about QA experience"
+            started = time.perf_counter()
+            ttft = None
+            reply = []
+            body = {"message": message, "history": history}
+            async with client.stream("POST", "/api/chat", json=body) as response:
+                async for line in response.aiter_lines():
+                    if line.startswith('data: {"content"'):
+                        ttft = ttft or time.perf_counter() - started
+                        reply.append(json.loads(line[6:])["content"])
+                    elif line.startswith("data: "):
+                        break
+            if ttft is None:
+                return results
+            results.append({"ttft": ttft, "latency": time.perf_counter() - started})
+            history += [
+                {"role": "user", "content": message},
+                {"role": "assistant", "content": "".join(reply)},
+            ]
+    return results
+
+
+async def ws_conversation(base_url: str, turns: int, tag: str) -> list[dict]:
+    """Run one conversation over a single WebSocket."""
+    results = []
+    url = base_url.replace("http://", "ws://") + "/api/chat/ws"
+    async with connect(url) as websocket:
+        for turn in range(turns):
+            message = f"Question {tag}-{turn} about QA experience"
+            started = time.perf_counter()
+            ttft = None
+            await websocket.send(json.dumps({"type": "message", "message": message}))
+            while True:
+                frame = json.loads(await websocket.recv())
+                if "d" not in frame:
+                    break
+                ttft = ttft or time.perf_counter() - started
+            if frame != {"e": "done"} or ttft is None:
+                return results
+            results.append({"ttft": ttft, "latency": time.perf_counter() - started})
+    return results
+
+
+async def run_transport(
+    transport: str, args: argparse.Namespace, mock_url: str
+) -> dict:
+    """Run all conversations over one transport against a fresh backend."""
+    port = free_port()
+    backend = spawn(
+        ["uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        {
+            "OPENAI_API_KEY": "benchmark",
+            "OPENAI_BASE_URL": mock_url,
+            "RATE_LIMIT_REQUESTS": "1000000",
+            "TOKEN_QUOTA": "0",
+            "LOG_LEVEL": "WARNING",
+        },
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    conversation = sse_conversation if transport == "sse" else ws_conversation
+    try:
+        await wait_ready(f"{base_url}/health")
+        run_id = uuid.uuid4().hex[:8]
+        cpu_before, _ = process_usage(backend.pid)
+        wall_start = time.perf_counter()
+        per_conversation = await asyncio.gather(
+            *(
+                conversation(base_url, args.turns, f"{run_id}-{index}")
+                for index in range(args.conversations)
+            )
+        )
+        wall = time.perf_counter() - wall_start
+        cpu_after, _ = process_usage(backend.pid)
+    finally:
+        backend.terminate()
+        backend.wait()
+
+    turns = [result for results in per_conversation for result in results]
+    expected = args.conversations * args.turns
+    report = {
+        "turns": expected,
+        "completed": len(turns),
+        "wall_s": round(wall, 3),
+        "cpu_ms_per_turn": round((cpu_after - cpu_before) * 1000 / expected, 3),
+    }
+    for name in ("ttft", "latency"):
+        values = [turn[name] * 1000 for turn in turns]
+        for q in (50, 95):
+            report[f"{name}_p{q}_ms"] = round(percentile(values, q), 1)
+    return report
+
+
+async def run(args: argparse.Namespace) -> dict:
+    """Start the mock upstream and run both transports."""
+    port = free_port()
+    mock = spawn(
+        [
+            "mock_openai.server",
+            "--port",
+            str(port),
+            "--ttft-ms",
+            str(args.ttft_ms),
+            "--token-ms",
+            str(args.token_ms),
+            "--seed",
+            "1",
+        ],
+        {},
+    )
+    try:
+        await wait_ready(f"http://127.0.0.1:{port}/health")
+        mock_url = f"http://127.0.0.1:{port}/v1"
+        transports = {}
+        for transport in TRANSPORTS:
+            transports[transport] = await run_transport(transport, args, mock_url)
+    finally:
+        mock.terminate()
+        mock.wait()
+    return {
+        "config": {
+            "conversations": args.conversations,
+            "turns": args.turns,
+            "ttft_ms": args.ttft_ms,
+            "token_ms": args.token_ms,
+        },
+        "transports": transports,
+        "cpu_reduction": round(
+            1
+            - transports["ws"]["cpu_ms_per_turn"]
+            / max(transports["sse"]["cpu_ms_per_turn"], 1e-9),
+            3,
+        ),
+    }
+
+
+def main() -> None:
+    """Parse arguments and print the comparison as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--conversations", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--ttft-ms", type=float, default=50.0)
+    parser.add_argument("--token-ms", type=float, default=5.0)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
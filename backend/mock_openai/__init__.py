@@ -0,0 +1 @@
+"""Local stand-in for the OpenAI streaming API (mock, record and replay)."""
@@ -0,0 +1,162 @@
+"""
+Record real chat-completion streams once and replay them deterministically.
+
+A cassette is a directory of JSON files, one per request, keyed by the
+parts of the request that affect the answer (model, messages and sampling
+options). Each file stores the SSE ``data:`` payloads with their offsets
+from the start of the request, so replays keep the original pacing or run
+it faster.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+import httpx
+
+# Request fields that change the upstream answer
+KEY_FIELDS = ("model", "messages", "max_tokens", "temperature", "top_p")
+
+Event = tuple[float, str]
+
+
+def sse_frame(payload: str) -> bytes:
+    """Frame one ``data:`` payload as an SSE event."""
+    return f"data: {payload}\n\n".encode()
+
+
+class Cassette:
+    """Directory of recorded upstream streams."""
+
+    def __init__(self, directory: str | Path) -> None:
+        """
+        Initialize the cassette.
+
+        Args:
+            directory: Where recordings are stored (created on first save).
+        """
+        self.directory = Path(directory)
+
+    @staticmethod
+    def key(request: dict) -> str:
+        """
+        Build the recording key for a chat-completions request body.
+
+        Args:
+            request: Parsed request body.
+
+        Returns:
+            Hex digest identifying the request.
+        """
+        fields = {name: request.get(name) for name in KEY_FIELDS}
+        payload = json.dumps(fields, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode()).hexdigest()[:24]
+
+    def load(self, key: str) -> list[Event] | None:
+        """
+        Load the recorded events for a key.
+
+        Args:
+            key: Recording key from ``Cassette.key``.
+
+        Returns:
+            ``(offset_seconds, payload)`` pairs, or None if not recorded.
+        """
+        path = self.directory / f"{key}.json"
+        if not path.exists():
+            return None
+        recording = json.loads(path.read_text(encoding="utf-8"))
+        return [(offset, payload) for offset, payload in recording["events"]]
+
+    def save(self, key: str, request: dict, events: list[Event]) -> None:
+        """
+        Store a recording, replacing any previous one for the key.
+
+        Args:
+            key: Recording key from ``Cassette.key``.
+            request: Request body (kept for humans reading the cassette).
+            events: ``(offset_seconds, payload)`` pairs in stream order.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        recording = {
+            "request": {name: request.get(name) for name in KEY_FIELDS},
+            "events": [[round(offset, 4), payload] for offset, payload in events],
+        }
+        path = self.directory / f"{key}.json"
+        path.write_text(json.dumps(recording, indent=2), encoding="utf-8")
+
+
+async def replay(events: list[Event], speed: float = 1.0) -> AsyncIterator[bytes]:
+    """
+    Replay recorded events as SSE frames.
+
+    Args:
+        events: ``(offset_seconds, payload)`` pairs from a recording.
+        speed: Pace multiplier; 1 keeps the original timing, 10 plays ten
+            times faster and 0 sends everything without delays.
+
+    Yields:
+        SSE frames in the recorded order.
+    """
+    previous = 0.0
+    for offset, payload in events:
+        if speed > 0 and offset > previous:
+            await asyncio.sleep((offset - previous) / speed)
+        previous = offset
+        yield sse_frame(payload)
+
+
+async def open_upstream(upstream: httpx.AsyncClient, request: dict) -> httpx.Response:
+    """
+    Send a streaming request upstream and return once its headers arrive.
+
+    The status is known before any frame is relayed, so an upstream error can
+    be passed on with its own status instead of a broken 200 stream.
+
+    Args:
+        upstream: Client for the real API (base URL and credentials).
+        request: Request body to send.
+
+    Returns:
+        The open response; ``record`` or the caller must close it.
+    """
+    return await upstream.send(
+        upstream.build_request("POST", "chat/completions", json=request),
+        stream=True,
+    )
+
+
+async def record(
+    response: httpx.Response,
+    request: dict,
+    cassette: Cassette,
+) -> AsyncIterator[bytes]:
+    """
+    Relay an open upstream stream and save it once it completes.
+
+    Incomplete streams (errors or a client that went away) are not saved.
+
+    Args:
+        response: Successful upstream response from ``open_upstream``.
+        request: Request body that was sent.
+        cassette: Where to store the recording.
+
+    Yields:
+        The upstream SSE frames, unchanged.
+    """
+    events: list[Event] = []
+    started = time.perf_counter()
+    try:
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            payload = line[len("data:") :].strip()
+            events.append((time.perf_counter() - started, payload))
+            yield sse_frame(payload)
+    finally:
+        await response.aclose()
+    if events and events[-1][1] == "[DONE]":
+        cassette.save(Cassette.key(request), request, events)
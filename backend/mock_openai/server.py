@@ -0,0 +1,295 @@
+"""
+Mock OpenAI chat-completions server for offline tests and benchmarks.
+
+Serves ``POST /v1/chat/completions`` in the OpenAI streaming format with
+configurable time to first token, per-token latency, jitter, chunk size and
+error injection. In ``record`` mode it proxies to the real API and saves
+each stream to a cassette; in ``replay`` mode it serves those recordings at
+the original or an accelerated pace.
+
+Run with: python -m mock_openai.server --port 8001 --ttft-ms 300 --token-ms 20
+Then start the backend with OPENAI_BASE_URL=http://127.0.0.1:8001/v1
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import time
+import uuid
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from typing import Literal
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from openai import AsyncOpenAI
+
+from mock_openai.cassette import Cassette, open_upstream, record, replay, sse_frame
+
+DEFAULT_REPLY = (
+    "Vadym is an AI QA Engineer with 10+ years of experience in test "
+    "automation. He builds Playwright and Pytest frameworks, tests LLM "
+    "features and holds an ISTQB certification."
+)
+
+Mode = Literal["mock", "record", "replay"]
+
+
+@dataclass
+class MockConfig:
+    """Behaviour of the mock upstream."""
+
+    reply: str = DEFAULT_REPLY
+    ttft_ms: float = 200.0
+    token_ms: float = 20.0
+    jitter_ms: float = 0.0
+    # Characters per delta; 0 streams word-sized tokens like the real API
+    chunk_chars: int = 0
+    # Fraction of requests answered with error_status instead of a stream
+    error_rate: float = 0.0
+    error_status: int = 500
+    # Fraction of streams that fail halfway with an in-band error event
+    midstream_error_rate: float = 0.0
+    # Replay pace multiplier (1 = recorded timing, 0 = no delays)
+    replay_speed: float = 1.0
+    seed: int | None = None
+
+
+def split_reply(text: str, chunk_chars: int) -> list[str]:
+    """
+    Split a reply into stream deltas.
+
+    Args:
+        text: Full reply text.
+        chunk_chars: Characters per delta (0 for word-sized tokens).
+
+    Returns:
+        Deltas that concatenate back to ``text``.
+    """
+    if chunk_chars > 0:
+        return [text[i : i + chunk_chars] for i in range(0, len(text), chunk_chars)]
+    return re.findall(r"\s*\S+", text) or [text]
+
+
+def chunk_payload(
+    completion_id: str,
+    model: str,
+    created: int,
+    delta: dict,
+    finish_reason: str | None = None,
+) -> str:
+    """Serialize one ``chat.completion.chunk`` object."""
+    return json.dumps(
+        {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [
+                {"index": 0, "delta": delta, "finish_reason": finish_reason}
+            ],
+        }
+    )
+
+
+def error_payload(message: str, error_type: str = "server_error") -> dict:
+    """Build an OpenAI-style error body."""
+    return {"error": {"message": message, "type": error_type, "code": None}}
+
+
+def create_app(
+    config: MockConfig | None = None,
+    mode: Mode = "mock",
+    cassette: Cassette | None = None,
+    upstream: httpx.AsyncClient | None = None,
+) -> FastAPI:
+    """
+    Build the mock server application.
+
+    Args:
+        config: Latency, chunking and error settings.
+        mode: ``mock`` generates replies, ``record`` proxies to ``upstream``
+            and saves streams, ``replay`` serves saved streams.
+        cassette: Recording directory (required for record and replay).
+        upstream: Client for the real API (required for record).
+
+    Returns:
+        The ASGI application.
+    """
+    config = config or MockConfig()
+    rng = random.Random(config.seed)
+    if mode != "mock" and cassette is None:
+        raise ValueError(f"{mode} mode needs a cassette")
+    if mode == "record" and upstream is None:
+        raise ValueError("record mode needs an upstream client")
+
+    app = FastAPI(title="Mock OpenAI API")
+    app.state.requests = 0
+
+    def delay(base_ms: float) -> float:
+        jitter = rng.uniform(-config.jitter_ms, config.jitter_ms)
+        return max(0.0, base_ms + jitter) / 1000
+
+    async def generate(body: dict) -> AsyncIterator[bytes]:
+        completion_id = f"chatcmpl-mock-{uuid.uuid4().hex[:12]}"
+        model = body.get("model", "gpt-4o-mini")
+        created = int(time.time())
+        deltas = split_reply(config.reply, config.chunk_chars)
+        fail_at = None
+        if rng.random() < config.midstream_error_rate:
+            fail_at = len(deltas) // 2
+
+        await asyncio.sleep(delay(config.ttft_ms))
+        yield sse_frame(
+            chunk_payload(
+                completion_id, model, created, {"role": "assistant", "content": ""}
+            )
+        )
+        for index, content in enumerate(deltas):
+            if index == fail_at:
+                payload = error_payload("Injected mid-stream failure")
+                yield sse_frame(json.dumps(payload))
+                return
+            if index:
+                await asyncio.sleep(delay(config.token_ms))
+            yield sse_frame(
+                chunk_payload(completion_id, model, created, {"content": content})
+            )
+        yield sse_frame(chunk_payload(completion_id, model, created, {}, "stop"))
+        yield sse_frame("[DONE]")
+
+    @app.get("/health")
+    async def health() -> dict[str, str]:
+        """Health check endpoint."""
+        return {"status": "healthy", "mode": mode}
+
+    @app.post("/v1/chat/completions", response_model=None)
+    async def chat_completions(request: Request) -> Response:
+        """Answer a chat-completions request in the OpenAI format."""
+        app.state.requests += 1
+        body = await request.json()
+        if rng.random() < config.error_rate:
+            return JSONResponse(
+                status_code=config.error_status,
+                content=error_payload(f"Injected {config.error_status} error"),
+            )
+
+        if mode == "replay":
+            events = cassette.load(Cassette.key(body))
+            if events is None:
+                return JSONResponse(
+                    status_code=404,
+                    content=error_payload(
+                        f"No recording for request {Cassette.key(body)}",
+                        "invalid_request_error",
+                    ),
+                )
+            frames = replay(events, config.replay_speed)
+        elif mode == "record":
+            response = await open_upstream(upstream, body)
+            if response.is_error:
+                # Relay the rejection as is; nothing is recorded
+                content = await response.aread()
+                await response.aclose()
+                return Response(
+                    content,
+                    status_code=response.status_code,
+                    media_type=response.headers.get("content-type"),
+                )
+            frames = record(response, body, cassette)
+        elif body.get("stream"):
+            frames = generate(body)
+        else:
+            return JSONResponse(
+                content={
+                    "id": f"chatcmpl-mock-{uuid.uuid4().hex[:12]}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "gpt-4o-mini"),
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": config.reply},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                }
+            )
+        return StreamingResponse(frames, media_type="text/event-stream")
+
+    return app
+
+
+def asgi_client(app: FastAPI, **kwargs) -> AsyncOpenAI:
+    """
+    Build an OpenAI client that calls the mock app in-process (no sockets).
+
+    The ASGI transport buffers each response, so use a real server when
+    timing matters.
+
+    Args:
+        app: Mock server application.
+        **kwargs: Extra ``AsyncOpenAI`` options.
+
+    Returns:
+        Client wired to the mock.
+    """
+    options = {"api_key": "mock", "max_retries": 0}
+    options.update(kwargs)
+    return AsyncOpenAI(
+        base_url="http://mock-openai/v1",
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=app)),
+        **options,
+    )
+
+
+def main() -> None:
+    """Parse arguments and serve the mock API with uvicorn."""
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--mode", choices=["mock", "record", "replay"], default="mock")
+    parser.add_argument("--cassette", default="cassettes", help="Recording directory")
+    parser.add_argument("--upstream-url", default="https://api.openai.com/v1")
+    parser.add_argument("--ttft-ms", type=float, default=200.0)
+    parser.add_argument("--token-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--chunk-chars", type=int, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--midstream-error-rate", type=float, default=0.0)
+    parser.add_argument("--replay-speed", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = MockConfig(
+        ttft_ms=args.ttft_ms,
+        token_ms=args.token_ms,
+        jitter_ms=args.jitter_ms,
+        chunk_chars=args.chunk_chars,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        midstream_error_rate=args.midstream_error_rate,
+        replay_speed=args.replay_speed,
+        seed=args.seed,
+    )
+    upstream = None
+    if args.mode == "record":
+        upstream = httpx.AsyncClient(
+            base_url=args.upstream_url.rstrip("/") + "/",
+            headers={"Authorization": f"Bearer {os.environ['OPENAI_API_KEY']}"},
+            timeout=httpx.Timeout(60.0, connect=5.0),
+        )
+    cassette = Cassette(args.cassette) if args.mode != "mock" else None
+    app = create_app(config, args.mode, cassette, upstream)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
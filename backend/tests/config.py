@@ -1,6 +1,6 @@
 """Test configuration for Ask Vadym API tests."""
 
-from app.api.chat import MAX_MESSAGE_LENGTH  # noqa: F401
+from app.api.chat import MAX_HISTORY_CONTENT_LENGTH, MAX_MESSAGE_LENGTH  # noqa: F401
 
 # Expected response markers for portfolio chatbot
 PORTFOLIO_MARKERS = [
@@ -1,15 +1,38 @@
 """Pytest fixtures for Ask Vadym API tests."""
 
+import os
+from collections.abc import Iterator
+
 import pytest
 from dotenv import load_dotenv
 from fastapi.testclient import TestClient
 
 from app.main import app
+from app.services.openai_service import OpenAIService, get_openai_service
+from mock_openai.cassette import Cassette
+from mock_openai.server import MockConfig, asgi_client, create_app
 
 load_dotenv()
 
 
 @pytest.fixture
-def test_client() -> TestClient:
-    """Create FastAPI test client."""
-    return TestClient(app)
+def test_client() -> Iterator[TestClient]:
+    """
+    Create FastAPI test client running the app's lifespan.
+
+    With OPENAI_CASSETTE set to a recording directory, upstream calls are
+    replayed from it (no OpenAI API calls are made).
+    """
+    cassette = os.getenv("OPENAI_CASSETTE")
+    if cassette:
+        player = create_app(
+            MockConfig(replay_speed=0), mode="replay", cassette=Cassette(cassette)
+        )
+        service = OpenAIService(asgi_client(player))
+        app.dependency_overrides[get_openai_service] = lambda: service
+    try:
+        with TestClient(app) as client:
+            yield client
+    finally:
+        if cassette:
+            app.dependency_overrides.pop(get_openai_service, None)
@@ -8,8 +8,21 @@ from tests.helpers.api import (
 )
 from tests.helpers.assertions import (
     assert_contains_text,
+    assert_first_content_within,
+    assert_no_gap_longer_than,
     assert_not_contains_text,
     assert_portfolio_response,
+    assert_stream_completed,
+)
+from tests.helpers.fakes import FakeStream, collect, fake_service
+from tests.helpers.sse import (
+    SSEEvent,
+    SSEParser,
+    collect_events,
+    events_text,
+    iter_sse_events,
+    parse_sse,
+    stream_chat,
 )
 
 __all__ = [
@@ -20,6 +33,21 @@ __all__ = [
     "history_from_turn",
     # Assertions
     "assert_contains_text",
+    "assert_first_content_within",
+    "assert_no_gap_longer_than",
     "assert_not_contains_text",
     "assert_portfolio_response",
+    "assert_stream_completed",
+    # Fakes
+    "FakeStream",
+    "collect",
+    "fake_service",
+    # Streaming SSE client
+    "SSEEvent",
+    "SSEParser",
+    "collect_events",
+    "events_text",
+    "iter_sse_events",
+    "parse_sse",
+    "stream_chat",
 ]
@@ -1,10 +1,9 @@
 """API helper functions for testing."""
 
-import json
-from typing import Any
-
 from fastapi.testclient import TestClient
 
+from tests.helpers.sse import events_text, parse_sse
+
 
 def ask_question(test_client: TestClient, question: str):
     """
@@ -68,36 +67,4 @@ def get_response_text(response) -> str:
     Returns:
         Complete response text reconstructed from stream chunks.
     """
-    events = _parse_sse_stream(response.text)
-    chunks = [
-        event.get("content", "") for event in events if "content" in event
-    ]
-    return "".join(chunks)
-
-
-def _parse_sse_stream(stream_data: str) -> list[dict[str, Any]]:
-    """
-    Parse Server-Sent Events stream data.
-
-    Args:
-        stream_data: Raw SSE stream string.
-
-    Returns:
-        List of parsed event data dictionaries.
-    """
-    events = []
-    lines = stream_data.strip().split("\n")
-
-    for line in lines:
-        if line.startswith("data: "):
-            data_str = line[6:]  # Remove "data: " prefix
-            if data_str == "[DONE]":
-                events.append({"done": True})
-            else:
-                try:
-                    data = json.loads(data_str)
-                    events.append(data)
-                except json.JSONDecodeError:
-                    continue
-
-    return events
+    return events_text(parse_sse(response.iter_bytes()))
@@ -1,5 +1,7 @@
 """Test assertion helpers."""
 
+from tests.helpers.sse import SSEEvent
+
 
 def assert_portfolio_response(
     response: str, expected_markers: list[str]
@@ -54,3 +56,45 @@ def assert_not_contains_text(response: str, unexpected: str) -> None:
     assert (
         unexpected_lower not in response_lower
     ), f"Response should not contain '{unexpected}'. Got: {response}"
+
+
+def assert_stream_completed(events: list[SSEEvent]) -> None:
+    """
+    Assert that a stream carried content and ended with ``[DONE]``.
+
+    Args:
+        events: Timed events from the stream.
+    """
+    assert any(event.content for event in events), "Stream had no content"
+    assert events[-1].done, f"Stream should end with [DONE]. Got: {events[-1]}"
+
+
+def assert_first_content_within(events: list[SSEEvent], max_ms: float) -> None:
+    """
+    Assert that the first content event arrived within a time limit.
+
+    Args:
+        events: Timed events from the stream.
+        max_ms: Allowed time to first content in milliseconds.
+    """
+    first = next((event for event in events if event.content), None)
+    assert first is not None, "Stream had no content"
+    elapsed_ms = first.elapsed * 1000
+    assert (
+        elapsed_ms <= max_ms
+    ), f"First content after {elapsed_ms:.0f}ms, expected <= {max_ms:.0f}ms"
+
+
+def assert_no_gap_longer_than(events: list[SSEEvent], max_ms: float) -> None:
+    """
+    Assert that no two consecutive events were further apart than a limit.
+
+    Args:
+        events: Timed events from the stream.
+        max_ms: Allowed gap between events in milliseconds.
+    """
+    for previous, current in zip(events, events[1:]):
+        gap_ms = (current.elapsed - previous.elapsed) * 1000
+        assert (
+            gap_ms <= max_ms
+        ), f"{gap_ms:.0f}ms gap before {current.data!r}, expected <= {max_ms:.0f}ms"
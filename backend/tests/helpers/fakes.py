@@ -0,0 +1,49 @@
+"""Fake upstream objects for tests that must not call OpenAI."""
+
+import asyncio
+from collections.abc import AsyncIterable
+from types import SimpleNamespace
+
+from app.services.openai_service import OpenAIService
+
+
+class FakeStream:
+    """Minimal stand-in for an OpenAI streaming response."""
+
+    def __init__(self, chunks: list[str]) -> None:
+        self._chunks = chunks
+        self.closed = False
+
+    async def __aiter__(self):
+        for content in self._chunks:
+            delta = SimpleNamespace(content=content)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+            await asyncio.sleep(0)
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+def fake_service(
+    stream: FakeStream, requests: list[dict] | None = None
+) -> OpenAIService:
+    """
+    Build a service whose client returns the given stream.
+
+    Args:
+        stream: Upstream response to hand out.
+        requests: If given, each upstream request's arguments are appended.
+    """
+
+    async def create(**kwargs):
+        if requests is not None:
+            requests.append(kwargs)
+        return stream
+
+    completions = SimpleNamespace(create=create)
+    return OpenAIService(SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+
+
+async def collect(source: AsyncIterable) -> list:
+    """Drain an async iterator into a list."""
+    return [item async for item in source]
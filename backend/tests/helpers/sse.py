@@ -0,0 +1,187 @@
+"""Incremental SSE client helpers for streaming tests."""
+
+import json
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+
+
+@dataclass
+class SSEEvent:
+    """One dispatched Server-Sent Event."""
+
+    data: str
+    # Seconds from sending the request to receiving the event's last byte
+    elapsed: float = 0.0
+    event: str | None = None
+    id: str | None = None
+
+    @property
+    def done(self) -> bool:
+        """Whether this is the ``[DONE]`` terminator."""
+        return self.data == "[DONE]"
+
+    @property
+    def payload(self) -> dict[str, Any]:
+        """Data parsed as JSON (empty for ``[DONE]`` or non-JSON data)."""
+        if self.done:
+            return {}
+        try:
+            value = json.loads(self.data)
+        except json.JSONDecodeError:
+            return {}
+        return value if isinstance(value, dict) else {}
+
+    @property
+    def content(self) -> str | None:
+        """Streamed content of a content event, if any."""
+        return self.payload.get("content")
+
+
+class SSEParser:
+    """
+    Incremental SSE parser fed with raw bytes as they arrive.
+
+    Frames and even multi-byte characters may be split across reads. Each
+    read is sliced once: its complete lines are decoded together and only
+    the unfinished tail is buffered, so long bodies stay linear.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty parser."""
+        self._buffer = b""
+        self._data: list[str] = []
+        self._event: str | None = None
+        self._id: str | None = None
+
+    def feed(self, chunk: bytes, elapsed: float = 0.0) -> list[SSEEvent]:
+        """
+        Add bytes and return the events they complete.
+
+        Args:
+            chunk: Raw bytes from the network.
+            elapsed: Time the chunk arrived, relative to the request.
+
+        Returns:
+            Events dispatched by this chunk, in order.
+        """
+        buffer = self._buffer + chunk if self._buffer else chunk
+        end = buffer.rfind(b"\n")
+        if end == -1:
+            self._buffer = buffer
+            return []
+        self._buffer = buffer[end + 1 :]
+        events = []
+        for line in buffer[:end].decode("utf-8").split("\n"):
+            event = self._process_line(line.removesuffix("\r"), elapsed)
+            if event is not None:
+                events.append(event)
+        return events
+
+    def _process_line(self, line: str, elapsed: float) -> SSEEvent | None:
+        if not line:
+            if not self._data:
+                self._event = None
+                return None
+            event = SSEEvent("\n".join(self._data), elapsed, self._event, self._id)
+            self._data, self._event = [], None
+            return event
+        if line.startswith(":"):
+            return None
+        field, _, value = line.partition(":")
+        value = value.removeprefix(" ")
+        if field == "data":
+            self._data.append(value)
+        elif field == "event":
+            self._event = value
+        elif field == "id":
+            self._id = value
+        return None
+
+
+def parse_sse(chunks: Iterable[bytes]) -> list[SSEEvent]:
+    """
+    Parse a complete SSE body delivered as one or more byte chunks.
+
+    Args:
+        chunks: Raw body chunks.
+
+    Returns:
+        All events in the body.
+    """
+    parser = SSEParser()
+    return [event for chunk in chunks for event in parser.feed(chunk)]
+
+
+def iter_sse_events(
+    response: httpx.Response, started: float | None = None
+) -> Iterator[SSEEvent]:
+    """
+    Yield events from a streaming response as they arrive.
+
+    Args:
+        response: Response opened with ``client.stream(...)``.
+        started: ``time.perf_counter()`` when the request was sent.
+
+    Yields:
+        Events stamped with their arrival time.
+    """
+    started = time.perf_counter() if started is None else started
+    parser = SSEParser()
+    for chunk in response.iter_bytes():
+        yield from parser.feed(chunk, time.perf_counter() - started)
+
+
+@contextmanager
+def stream_chat(
+    client: httpx.Client,
+    question: str,
+    history: list[dict[str, str]] | None = None,
+) -> Iterator[tuple[httpx.Response, Iterator[SSEEvent]]]:
+    """
+    Open a streaming chat request.
+
+    Use a client bound to a live server for meaningful timings; the
+    in-process TestClient delivers the body only once the app finishes.
+
+    Args:
+        client: HTTP client (TestClient or ``httpx.Client``).
+        question: Question to ask.
+        history: Prior conversation messages.
+
+    Yields:
+        The response and an iterator over its timed events.
+    """
+    body = {"message": question, "history": history or []}
+    started = time.perf_counter()
+    with client.stream("POST", "/api/chat", json=body) as response:
+        yield response, iter_sse_events(response, started)
+
+
+def collect_events(
+    client: httpx.Client,
+    question: str,
+    history: list[dict[str, str]] | None = None,
+) -> list[SSEEvent]:
+    """
+    Stream a chat response to completion and return its timed events.
+
+    Args:
+        client: HTTP client (TestClient or ``httpx.Client``).
+        question: Question to ask.
+        history: Prior conversation messages.
+
+    Returns:
+        Events in arrival order.
+    """
+    with stream_chat(client, question, history) as (_, events):
+        return list(events)
+
+
+def events_text(events: Iterable[SSEEvent]) -> str:
+    """Join the streamed content of all content events."""
+    return "".join(event.content or "" for event in events)
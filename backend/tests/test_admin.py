@@ -0,0 +1,52 @@
+"""
+Tests for admin endpoints.
+
+These tests run the application lifespan and make no OpenAI API calls.
+
+Run with: pytest tests/test_admin.py -v
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.main import app
+
+ADMIN_TOKEN = "test-admin-token"
+
+
+@pytest.fixture
+def admin_client(monkeypatch: pytest.MonkeyPatch) -> TestClient:
+    """Create a test client with lifespan and an admin token configured."""
+    monkeypatch.setattr(get_settings(), "admin_token", ADMIN_TOKEN)
+    with TestClient(app) as client:
+        yield client
+
+
+def test_admin_requires_token(admin_client: TestClient):
+    """Admin endpoints should reject missing or wrong tokens."""
+    assert admin_client.get("/api/admin/pool").status_code == 403
+    response = admin_client.get(
+        "/api/admin/pool", headers={"X-Admin-Token": "wrong"}
+    )
+    assert response.status_code == 403
+
+
+def test_admin_hidden_without_configured_token(test_client: TestClient):
+    """Admin endpoints should not exist when no token is configured."""
+    response = test_client.get(
+        "/api/admin/pool", headers={"X-Admin-Token": ADMIN_TOKEN}
+    )
+    assert response.status_code == 404
+
+
+def test_admin_reports_pool_usage(admin_client: TestClient):
+    """Pool endpoint should report the shared client's connection usage."""
+    response = admin_client.get(
+        "/api/admin/pool", headers={"X-Admin-Token": ADMIN_TOKEN}
+    )
+    assert response.status_code == 200
+
+    stats = response.json()
+    assert stats["in_use"] == 0
+    assert stats["max_connections"] == get_settings().openai_max_connections
@@ -0,0 +1,152 @@
+"""
+Tests for upstream admission control and early load shedding.
+
+These tests use fake upstream streams (no OpenAI API calls are made).
+
+Run with: pytest tests/test_admission.py -v
+"""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.admission import (
+    AdmissionController,
+    UpstreamOverloaded,
+    get_admission_controller,
+)
+
+
+def controller(**overrides) -> AdmissionController:
+    """Build a controller with small, test-friendly defaults."""
+    options = {
+        "max_concurrency": 1,
+        "min_concurrency": 1,
+        "max_queue": 1,
+        "queue_timeout": 1.0,
+        "target_ttft": 1.0,
+        "adaptive": False,
+    }
+    options.update(overrides)
+    return AdmissionController(**options)
+
+
+async def gated_stream(gate: asyncio.Event, delay: float = 0.0):
+    """Yield one chunk after an optional delay, then wait for the gate."""
+    await asyncio.sleep(delay)
+    yield "a"
+    await gate.wait()
+
+
+def admitted(admission: AdmissionController, gate: asyncio.Event):
+    """Run a gated stream inside an admission slot."""
+    return admission.admitted(lambda: gated_stream(gate))
+
+
+async def drain(source) -> list[str]:
+    """Drain an async iterator into a list."""
+    return [chunk async for chunk in source]
+
+
+async def test_queued_request_starts_when_slot_frees():
+    """Requests beyond the limit wait and start once a slot is released."""
+    admission = controller()
+    gate = asyncio.Event()
+    first = asyncio.create_task(drain(admitted(admission, gate)))
+    await asyncio.sleep(0.01)
+    second = asyncio.create_task(drain(admitted(admission, gate)))
+    await asyncio.sleep(0.01)
+
+    assert admission.stats()["in_flight"] == 1
+    assert admission.stats()["queued"] == 1
+
+    gate.set()
+    assert await first == ["a"]
+    assert await second == ["a"]
+    assert admission.stats()["in_flight"] == 0
+    assert admission.stats()["admitted"] == 2
+
+
+async def test_full_queue_is_rejected_early_with_retry_after():
+    """With the slot and queue taken, new requests fail fast."""
+    admission = controller()
+    gate = asyncio.Event()
+    running = asyncio.create_task(drain(admitted(admission, gate)))
+    await asyncio.sleep(0.01)
+    queued = asyncio.create_task(drain(admitted(admission, gate)))
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(UpstreamOverloaded) as excinfo:
+        admission.check()
+    assert excinfo.value.retry_after >= 1
+    assert admission.stats()["rejected"] == 1
+
+    gate.set()
+    await asyncio.gather(running, queued)
+
+
+async def test_queue_deadline_raises_overloaded():
+    """A waiter that outlives the queue timeout gives up with a 503 error."""
+    admission = controller(queue_timeout=0.02)
+    gate = asyncio.Event()
+    running = asyncio.create_task(drain(admitted(admission, gate)))
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(UpstreamOverloaded):
+        await drain(admission.admitted(lambda: gated_stream(gate)))
+    assert admission.stats()["timeouts"] == 1
+    assert admission.stats()["queued"] == 0
+
+    gate.set()
+    await running
+
+
+async def test_slow_first_token_shrinks_limit_and_fast_one_grows_it():
+    """AIMD: back off when TTFT misses the target, recover when it meets it."""
+    admission = controller(
+        max_concurrency=10, min_concurrency=2, target_ttft=0.01, adaptive=True
+    )
+    gate = asyncio.Event()
+    gate.set()
+
+    await drain(admission.admitted(lambda: gated_stream(gate, delay=0.03)))
+    assert admission.limit == pytest.approx(9.0)
+
+    await drain(admission.admitted(lambda: gated_stream(gate)))
+    assert admission.limit == pytest.approx(9.0 + 1 / 9.0)
+
+
+async def test_burst_of_slow_streams_decreases_limit_once():
+    """Slow streams released within one hold time back off only once."""
+    admission = controller(
+        max_concurrency=10, min_concurrency=2, target_ttft=0.01, adaptive=True
+    )
+    gate = asyncio.Event()
+    gate.set()
+
+    await asyncio.gather(
+        *(
+            drain(admission.admitted(lambda: gated_stream(gate, delay=0.03)))
+            for _ in range(5)
+        )
+    )
+    assert admission.limit == pytest.approx(9.0)
+
+
+def test_chat_returns_503_when_upstream_is_saturated(test_client: TestClient):
+    """The endpoint sheds load with 503 and Retry-After before streaming."""
+    saturated = controller(max_queue=0)
+    saturated.in_flight = 1
+    app.dependency_overrides[get_admission_controller] = lambda: saturated
+    try:
+        response = test_client.post(
+            "/api/chat", json={"message": "Admission check question"}
+        )
+    finally:
+        app.dependency_overrides.pop(get_admission_controller)
+
+    assert response.status_code == 503
+    assert response.json() == {"error": "Service busy"}
+    assert int(response.headers["Retry-After"]) >= 1
@@ -0,0 +1,181 @@
+"""
+Tests for the WebSocket chat transport.
+
+These tests use a fake OpenAI client (no OpenAI API calls are made).
+
+Run with: pytest tests/test_chat_ws.py -v
+"""
+
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.config import get_settings
+from app.main import app
+from app.middleware.rate_limit import limiter
+from app.middleware.token_quota import MemoryQuotaStorage, TokenQuota, get_token_quota
+from app.services.openai_service import OpenAIService, get_openai_service
+from tests.helpers import FakeStream
+
+
+class SlowStream(FakeStream):
+    """Fake upstream response that takes a while between chunks."""
+
+    async def __aiter__(self):
+        async for chunk in super().__aiter__():
+            yield chunk
+            await asyncio.sleep(0.05)
+
+
+class BrokenStream(FakeStream):
+    """Fake upstream response failing with an unexpected error."""
+
+    async def __aiter__(self):
+        raise RuntimeError("Unexpected upstream failure")
+        yield
+
+
+class RecordingQuota(TokenQuota):
+    """Token quota remembering every charge."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.charges: list[int] = []
+
+    async def charge(self, key: str, tokens: int) -> None:
+        self.charges.append(tokens)
+        await super().charge(key, tokens)
+
+
+def recording_service(streams: list[FakeStream], requests: list[dict]):
+    """Build a service handing out the given streams, recording each request."""
+
+    async def create(**kwargs):
+        requests.append(kwargs)
+        return streams.pop(0)
+
+    completions = SimpleNamespace(create=create)
+    return OpenAIService(SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+
+
+def receive_reply(websocket) -> tuple[str, dict]:
+    """Collect delta frames until the terminal frame."""
+    text = ""
+    while True:
+        frame = websocket.receive_json()
+        if "d" not in frame:
+            return text, frame
+        text += frame["d"]
+
+
+@pytest.fixture
+def override_service():
+    """Install a fake upstream for the duration of a test."""
+
+    def install(streams: list[FakeStream], requests: list[dict]) -> None:
+        service = recording_service(streams, requests)
+        app.dependency_overrides[get_openai_service] = lambda: service
+
+    yield install
+    app.dependency_overrides.pop(get_openai_service, None)
+    limiter.reset()
+
+
+def test_history_is_kept_per_connection(override_service):
+    """Later turns carry the earlier ones without the client resending them."""
+    requests: list[dict] = []
+    streams = [FakeStream(["Selenium ", "mostly"]), FakeStream(["Yes"])]
+    override_service(streams, requests)
+    topic = uuid.uuid4().hex[:8]
+
+    with TestClient(app).websocket_connect("/api/chat/ws") as websocket:
+        websocket.send_json({"type": "message", "message": f"Tools for {topic}?"})
+        assert receive_reply(websocket) == ("Selenium mostly", {"e": "done"})
+        websocket.send_json({"type": "message", "message": "And Playwright?"})
+        assert receive_reply(websocket) == ("Yes", {"e": "done"})
+
+    sent = [(m["role"], m["content"]) for m in requests[1]["messages"][1:]]
+    assert sent == [
+        ("user", f"Tools for {topic}?"),
+        ("assistant", "Selenium mostly"),
+        ("user", "And Playwright?"),
+    ]
+
+
+def test_cancel_stops_the_running_reply(override_service):
+    """A cancel releases the upstream and is charged; the turn is left out."""
+    requests: list[dict] = []
+    slow = SlowStream(["word "] * 100)
+    override_service([slow, FakeStream(["Fine"])], requests)
+    quota = RecordingQuota(MemoryQuotaStorage(), capacity=10_000, window=60)
+    app.dependency_overrides[get_token_quota] = lambda: quota
+    topic = uuid.uuid4().hex[:8]
+
+    try:
+        with TestClient(app).websocket_connect("/api/chat/ws") as websocket:
+            websocket.send_json({"type": "message", "message": f"Long story {topic}"})
+            assert "d" in websocket.receive_json()
+            websocket.send_json({"type": "cancel"})
+            _, terminal = receive_reply(websocket)
+            websocket.send_json({"type": "message", "message": f"Short one {topic}"})
+            assert receive_reply(websocket) == ("Fine", {"e": "done"})
+    finally:
+        app.dependency_overrides.pop(get_token_quota)
+
+    assert terminal == {"e": "cancelled"}
+    assert slow.closed
+    assert len(requests[1]["messages"]) == 2  # system prompt and the new turn
+    # The cancelled reply pays for the tokens it streamed before the cancel
+    assert 0 < quota.charges[0] < 100
+    assert quota.charges[1] == 1
+
+
+def test_rate_limit_and_validation_apply_per_message(
+    override_service, monkeypatch: pytest.MonkeyPatch
+):
+    """Each message counts against the chat limit; bad ones get an error frame."""
+    override_service([FakeStream(["One"])], [])
+    monkeypatch.setattr(get_settings(), "rate_limit_requests", 1)
+    limiter.reset()
+    topic = uuid.uuid4().hex[:8]
+
+    with TestClient(app).websocket_connect("/api/chat/ws") as websocket:
+        websocket.send_json({"type": "message", "message": ""})
+        assert websocket.receive_json() == {"e": "error", "error": "Validation error"}
+        websocket.send_json({"type": "message", "message": f"First {topic}"})
+        assert receive_reply(websocket) == ("One", {"e": "done"})
+        websocket.send_json({"type": "message", "message": f"Second {topic}"})
+        limited = websocket.receive_json()
+
+    assert limited["error"] == "Rate limit exceeded"
+    assert 0 < limited["retry_after"] <= get_settings().rate_limit_window
+
+
+def test_binary_frames_and_failed_replies_get_error_frames(override_service):
+    """A binary frame is invalid JSON; an unexpected error ends the reply."""
+
+    override_service([BrokenStream([])], [])
+    topic = uuid.uuid4().hex[:8]
+
+    with TestClient(app).websocket_connect("/api/chat/ws") as websocket:
+        websocket.send_bytes(b'{"type": "message"}')
+        assert websocket.receive_json() == {"e": "error", "error": "Invalid JSON"}
+        websocket.send_json({"type": "message", "message": f"Broken {topic}"})
+        assert websocket.receive_json() == {
+            "e": "error",
+            "error": "Failed to generate response",
+        }
+
+
+def test_foreign_origin_is_rejected(test_client: TestClient):
+    """Browsers on origins outside ALLOWED_ORIGINS cannot open a socket."""
+    with pytest.raises(WebSocketDisconnect) as rejected:
+        with test_client.websocket_connect(
+            "/api/chat/ws", headers={"origin": "https://example.com"}
+        ):
+            pass
+    assert rejected.value.code == 1008
@@ -0,0 +1,62 @@
+"""
+Tests for draining chat streams on shutdown.
+
+Run with: pytest tests/test_drain.py -v
+"""
+
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.services.drain import DrainController, get_drain_controller
+from app.services.sse import SHUTDOWN_FRAME
+from tests.helpers import ask_question, collect
+
+
+async def frames(count: int, interval: float):
+    """Yield numbered frames at a steady pace."""
+    for index in range(count):
+        await asyncio.sleep(interval)
+        yield f"frame {index}\n\n".encode()
+
+
+async def test_drain_waits_for_short_streams_and_aborts_long_ones():
+    """Streams within the grace period finish; the rest get a terminal event."""
+    drain = DrainController(grace=0.2)
+    short = asyncio.create_task(collect(drain.guard(frames(2, 0.05))))
+    stuck = asyncio.create_task(collect(drain.guard(frames(2, 60))))
+    await asyncio.sleep(0)
+
+    assert await drain.drain() == (1, 1)
+    assert await short == [b"frame 0\n\n", b"frame 1\n\n"]
+    assert await stuck == [SHUTDOWN_FRAME]
+    assert drain.stats() == {
+        "draining": 1,
+        "active_streams": 0,
+        "drained": 1,
+        "aborted": 1,
+    }
+
+
+async def test_drain_without_streams_returns_at_once():
+    """An idle server shuts down without waiting out the grace period."""
+    drain = DrainController(grace=60)
+    assert await asyncio.wait_for(drain.drain(), 1) == (0, 0)
+
+
+def test_draining_fails_readiness_and_refuses_chat(test_client: TestClient):
+    """Once draining, /ready fails and new chat requests get a 503."""
+    drain = get_drain_controller()
+    assert test_client.get("/ready").status_code == 200
+
+    drain.draining = True
+    try:
+        ready = test_client.get("/ready")
+        response = ask_question(test_client, "What QA skills do you have?")
+    finally:
+        drain.draining = False
+
+    assert ready.status_code == 503
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "2"
+    assert test_client.get("/health").status_code == 200
@@ -0,0 +1,81 @@
+"""
+Tests for the parallel golden-answer eval runner.
+
+These tests use a fake OpenAI client (no OpenAI API calls are made).
+
+Run with: pytest tests/test_golden_eval.py -v
+"""
+
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+from benchmarks.golden_eval import (
+    DATA_PATH,
+    GoldenCase,
+    MeteredService,
+    evaluate,
+    load_cases,
+    summarize,
+)
+from tests.helpers import FakeStream
+
+
+def answering_client(answers: dict[str, list[str]], in_flight: list[int]):
+    """Fake client replying per question, tracking peak concurrent streams."""
+
+    async def create(**kwargs):
+        question = kwargs["messages"][-1]["content"]
+        in_flight[0] += 1
+        in_flight[1] = max(in_flight[1], in_flight[0])
+        await asyncio.sleep(0.01)
+        in_flight[0] -= 1
+        return FakeStream(answers[question].pop(0).split(" "))
+
+    completions = SimpleNamespace(create=create)
+    return SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+
+def test_bundled_cases_load():
+    """The shipped data file parses into uniquely named cases."""
+    cases = load_cases(DATA_PATH)
+    assert len({case.id for case in cases}) == len(cases) >= 5
+
+
+async def test_runs_cases_concurrently_and_reports_flaky_ones():
+    """Cases run within the concurrency bound; mixed outcomes are flagged."""
+    topic = uuid.uuid4().hex[:8]
+    cases = [
+        GoldenCase(id=f"case{n}", question=f"Playwright {topic} {n}?")
+        for n in range(6)
+    ]
+    cases[0].contains = ["Playwright"]
+    cases[1].not_contains = ["Selenium"]
+    answers = {case.question: ["I use Playwright"] * 2 for case in cases}
+    answers[cases[1].question] = ["I use Playwright", "I use Selenium"]
+    in_flight = [0, 0]
+    service = MeteredService(answering_client(answers, in_flight))
+
+    rounds = await evaluate(cases, service, concurrency=3, repeat=2)
+    report = summarize(cases, rounds)
+
+    assert in_flight[1] == 3
+    assert report["runs"] == 12
+    assert report["flaky"] == ["case1"]
+    assert report["pass_rate"] == round(11 / 12, 3)
+    assert report["tokens_total"] == 12 * 3
+    assert report["per_case"][1]["errors"] == [
+        "Response should not contain 'Selenium'"
+    ]
+
+
+async def test_greetings_reach_the_model():
+    """Local intent replies are bypassed, so a greeting is answered upstream."""
+    cases = [GoldenCase(id="greeting", question="Hi", contains=["Playwright"])]
+    in_flight = [0, 0]
+    service = MeteredService(answering_client({"Hi": ["I use Playwright"]}, in_flight))
+
+    report = summarize(cases, await evaluate(cases, service, 1, 1))
+
+    assert report["pass_rate"] == 1.0
+    assert report["tokens_total"] == 3
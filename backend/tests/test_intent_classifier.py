@@ -0,0 +1,84 @@
+"""
+Tests for the local intent classifier and its templated replies.
+
+Run with: pytest tests/test_intent_classifier.py -v
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.intent_classifier import (
+    EXAMPLES_PATH,
+    TEMPLATES,
+    IntentClassifier,
+)
+from app.services.openai_service import get_openai_service
+from tests.helpers import FakeStream, collect_events, events_text, fake_service
+
+
+def classifier(threshold: float = 0.85) -> IntentClassifier:
+    """Train a classifier on the shipped examples."""
+    return IntentClassifier.from_file(EXAMPLES_PATH, threshold)
+
+
+def test_classifies_unseen_messages():
+    """Messages outside the training file get the expected labels."""
+    model = classifier()
+    assert model.classify("Hello there Vadym!").label == "greeting"
+    assert model.classify("What is the capital of Italy?").label == "off_topic"
+    assert model.classify("Have you used Playwright?").label == "portfolio"
+    assert model.classify("zzz qqq").confidence == 0.0
+
+
+def test_routes_and_counters():
+    """Confident greetings and off-topic openers are answered locally."""
+    model = classifier()
+
+    assert "".join(model.route("Hi")) == TEMPLATES["greeting"][0]
+    assert "".join(model.route("Who won the world cup?")) in TEMPLATES["off_topic"]
+    assert model.route("What did you do at Cytiva?") is None
+    # Follow-ups depend on context, so off-topic only applies to openers
+    assert model.route("Who won the world cup?", has_history=True) is None
+
+    assert model.stats() == {
+        "route_greeting": 1,
+        "route_off_topic": 1,
+        "route_upstream": 2,
+    }
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        "Hi, whats your email?",
+        "Hi, where are you based?",
+        "hi, are you hiring?",
+        "Hello! Resume?",
+        "hi linkedin?",
+    ],
+)
+def test_greeting_with_a_question_goes_upstream(message: str):
+    """Words the model never saw keep a leading greeting from deciding."""
+    assert classifier().route(message) is None
+
+
+def test_threshold_and_disabled_send_everything_upstream():
+    """Below the threshold, or when disabled, nothing is answered locally."""
+    assert classifier(threshold=1.01).route("Hi") is None
+    disabled = IntentClassifier.from_file(EXAMPLES_PATH, 0.85, enabled=False)
+    assert disabled.route("Hi") is None
+
+
+def test_greeting_is_streamed_without_upstream_call():
+    """The endpoint streams the template through the usual SSE framing."""
+    stream = FakeStream(["upstream reply"])
+    app.dependency_overrides[get_openai_service] = lambda: fake_service(stream)
+    try:
+        events = collect_events(TestClient(app), "Hey there")
+    finally:
+        app.dependency_overrides.pop(get_openai_service)
+
+    assert events_text(events) == TEMPLATES["greeting"][0]
+    assert events[-1].done
+    assert not stream.closed
@@ -0,0 +1,91 @@
+"""
+Tests for the queued JSON logging pipeline and request IDs.
+
+Run with: pytest tests/test_logging.py -v
+"""
+
+import json
+import logging
+import queue
+
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.logging_config import (
+    AsyncQueueHandler,
+    JSONFormatter,
+    SamplingFilter,
+    parse_sample_rates,
+    request_id_var,
+    setup_logging,
+)
+
+
+def make_record(name: str, level: int, msg: str, *args) -> logging.LogRecord:
+    """Build a log record as a logger call would."""
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+def test_queue_handler_defers_formatting_and_tags_request_id():
+    """Records are queued unformatted, carrying the caller's request ID."""
+    handler = AsyncQueueHandler(queue.Queue())
+    token = request_id_var.set("req-1")
+    try:
+        handler.handle(
+            make_record("app.api.chat", logging.INFO, "[CHAT] IP %s", "1.2.3.4")
+        )
+    finally:
+        request_id_var.reset(token)
+
+    record = handler.queue.get_nowait()
+    assert (record.msg, record.args) == ("[CHAT] IP %s", ("1.2.3.4",))
+    entry = json.loads(JSONFormatter().format(record))
+    assert entry["message"] == "[CHAT] IP 1.2.3.4"
+    assert entry["request_id"] == "req-1"
+    assert entry["logger"] == "app.api.chat"
+    assert entry["level"] == "INFO"
+
+
+def test_full_queue_drops_records_instead_of_blocking():
+    """A writer that falls behind costs log lines, never event loop time."""
+    handler = AsyncQueueHandler(queue.Queue(maxsize=1))
+    for _ in range(3):
+        handler.handle(make_record("app", logging.INFO, "line"))
+
+    assert handler.queue.qsize() == 1
+    assert handler.dropped == 2
+
+
+def test_sampling_throttles_info_but_keeps_warnings():
+    """Sampled loggers (and their children) drop INFO but never warnings."""
+    sampler = SamplingFilter(parse_sample_rates("app.api=0, app.services=1"))
+
+    assert not sampler.filter(make_record("app.api.chat", logging.INFO, "x"))
+    assert sampler.filter(make_record("app.api.chat", logging.WARNING, "x"))
+    assert sampler.filter(make_record("app.services.cache", logging.INFO, "x"))
+    assert sampler.filter(make_record("app.main", logging.INFO, "x"))
+    assert sampler.dropped == 1
+
+
+def test_repeated_setup_replaces_the_writer_thread():
+    """Setting logging up again (e.g. a reload) leaves one writer running."""
+    first = setup_logging(get_settings())
+    second = setup_logging(get_settings())
+
+    assert first._thread is None
+    assert second._thread is not None and second._thread.is_alive()
+    handlers = [
+        handler
+        for handler in logging.getLogger().handlers
+        if isinstance(handler, AsyncQueueHandler)
+    ]
+    assert [handler.queue for handler in handlers] == [second.queue]
+
+
+def test_request_id_is_generated_or_echoed(test_client: TestClient):
+    """Every response carries a request ID, reusing the client's when given."""
+    generated = test_client.get("/health").headers["X-Request-ID"]
+    echoed = test_client.get("/health", headers={"X-Request-ID": "trace-42"})
+
+    assert len(generated) == 16
+    assert echoed.headers["X-Request-ID"] == "trace-42"
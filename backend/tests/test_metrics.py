@@ -0,0 +1,99 @@
+"""
+Tests for latency instrumentation and the /metrics endpoint.
+
+Run with: pytest tests/test_metrics.py -v
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.services.metrics import Histogram, MetricsRegistry, StreamTimings
+from tests.helpers import FakeStream, fake_service
+
+METRICS_TOKEN = "test-metrics-token"
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Prometheus buckets are cumulative and end with +Inf."""
+    histogram = Histogram("latency_seconds", "Latency", (0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 5.0):
+        histogram.observe(value)
+
+    lines = histogram.render()
+
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1.0"} 3' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in lines
+    assert "latency_seconds_count 4" in lines
+
+
+async def test_upstream_stream_records_timings():
+    """The service should record connect time and token count."""
+    timings = StreamTimings()
+    service = fake_service(FakeStream(["a", "b", "c"]))
+
+    chunks = [c async for c in service.create_chat_stream("Hi", timings=timings)]
+
+    assert chunks == ["a", "b", "c"]
+    assert timings.received_at <= timings.upstream_started <= timings.connected
+    assert timings.tokens == 3
+
+
+def test_stream_summary_observes_histograms():
+    """Recording a finished stream feeds every histogram it has data for."""
+    metrics = MetricsRegistry()
+    timings = StreamTimings(tokens=3)
+    timings.upstream_started = timings.connected = timings.received_at
+    timings.first_frame = timings.received_at
+
+    summary = timings.record(metrics)
+
+    assert summary.startswith("source=upstream queue=0ms connect=0ms ttft=0ms")
+    assert "tokens=3" in summary
+    assert metrics.ttft.count == metrics.duration.count == 1
+
+
+def test_collector_names_are_sanitised_and_counters_typed():
+    """Rule names become valid metric names; only listed keys are gauges."""
+    metrics = MetricsRegistry()
+    metrics.add_collector(
+        "chat_routing",
+        lambda: {"rules": 1, "deep-dive.v2_requests": 4},
+        gauges={"rules"},
+    )
+
+    lines = metrics.render().splitlines()
+
+    assert "# TYPE chat_routing_rules gauge" in lines
+    assert "# TYPE chat_routing_deep_dive_v2_requests_total counter" in lines
+    assert "chat_routing_deep_dive_v2_requests_total 4" in lines
+
+
+def test_metrics_endpoint_exposes_histograms(
+    test_client: TestClient, monkeypatch: pytest.MonkeyPatch
+):
+    """The /metrics endpoint should serve Prometheus text to the scraper."""
+    monkeypatch.setattr(get_settings(), "metrics_token", METRICS_TOKEN)
+    response = test_client.get(
+        "/metrics", headers={"Authorization": f"Bearer {METRICS_TOKEN}"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE chat_time_to_first_token_seconds histogram" in response.text
+    assert "# TYPE chat_cache_hits_total counter" in response.text
+    assert "# TYPE chat_cache_entries gauge" in response.text
+    assert "openai_pool_max_connections " in response.text
+
+
+def test_metrics_endpoint_requires_the_scrape_token(
+    test_client: TestClient, monkeypatch: pytest.MonkeyPatch
+):
+    """Without METRICS_TOKEN it is hidden; with it, other callers are refused."""
+    assert test_client.get("/metrics").status_code == 404
+
+    monkeypatch.setattr(get_settings(), "metrics_token", METRICS_TOKEN)
+    assert test_client.get("/metrics").status_code == 403
+    wrong = {"Authorization": "Bearer wrong-token"}
+    assert test_client.get("/metrics", headers=wrong).status_code == 403
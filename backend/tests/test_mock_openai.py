@@ -0,0 +1,142 @@
+"""
+Tests for the mock OpenAI server and its record/replay cassettes.
+
+The mock runs in-process through an ASGI transport, or on a loopback
+socket when the real HTTP transport is under test (no network calls).
+
+Run with: pytest tests/test_mock_openai.py -v
+"""
+
+import asyncio
+import socket
+from types import SimpleNamespace
+
+import httpx
+import pytest
+import uvicorn
+from fastapi.testclient import TestClient
+from openai import APIStatusError, OpenAIError
+
+from app.config import Settings
+from app.main import app
+from app.services.openai_client import OpenAIClientPool
+from app.services.openai_service import OpenAIService, get_openai_service
+from mock_openai.cassette import Cassette
+from mock_openai.server import MockConfig, asgi_client, create_app, split_reply
+
+FAST = {"ttft_ms": 0, "token_ms": 0, "seed": 1}
+
+
+async def stream_reply(app, message: str = "Hi") -> list[str]:
+    """Run one chat stream through OpenAIService against a mock app."""
+    service = OpenAIService(asgi_client(app))
+    return [chunk async for chunk in service.create_chat_stream(message)]
+
+
+def test_split_reply_keeps_text_intact():
+    """Deltas concatenate back to the reply for both chunking modes."""
+    text = "I test LLM features."
+    assert split_reply(text, 0) == ["I", " test", " LLM", " features."]
+    assert "".join(split_reply(text, 3)) == text
+    assert len(split_reply(text, 3)) == 7
+
+
+async def test_service_streams_mock_reply():
+    """OpenAIService parses the mock stream exactly like the real API."""
+    app = create_app(MockConfig(reply="Playwright and Pytest", chunk_chars=5, **FAST))
+
+    chunks = await stream_reply(app)
+
+    assert chunks == ["Playw", "right", " and ", "Pytes", "t"]
+    assert app.state.requests == 1
+
+
+async def test_error_injection_raises_openai_error():
+    """Injected HTTP errors surface as OpenAIError before any content."""
+    app = create_app(MockConfig(error_rate=1.0, error_status=503, **FAST))
+
+    with pytest.raises(OpenAIError):
+        await stream_reply(app)
+
+
+async def test_midstream_error_arrives_after_partial_content():
+    """An in-band error event fails the stream after some content."""
+    config = MockConfig(reply="one two three four", midstream_error_rate=1.0, **FAST)
+    app = create_app(config)
+    service = OpenAIService(asgi_client(app))
+    received = []
+
+    with pytest.raises(OpenAIError):
+        async for chunk in service.create_chat_stream("Hi"):
+            received.append(chunk)
+    assert received == ["one", " two"]
+
+
+async def test_record_then_replay_is_deterministic(tmp_path):
+    """A recorded stream replays unchanged, and unknown requests fail."""
+    cassette = Cassette(tmp_path)
+    upstream_app = create_app(MockConfig(reply="Recorded answer", **FAST))
+    upstream = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=upstream_app), base_url="http://up/v1/"
+    )
+    recorder = create_app(mode="record", cassette=cassette, upstream=upstream)
+
+    recorded = await stream_reply(recorder, "Who is Vadym?")
+    assert "".join(recorded) == "Recorded answer"
+    assert len(list(tmp_path.glob("*.json"))) == 1
+
+    player = create_app(MockConfig(replay_speed=0), mode="replay", cassette=cassette)
+    assert await stream_reply(player, "Who is Vadym?") == recorded
+    with pytest.raises(OpenAIError):
+        await stream_reply(player, "Something never recorded")
+
+
+async def test_record_relays_upstream_errors_with_their_status(tmp_path):
+    """An upstream rejection reaches the client as that status, unrecorded."""
+    upstream_app = create_app(MockConfig(error_rate=1.0, error_status=429, **FAST))
+    upstream = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=upstream_app), base_url="http://up/v1/"
+    )
+    recorder = create_app(mode="record", cassette=Cassette(tmp_path), upstream=upstream)
+
+    with pytest.raises(APIStatusError) as error:
+        await stream_reply(recorder)
+    assert error.value.status_code == 429
+    assert not list(tmp_path.glob("*.json"))
+
+
+async def test_client_pool_streams_from_mock_server():
+    """The pooled client's own transport and timeouts work with the SDK."""
+    app = create_app(MockConfig(reply="Pooled answer", chunk_chars=6, **FAST))
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning"))
+    serving = asyncio.create_task(server.serve(sockets=[sock]))
+    pool = OpenAIClientPool(
+        Settings(openai_api_key="mock", openai_base_url=f"http://127.0.0.1:{port}/v1")
+    )
+    try:
+        while not server.started:
+            await asyncio.sleep(0.01)
+        service = OpenAIService(pool.client)
+        chunks = [chunk async for chunk in service.create_chat_stream("Hi")]
+    finally:
+        await pool.aclose()
+        server.should_exit = True
+        await serving
+        sock.close()
+
+    assert "".join(chunks) == "Pooled answer"
+
+
+def test_app_lifespan_owns_the_client_pool():
+    """The lifespan opens and closes the pool; without it nothing is opened."""
+    with TestClient(app):
+        request = SimpleNamespace(app=app)
+        pool = app.state.openai_pool
+        assert get_openai_service(request)._client is pool.client
+
+    assert pool.client.is_closed()
+    with pytest.raises(RuntimeError, match="lifespan"):
+        get_openai_service(request)
@@ -0,0 +1,125 @@
+"""
+Tests for complexity-aware model routing.
+
+These tests use a fake OpenAI client (no OpenAI API calls are made).
+
+Run with: pytest tests/test_model_router.py -v
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from app.api.chat import ChatServices, generate_sse_stream
+from app.services.intent_classifier import (
+    EXAMPLES_PATH,
+    Intent,
+    IntentClassifier,
+    get_intent_classifier,
+)
+from app.services.model_router import ModelRoute, ModelRouter, parse_routes
+from app.services.openai_service import DEFAULT_MAX_TOKENS, OpenAIService
+from app.services.prompt_builder import PromptBuilder
+from app.services.response_cache import ResponseCache
+from tests.helpers import FakeStream
+
+ROUTES = (
+    "contact:topic=contact,max_tokens=150,temperature=0.2;"
+    "follow_up:min_history=1,max_chars=40,max_tokens=250;"
+    "deep:min_chars=60,intent=portfolio,model=gpt-4o,max_tokens=900"
+)
+
+
+class CountingClassifier(IntentClassifier):
+    """Intent classifier counting its classifications."""
+
+    calls = 0
+
+    def classify(self, text: str) -> Intent:
+        self.calls += 1
+        return super().classify(text)
+
+
+def make_router(ab_split: float = 0.0) -> ModelRouter:
+    """Build a router over the example rules with the real feature sources."""
+    return ModelRouter(
+        parse_routes(ROUTES),
+        get_intent_classifier(),
+        PromptBuilder(enabled=False, top_k=3, cache_size=8),
+        ab_split=ab_split,
+    )
+
+
+def test_first_matching_rule_picks_the_parameters():
+    """Rules match on topic, history depth, length and intent, in order."""
+    router = make_router()
+    history = [
+        {"role": "user", "content": "Where do you work?"},
+        {"role": "assistant", "content": "At Cytiva."},
+    ]
+    career = "Walk me through your whole career, every company and what you did"
+
+    assert router.route("What's your email?", []) == ModelRoute(
+        max_tokens=150, temperature=0.2, rule="contact", arm="routed"
+    )
+    assert router.route("And before that?", history).name == "follow_up_routed"
+    assert router.route(career, []).model == "gpt-4o"
+    assert router.route("Which tools do you use?", []) == ModelRoute()
+    with pytest.raises(ValueError):
+        parse_routes("brief:max_length=10")
+
+
+def test_ab_split_keeps_whole_conversations_on_the_defaults():
+    """Held-back conversations get default parameters on every turn."""
+    router = make_router(ab_split=0.5)
+    opener = "How can I email you?"
+    conversations = [f"conversation-{n}" for n in range(40)]
+    routes = [router.route(opener, [], conversation=c) for c in conversations]
+    control = [r for r in routes if r.arm == "control"]
+
+    assert 0 < len(control) < len(routes)
+    assert {(r.max_tokens, r.temperature) for r in control} == {
+        (DEFAULT_MAX_TOKENS, None)
+    }
+    history = [
+        {"role": "user", "content": opener},
+        {"role": "assistant", "content": "Email me."},
+    ]
+    for conversation, route in zip(conversations, routes):
+        follow_up = router.route("And your email?", history, conversation=conversation)
+        assert follow_up.arm == route.arm
+    # Without an identifier there is nothing to split on
+    assert router.route(opener, []).arm == "routed"
+
+
+async def test_routed_parameters_reach_upstream_and_are_counted():
+    """The upstream call uses the route; routed answers get their own cache key."""
+    requests: list[dict] = []
+
+    async def create(**kwargs):
+        requests.append(kwargs)
+        return FakeStream(["Email ", "me"])
+
+    chat = SimpleNamespace(completions=SimpleNamespace(create=create))
+    service = OpenAIService(SimpleNamespace(chat=chat))
+    cache = ResponseCache(max_entries=10, max_bytes=10_000, ttl_seconds=60)
+    router = make_router()
+
+    classifier = CountingClassifier.from_file(EXAMPLES_PATH, 0.85)
+    for model_router in (None, router):
+        services = ChatServices(
+            cache=cache, intent_classifier=classifier, model_router=model_router
+        )
+        response = await generate_sse_stream(
+            service, "What's your email?", [], services
+        )
+        [frame async for frame in response.body_iterator]
+
+    assert len(requests) == 2
+    assert classifier.calls == 2  # once per request, shared with the router
+    assert "temperature" not in requests[0]
+    assert requests[1]["max_tokens"] == 150
+    assert requests[1]["temperature"] == 0.2
+    stats = router.stats()
+    assert stats["contact_routed_requests"] == 1
+    assert stats["contact_routed_tokens"] == 2
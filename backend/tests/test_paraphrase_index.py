@@ -0,0 +1,103 @@
+"""
+Tests for the paraphrase index reusing answers to reworded openers.
+
+Run with: pytest tests/test_paraphrase_index.py -v
+"""
+
+from app.api.chat import ChatServices, generate_sse_stream
+from app.services.paraphrase_index import ParaphraseIndex, normalize_question
+from tests.helpers import FakeStream, fake_service
+
+
+def make_index(max_entries: int = 10, threshold: float = 0.85) -> ParaphraseIndex:
+    """Build a small in-process index."""
+    return ParaphraseIndex(max_entries, dims=1024, threshold=threshold)
+
+
+def test_matches_rewordings_but_not_related_questions():
+    """Paraphrases reuse the answer; a question on another topic does not."""
+    index = make_index()
+    index.add("What QA skills do you have?", ["Skills"], "v1")
+    index.add("How can I contact you?", ["Contact"], "v1")
+
+    assert normalize_question("What's your QA skill-set?") == "whats qa skill set"
+    assert index.lookup("what are your QA skills", "v1") == ["Skills"]
+    assert index.lookup("How do I contact you?", "v1") == ["Contact"]
+    assert index.lookup("What QA metrics do you track?", "v1") is None
+    assert index.stats() == {
+        "entries": 2,
+        "hits": 2,
+        "misses": 1,
+        "evictions": 0,
+    }
+
+
+def test_negated_and_opposite_questions_never_match():
+    """Close wording with a different negation or opposite word is a miss."""
+    index = make_index()
+    index.add("What QA skills do you have?", ["Skills"], "v1")
+    index.add("How can I contact you?", ["Contact"], "v1")
+    index.add("What QA skills do you not have?", ["Gaps"], "v1")
+
+    assert index.lookup("How can I not contact you?", "v1") is None
+    assert index.lookup("Which QA skills are you least confident in?", "v1") is None
+    assert index.lookup("Which QA skills do you not have?", "v1") == ["Gaps"]
+    assert index.lookup("Which QA skills do you have?", "v1") == ["Skills"]
+
+
+def test_bounded_with_lru_eviction_and_versioned():
+    """Full: the least recently used entry goes. Other versions never match."""
+    index = make_index(max_entries=2)
+    index.add("What QA skills do you have?", ["Skills"], "v1")
+    index.add("How can I contact you?", ["Contact"], "v1")
+    index.lookup("What are your QA skills?", "v1")
+    index.add("Where do you work now?", ["Job"], "v1")
+
+    assert index.lookup("How do I contact you?", "v1") is None
+    assert index.lookup("where do you work now", "v1") == ["Job"]
+    assert index.stats()["evictions"] == 1
+
+    assert index.lookup("where do you work now", "v2") is None
+    index.add("Where do you work now?", ["Job v2"], "v2")
+    assert index.lookup("where do you work now", "v2") == ["Job v2"]
+    assert index.lookup("where do you work now", "v1") == ["Job"]
+    assert index.stats()["evictions"] == 2
+
+
+async def test_reworded_opener_is_served_without_upstream_call():
+    """A stored answer is replayed as SSE; follow-up turns skip the index."""
+    index = make_index()
+    first = FakeStream(["Selenium ", "and ", "Playwright"])
+    response = await generate_sse_stream(
+        fake_service(first),
+        "What test automation tools do you use?",
+        [],
+        ChatServices(paraphrase_index=index),
+    )
+    original = [frame async for frame in response.body_iterator]
+
+    second = FakeStream(["Not ", "called"])
+    response = await generate_sse_stream(
+        fake_service(second),
+        "Which test automation tools do you use?",
+        [],
+        ChatServices(paraphrase_index=index),
+    )
+    reworded = [frame async for frame in response.body_iterator]
+
+    assert reworded == original
+    assert not second.closed
+
+    follow_up = FakeStream(["Upstream"])
+    history = [
+        {"role": "user", "content": "Hi"},
+        {"role": "assistant", "content": "Hello!"},
+    ]
+    response = await generate_sse_stream(
+        fake_service(follow_up),
+        "Which test automation tools do you use?",
+        history,
+        ChatServices(paraphrase_index=index),
+    )
+    frames = [frame async for frame in response.body_iterator]
+    assert b"Upstream" in b"".join(frames)
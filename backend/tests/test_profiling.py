@@ -0,0 +1,109 @@
+"""
+Tests for the opt-in request profiler.
+
+These tests use a fake OpenAI client (no OpenAI API calls are made).
+
+Run with: pytest tests/test_profiling.py -v
+"""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.main import app
+from app.middleware.profiling import (
+    ProfileStore,
+    RequestProfile,
+    get_profiler,
+)
+from app.services.openai_service import get_openai_service
+from tests.helpers import FakeStream, fake_service
+
+ADMIN_TOKEN = "test-admin-token"
+
+
+@pytest.fixture
+def profile_store(monkeypatch: pytest.MonkeyPatch, tmp_path) -> ProfileStore:
+    """Send profiles to a temporary directory and enable the admin token."""
+    store = ProfileStore(str(tmp_path), max_files=5)
+    monkeypatch.setattr(get_profiler(), "store", store)
+    monkeypatch.setattr(get_settings(), "admin_token", ADMIN_TOKEN)
+    return store
+
+
+def test_store_keeps_a_bounded_ring(tmp_path):
+    """Only the newest profiles are kept, listed newest first."""
+    store = ProfileStore(str(tmp_path), max_files=2)
+    for created in (1, 2, 3):
+        store.save(f"{created}-req{created}-10ms.folded", "task:a;main 1\n")
+
+    assert [p["request_id"] for p in store.list()] == ["req3", "req2"]
+    assert store.read("3-req3-10ms.folded") == "task:a;main 1\n"
+    assert store.read("../secrets.folded") is None
+
+
+async def test_suspended_task_is_sampled_through_async_generators():
+    """Waiting time is attributed along the await chain, generators included."""
+    gate = asyncio.Event()
+
+    async def upstream():
+        await gate.wait()
+        yield "chunk"
+
+    async def handler():
+        async for _ in upstream():
+            pass
+
+    task = asyncio.create_task(handler())
+    await asyncio.sleep(0)
+    profile = RequestProfile(task)
+    profile.sample({})
+    gate.set()
+    await task
+
+    (stack,) = profile.stacks
+    frames = stack.split(";")
+    assert frames[0].startswith("task:")
+    assert [frame.split(" ")[0] for frame in frames[1:4]] == [
+        "test_suspended_task_is_sampled_through_async_generators.<locals>.handler",
+        "test_suspended_task_is_sampled_through_async_generators.<locals>.upstream",
+        "Event.wait",
+    ]
+    assert frames[-1] == "[awaiting]"
+
+
+def test_admin_header_profiles_chat_request(
+    test_client: TestClient, profile_store: ProfileStore
+):
+    """X-Profile with the admin token stores a profile of the request."""
+    stream = FakeStream(["Profiled ", "answer"])
+    app.dependency_overrides[get_openai_service] = lambda: fake_service(stream)
+    try:
+        response = test_client.post(
+            "/api/chat",
+            json={"message": "Which test frameworks do you profile with?"},
+            headers={"X-Profile": "1", "X-Admin-Token": ADMIN_TOKEN},
+        )
+        unprofiled = test_client.post(
+            "/api/chat",
+            json={"message": "Which test frameworks do you profile with?"},
+            headers={"X-Profile": "1", "X-Admin-Token": "wrong"},
+        )
+    finally:
+        app.dependency_overrides.pop(get_openai_service)
+
+    assert response.status_code == unprofiled.status_code == 200
+    (profile,) = profile_store.list()
+    assert profile["request_id"] == response.headers["X-Request-ID"]
+
+    listed = test_client.get(
+        "/api/admin/profiles", headers={"X-Admin-Token": ADMIN_TOKEN}
+    ).json()
+    assert [item["name"] for item in listed] == [profile["name"]]
+    folded = test_client.get(
+        f"/api/admin/profiles/{profile['name']}",
+        headers={"X-Admin-Token": ADMIN_TOKEN},
+    ).text
+    assert all(line.startswith("task:") for line in folded.splitlines())
@@ -0,0 +1,70 @@
+"""
+Tests for retrieval-based system prompt assembly.
+
+Run with: pytest tests/test_prompt_builder.py -v
+"""
+
+from app.prompts.system_prompt import (
+    PROMPT_SECTIONS,
+    SYSTEM_PROMPT,
+    SYSTEM_PROMPT_VERSION,
+    assemble_prompt,
+)
+from app.services.prompt_builder import PromptBuilder
+
+
+def test_full_prompt_is_assembled_from_all_sections():
+    """Splitting the prompt into sections must not change the full text."""
+    assert assemble_prompt(reversed(list(PROMPT_SECTIONS))) == SYSTEM_PROMPT
+
+
+def test_disabled_builder_sends_full_prompt():
+    """Without retrieval every request gets the full prompt."""
+    prompt = PromptBuilder(enabled=False, top_k=3, cache_size=8).build("Hi")
+    assert prompt.text == SYSTEM_PROMPT
+    assert prompt.version == SYSTEM_PROMPT_VERSION
+    assert prompt.tokens_saved == 0
+
+
+def test_greeting_gets_core_prompt_only():
+    """Messages matching no section keep only the persona and core."""
+    prompt = PromptBuilder(enabled=True, top_k=3, cache_size=8).build("Hi")
+    assert prompt.sections == ("summary",)
+    assert "RESPONSE GUIDELINES" in prompt.text
+    assert "RECENT EXPERIENCE" not in prompt.text
+    assert prompt.tokens_saved > 0
+    assert prompt.version != SYSTEM_PROMPT_VERSION
+
+
+def test_relevant_sections_are_retrieved():
+    """Questions pull in the sections that answer them."""
+    builder = PromptBuilder(enabled=True, top_k=3, cache_size=8)
+    assert "contact" in builder.build("How can I contact you?").sections
+    assert "skills" in builder.build("Do you know Selenium?").sections
+    assert "projects" in builder.build("What did you build at Shore?").sections
+
+
+def test_follow_up_uses_recent_history():
+    """A vague follow-up keeps the sections of the previous turn."""
+    builder = PromptBuilder(enabled=True, top_k=3, cache_size=8)
+    history = [
+        {"role": "user", "content": "What is your most recent experience?"},
+        {"role": "assistant", "content": "Senior QA Engineer at Cytiva."},
+    ]
+    assert "experience" not in builder.build("And what came next?").sections
+    assert "experience" in builder.build("And what came next?", history).sections
+
+
+def test_assembled_prompts_are_cached_with_lru_eviction():
+    """Repeated queries hit the cache; the oldest entry is evicted first."""
+    builder = PromptBuilder(enabled=True, top_k=3, cache_size=2)
+    builder.build("How can I contact you?")
+    builder.build("contact you how can I")
+    builder.build("Do you know Selenium?")
+    builder.build("Are you open to contract roles?")
+
+    stats = builder.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+    assert stats["entries"] == 2
+    assert stats["tokens_saved"] > 0
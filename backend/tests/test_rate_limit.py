@@ -0,0 +1,152 @@
+"""
+Tests for shared rate limit storage and token quotas.
+
+These tests make no OpenAI API calls.
+
+Run with: pytest tests/test_rate_limit.py -v
+"""
+
+import asyncio
+import threading
+import uuid
+
+import pytest
+from fastapi import Request
+from fastapi.testclient import TestClient
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import FixedWindowRateLimiter
+
+from app.config import get_settings
+from app.main import app
+from app.middleware import rate_limit, token_quota
+from app.middleware.rate_limit import ChatRateLimited, enforce_chat_limit, limiter
+from app.middleware.token_quota import (
+    MemoryQuotaStorage,
+    SQLiteQuotaStorage,
+    TokenQuota,
+    TokenQuotaExceeded,
+    get_token_quota,
+)
+from app.services.openai_service import get_openai_service
+from app.services.response_cache import get_response_cache
+from tests.helpers import FakeStream, ask_question, fake_service, get_response_text
+
+
+def test_sqlite_storage_is_shared_between_workers(tmp_path):
+    """Two storage instances on one file should share counters."""
+    uri = f"sqlite:///{tmp_path}/limits.db"
+    limit = parse("2/minute")
+    worker_a = FixedWindowRateLimiter(storage_from_string(uri))
+    worker_b = FixedWindowRateLimiter(storage_from_string(uri))
+
+    assert worker_a.hit(limit, "client")
+    assert worker_b.hit(limit, "client")
+    assert not worker_a.hit(limit, "client")
+
+
+async def test_token_quota_rejects_when_bucket_is_empty():
+    """A client over its token budget should get a computed retry time."""
+    quota = TokenQuota(MemoryQuotaStorage(), capacity=100, window=3600)
+    await quota.check("client")
+    await quota.charge("client", 150)
+
+    with pytest.raises(TokenQuotaExceeded) as exc_info:
+        await quota.check("client")
+
+    # 51 tokens of debt at 100 tokens/hour take ~31 minutes to refill
+    assert 1_830 <= exc_info.value.retry_after <= 1_840
+    await quota.check("other-client")
+
+
+async def test_memory_quota_forgets_refilled_buckets(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Buckets of clients that stopped spending don't accumulate."""
+    now = 1_000.0
+    monkeypatch.setattr(token_quota.time, "time", lambda: now)
+    storage = MemoryQuotaStorage()
+    quota = TokenQuota(storage, capacity=100, window=100)
+    for client in range(50):
+        await quota.check(f"reader-{client}")
+    await quota.charge("spender", 10)
+    assert list(storage._buckets) == ["quota:spender"]
+
+    now += token_quota.QUOTA_SWEEP_INTERVAL
+    await quota.check("another-reader")
+    assert storage._buckets == {}
+
+
+async def test_sqlite_quota_is_shared_between_workers(tmp_path):
+    """Token charges from one worker should be visible to another."""
+    path = str(tmp_path / "quota.db")
+    worker_a = TokenQuota(SQLiteQuotaStorage(path), capacity=100, window=3600)
+    worker_b = TokenQuota(SQLiteQuotaStorage(path), capacity=100, window=3600)
+
+    await worker_a.charge("client", 101)
+
+    with pytest.raises(TokenQuotaExceeded):
+        await worker_b.check("client")
+
+
+def test_quota_charges_streamed_tokens_but_not_replays(test_client: TestClient):
+    """Upstream replies cost their streamed tokens; a cached replay is free."""
+    storage = MemoryQuotaStorage()
+    quota = TokenQuota(storage, capacity=100, window=3600)
+    stream = FakeStream(["One ", "two ", "three"])
+    app.dependency_overrides[get_token_quota] = lambda: quota
+    app.dependency_overrides[get_openai_service] = lambda: fake_service(stream)
+    question = f"Quota {uuid.uuid4().hex[:8]}"
+    try:
+        assert get_response_text(ask_question(test_client, question)) == (
+            "One two three"
+        )
+        # A zero refill rate reads the level as it was last written
+        charged = 100 - asyncio.run(storage.apply("quota:testclient", 0, 100, 0))
+        ask_question(test_client, question)
+        replayed = 100 - asyncio.run(storage.apply("quota:testclient", 0, 100, 0))
+    finally:
+        app.dependency_overrides.pop(get_token_quota)
+        app.dependency_overrides.pop(get_openai_service)
+        get_response_cache().clear()
+
+    assert charged == 3
+    assert replayed <= charged
+
+
+async def test_chat_limit_storage_is_hit_off_the_event_loop(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """A storage that blocks (SQLite busy wait) must not stall the loop."""
+    threads = []
+
+    def hit(key: str) -> int:
+        threads.append(threading.current_thread())
+        return 7
+
+    monkeypatch.setattr(rate_limit, "hit_chat_limit", hit)
+    request = Request({"type": "http", "client": ("10.0.0.1", 1234), "headers": []})
+
+    with pytest.raises(ChatRateLimited) as exc_info:
+        await enforce_chat_limit(request)
+
+    assert exc_info.value.retry_after == 7
+    assert threads and threads[0] is not threading.main_thread()
+
+
+def test_chat_limit_uses_settings_and_bucket_state(
+    test_client: TestClient, monkeypatch: pytest.MonkeyPatch
+):
+    """The chat limit should follow settings and report a real Retry-After."""
+    monkeypatch.setattr(get_settings(), "rate_limit_requests", 1)
+    payload = {"message": "Hi", "conversation_id": "missing"}
+    try:
+        assert test_client.post("/api/chat", json=payload).status_code == 404
+
+        response = test_client.post("/api/chat", json=payload)
+
+        assert response.status_code == 429
+        retry_after = int(response.headers["Retry-After"])
+        assert 0 < retry_after <= get_settings().rate_limit_window
+    finally:
+        limiter.reset()
@@ -0,0 +1,250 @@
+"""
+Tests for upstream retries, hedging and the circuit breaker.
+
+These tests use fake upstream streams (no OpenAI API calls are made).
+
+Run with: pytest tests/test_resilience.py -v
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from openai import APIConnectionError
+
+from app.main import app
+from app.services import resilience as resilience_module
+from app.services.metrics import StreamTimings
+from app.services.openai_service import OpenAIService, get_stream_stats
+from app.services.resilience import (
+    FALLBACK_REPLY,
+    CircuitBreaker,
+    CircuitOpen,
+    RetryBudget,
+    UpstreamResilience,
+    UpstreamTimeout,
+    get_upstream_resilience,
+)
+from tests.helpers import FakeStream, ask_question, collect, get_response_text
+
+
+def connection_error() -> APIConnectionError:
+    """Build the error the OpenAI client raises when it cannot connect."""
+    return APIConnectionError(request=httpx.Request("POST", "http://upstream"))
+
+
+def make_policy(**overrides) -> UpstreamResilience:
+    """Build a fast policy for tests."""
+    options = {
+        "max_retries": 2,
+        "backoff": 0.001,
+        "budget": RetryBudget(ratio=0.1, max_tokens=10),
+        "breaker": CircuitBreaker(
+            error_rate=0.5, min_requests=4, window=30, cooldown=15
+        ),
+        "first_token_timeout": 1.0,
+        "stall_timeout": 1.0,
+    }
+    options.update(overrides)
+    return UpstreamResilience(**options)
+
+
+class FakeUpstream:
+    """Upstream factory whose attempts fail, stall or stream in turn."""
+
+    def __init__(self, *behaviours) -> None:
+        self._behaviours = list(behaviours)
+        self.attempts = 0
+        self.closed: list[int] = []
+
+    def __call__(self, timings: StreamTimings):
+        behaviour = self._behaviours[min(self.attempts, len(self._behaviours) - 1)]
+        self.attempts += 1
+        return self._stream(self.attempts, behaviour, timings)
+
+    async def _stream(self, attempt: int, behaviour, timings: StreamTimings):
+        try:
+            if isinstance(behaviour, Exception):
+                raise behaviour
+            delay, chunks = behaviour
+            timings.start_upstream()
+            # Tag the timings so tests can tell which attempt they came from
+            timings.connected = attempt
+            await asyncio.sleep(delay)
+            for chunk in chunks:
+                if isinstance(chunk, Exception):
+                    raise chunk
+                if isinstance(chunk, float):
+                    await asyncio.sleep(chunk)
+                    continue
+                timings.tokens += 1
+                yield chunk
+        finally:
+            self.closed.append(attempt)
+
+
+class SlowFirstClient:
+    """Fake OpenAI client whose first stream is slow and later ones are fast."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        if self.calls == 1:
+            await asyncio.sleep(5)
+        return FakeStream(["fast", " answer"])
+
+
+async def test_connection_failure_is_retried_before_first_token():
+    """A failed connect is retried and the retry spends the budget."""
+    policy = make_policy()
+    upstream = FakeUpstream(connection_error(), (0, ["Hello", "!"]))
+
+    assert await collect(policy.stream(upstream)) == ["Hello", "!"]
+    assert upstream.attempts == 2
+    assert policy.stats()["retries"] == 1
+    assert policy.budget.balance == 9
+
+
+async def test_retries_stop_when_budget_is_spent():
+    """An empty retry budget turns the first failure into an error."""
+    policy = make_policy(budget=RetryBudget(ratio=0.1, max_tokens=1))
+    policy.budget.balance = 0
+    upstream = FakeUpstream(connection_error(), (0, ["never"]))
+
+    with pytest.raises(APIConnectionError):
+        await collect(policy.stream(upstream))
+    assert upstream.attempts == 1
+    assert policy.stats()["retries_denied"] == 1
+
+
+async def test_failure_after_first_token_is_not_retried():
+    """Once content was sent, a failure ends the stream instead of retrying."""
+    policy = make_policy()
+    upstream = FakeUpstream((0, ["partial", connection_error()]))
+
+    received = []
+    with pytest.raises(APIConnectionError):
+        async for chunk in policy.stream(upstream):
+            received.append(chunk)
+    assert received == ["partial"]
+    assert upstream.attempts == 1
+
+
+async def test_stalled_upstream_times_out():
+    """No first token within the deadline raises and releases the stream."""
+    policy = make_policy(max_retries=0, first_token_timeout=0.02)
+    upstream = FakeUpstream((5, ["late"]))
+
+    with pytest.raises(UpstreamTimeout):
+        await collect(policy.stream(upstream))
+    assert upstream.closed == [1]
+    assert policy.stats()["first_token_timeouts"] == 1
+
+
+async def test_stall_after_first_token_ends_the_stream():
+    """A stream going quiet mid-answer raises and is counted as a stall."""
+    policy = make_policy(stall_timeout=0.02)
+    upstream = FakeUpstream((0, ["partial", 5.0, "never"]))
+
+    received = []
+    with pytest.raises(UpstreamTimeout):
+        async for chunk in policy.stream(upstream):
+            received.append(chunk)
+    assert received == ["partial"]
+    assert upstream.closed == [1]
+    assert policy.stats()["stall_timeouts"] == 1
+
+
+async def test_hedged_request_wins_and_loser_is_cancelled():
+    """A slow first attempt is hedged and the faster answer is kept."""
+    policy = make_policy(hedge=True, hedge_min_delay=0.01)
+    policy._ttfts.extend([0.001] * resilience_module.HEDGE_MIN_SAMPLES)
+    upstream = FakeUpstream((5, ["slow"]), (0, ["fast", "er"]))
+    timings = StreamTimings()
+
+    assert await collect(policy.stream(upstream, timings)) == ["fast", "er"]
+    assert upstream.closed == [1, 2]
+    assert (timings.connected, timings.tokens) == (2, 2)
+    stats = policy.stats()
+    assert (stats["hedges"], stats["hedge_wins"], stats["hedge_losers"]) == (1, 1, 1)
+
+
+async def test_attempt_waiting_for_admission_is_not_hedged():
+    """Queue time neither triggers a hedge nor counts toward the TTFT samples."""
+    policy = make_policy(hedge=True, hedge_min_delay=0.01)
+    policy._ttfts.extend([0.001] * resilience_module.HEDGE_MIN_SAMPLES)
+    attempts = []
+
+    async def queued(timings: StreamTimings):
+        attempts.append(timings)
+        # Waiting for an admission slot, well past the hedge delay
+        await asyncio.sleep(0.05)
+        timings.start_upstream()
+        yield "answer"
+
+    assert await collect(policy.stream(queued)) == ["answer"]
+    assert len(attempts) == 1
+    assert policy.stats()["hedges"] == 0
+    assert policy._ttfts[-1] < 0.05
+
+
+async def test_hedge_loser_is_not_counted_as_client_cancellation():
+    """Dropping the losing attempt leaves the disconnect counters alone."""
+    policy = make_policy(hedge=True, hedge_min_delay=0.01)
+    policy._ttfts.extend([0.001] * resilience_module.HEDGE_MIN_SAMPLES)
+    service = OpenAIService(SlowFirstClient())
+    cancelled = get_stream_stats().cancelled
+
+    def attempt(timings: StreamTimings):
+        return service.create_chat_stream("Hi", timings=timings)
+
+    assert await collect(policy.stream(attempt)) == ["fast", " answer"]
+    assert get_stream_stats().cancelled == cancelled
+    assert policy.stats()["hedge_losers"] == 1
+
+
+async def test_circuit_opens_on_errors_and_probe_closes_it(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """An error spike opens the circuit; a good probe after cooldown closes it."""
+    now = 1_000.0
+    monkeypatch.setattr(resilience_module.time, "monotonic", lambda: now)
+    policy = make_policy(max_retries=0)
+    for _ in range(4):
+        policy.check()
+        with pytest.raises(APIConnectionError):
+            await collect(policy.stream(FakeUpstream(connection_error())))
+
+    with pytest.raises(CircuitOpen) as excinfo:
+        policy.check()
+    assert excinfo.value.retry_after == 15
+
+    now += 16
+    policy.check()  # the half-open probe
+    with pytest.raises(CircuitOpen):
+        policy.check()
+    assert await collect(policy.stream(FakeUpstream((0, ["ok"])))) == ["ok"]
+
+    policy.check()
+    assert policy.breaker.state == "closed"
+    assert policy.stats()["circuit_opened"] == 1
+
+
+def test_open_circuit_serves_fallback_reply(test_client: TestClient):
+    """With the circuit open the chat endpoint answers with a canned reply."""
+    policy = make_policy(breaker=CircuitBreaker(0.5, 1, 30, 60))
+    policy.breaker.record(False)
+    app.dependency_overrides[get_upstream_resilience] = lambda: policy
+    try:
+        response = ask_question(test_client, "What projects did you lead lately?")
+    finally:
+        app.dependency_overrides.pop(get_upstream_resilience)
+
+    assert response.status_code == 200
+    assert get_response_text(response) == FALLBACK_REPLY
+    assert policy.stats()["fallbacks"] == 1
@@ -0,0 +1,181 @@
+"""
+Tests for the exact-match response cache.
+
+These tests make no OpenAI API calls; cache hits are served locally.
+
+Run with: pytest tests/test_response_cache.py -v
+"""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.chat import warm_response_cache
+from app.prompts.example_questions import load_example_questions
+from app.prompts.system_prompt import SYSTEM_PROMPT_VERSION
+from app.services import response_cache as response_cache_module
+from app.services.openai_service import OpenAIService
+from app.services.response_cache import (
+    ResponseCache,
+    SQLiteResponseStore,
+    get_response_cache,
+)
+from tests.helpers import FakeStream, ask_question, fake_service, get_response_text
+
+
+def make_cache(**overrides) -> ResponseCache:
+    """Build a small cache for tests."""
+    options = {"max_entries": 2, "max_bytes": 1_000, "ttl_seconds": 60}
+    options.update(overrides)
+    return ResponseCache(**options)
+
+
+def test_cache_key_ignores_case_and_whitespace():
+    """Equivalent messages should share one cache key."""
+    key = ResponseCache.make_key("model", "v1", [], "Hi  there")
+    assert key == ResponseCache.make_key("model", "v1", [], " hi there ")
+    assert key != ResponseCache.make_key("model", "v2", [], "Hi there")
+
+
+def test_cache_evicts_least_recently_used():
+    """Cache should evict the least recently used entry when full."""
+    cache = make_cache()
+    cache.set("a", ["A"])
+    cache.set("b", ["B"])
+    assert cache.get("a") == ["A"]
+
+    cache.set("c", ["C"])
+
+    assert cache.get("b") is None
+    assert cache.get("a") == ["A"]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_bounds_total_bytes():
+    """Cache should evict entries to stay within its byte budget."""
+    cache = make_cache(max_entries=10, max_bytes=10)
+    cache.set("a", ["12345"])
+    cache.set("b", ["123456"])
+
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 6
+
+
+def test_cache_expires_entries(monkeypatch: pytest.MonkeyPatch):
+    """Cache should drop entries older than the TTL."""
+    now = 1_000.0
+    monkeypatch.setattr(response_cache_module.time, "monotonic", lambda: now)
+    cache = make_cache(ttl_seconds=10)
+    cache.set("a", ["A"])
+
+    now += 11
+
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_chat_replays_cached_response(test_client: TestClient):
+    """A cached answer should be streamed back with the usual SSE framing."""
+    cache = get_response_cache()
+    key = cache.make_key(
+        OpenAIService(client=None).model,
+        SYSTEM_PROMPT_VERSION,
+        [],
+        "Cached question",
+    )
+    cache.set(key, ["Hello ", "from ", "cache"])
+    try:
+        response = ask_question(test_client, "cached question")
+
+        assert response.status_code == 200
+        assert response.text.endswith("data: [DONE]\n\n")
+        assert get_response_text(response) == "Hello from cache"
+    finally:
+        cache.clear()
+
+
+def make_store(path, namespace: str = "model:v1") -> SQLiteResponseStore:
+    """Open a persistent tier in a temporary file."""
+    return SQLiteResponseStore(
+        str(path), namespace=namespace, ttl_seconds=60, max_entries=2
+    )
+
+
+async def test_persistent_tier_is_shared_between_workers(tmp_path):
+    """A response stored by one worker is served from disk by another."""
+    path = tmp_path / "responses.db"
+    make_cache(persistent=make_store(path)).set("a", ["From ", "disk"])
+    other_worker = make_cache(persistent=make_store(path))
+
+    assert await other_worker.lookup("a") == ["From ", "disk"]
+    assert other_worker.get("a") == ["From ", "disk"]  # promoted to memory
+    assert other_worker.stats()["persistent_hits"] == 1
+    assert await other_worker.lookup("missing") is None
+
+
+def test_persistent_tier_is_bounded_and_namespaced(tmp_path):
+    """Old rows are trimmed; another deployed version neither sees nor drops them."""
+    path = tmp_path / "responses.db"
+    store = make_store(path)
+    for key in ("a", "b", "c"):
+        store.set(key, [key])
+    assert store.count() == 2
+    assert store.get("a") is None
+
+    assert make_store(path, namespace="model:v2").get("c") is None
+    assert make_store(path).get("c") == ["c"]
+
+
+def test_clear_keeps_other_versions_rows(tmp_path):
+    """Flushing one deployed version leaves another version's answers."""
+    path = tmp_path / "responses.db"
+    other_version = make_store(path, namespace="model:v2")
+    other_version.set("a", ["Other ", "version"])
+    cache = make_cache(persistent=make_store(path))
+    cache.set("b", ["This ", "version"])
+
+    assert cache.clear() == {"entries": 1, "persistent_entries": 1}
+    assert other_version.get("a") == ["Other ", "version"]
+
+
+async def test_failed_persistent_write_is_logged(tmp_path, monkeypatch):
+    """A write failing in the worker thread is logged, not lost silently."""
+    errors = []
+    monkeypatch.setattr(
+        response_cache_module.logger, "error", lambda *args, **kw: errors.append(args)
+    )
+    store = make_store(tmp_path / "responses.db")
+    cache = make_cache(persistent=store)
+    store._db.close()
+
+    cache.set("a", ["Memory ", "only"])
+    await asyncio.gather(*cache._writes, return_exceptions=True)
+
+    assert cache.get("a") == ["Memory ", "only"]
+    assert errors == [("[CACHE] Persistent write failed",)]
+    assert not cache._writes
+
+
+def test_example_questions_are_read_from_frontend():
+    """The warm-up list comes from the frontend's example questions."""
+    questions = load_example_questions(
+        "../frontend/src/types/example-questions.ts"
+    )
+    assert "How can I contact you?" in questions
+    assert load_example_questions("missing.ts") == []
+
+
+async def test_warming_fills_the_cache_once():
+    """Warm-up answers each question once; later runs replay from cache."""
+    cache = get_response_cache()
+    questions = ["Warm-up question about QA metrics"]
+    first = FakeStream(["Warm ", "answer"])
+    second = FakeStream(["Not ", "called"])
+    try:
+        assert await warm_response_cache(fake_service(first), questions) == 1
+        assert await warm_response_cache(fake_service(second), questions) == 1
+        assert first.closed
+        assert not second.closed
+    finally:
+        cache.clear()
@@ -0,0 +1,121 @@
+"""
+Tests for server-side conversation sessions.
+
+These tests make no OpenAI API calls.
+
+Run with: pytest tests/test_sessions.py -v
+"""
+
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import session_store as session_store_module
+from app.services.openai_service import get_openai_service
+from app.services.session_store import MemorySessionStore, SQLiteSessionStore
+from tests.helpers import FakeStream, fake_service, get_response_text, history_from_turn
+
+
+async def test_memory_store_round_trip():
+    """Stored turns should come back in order."""
+    store = MemorySessionStore(ttl_seconds=60, max_bytes=10_000)
+    conversation_id = await store.create(history_from_turn("Hi", "Hello!"))
+    await store.append(conversation_id, history_from_turn("And?", "More."))
+
+    history = await store.load(conversation_id)
+
+    assert [item["content"] for item in history] == ["Hi", "Hello!", "And?", "More."]
+    assert await store.load("unknown") is None
+
+
+async def test_memory_store_expires_idle_sessions(monkeypatch: pytest.MonkeyPatch):
+    """Sessions should expire after the TTL without activity."""
+    now = 1_000.0
+    monkeypatch.setattr(session_store_module.time, "monotonic", lambda: now)
+    store = MemorySessionStore(ttl_seconds=10, max_bytes=10_000)
+    conversation_id = await store.create()
+
+    now += 11
+
+    assert await store.load(conversation_id) is None
+
+
+async def test_memory_store_evicts_least_recent_over_cap():
+    """The global memory cap should evict the least recently used session."""
+    store = MemorySessionStore(ttl_seconds=60, max_bytes=100)
+    old = await store.create(history_from_turn("q" * 40, "a" * 40))
+    new = await store.create(history_from_turn("q" * 40, "a" * 40))
+
+    assert await store.load(old) is None
+    assert await store.load(new) is not None
+    assert store.stats()["evictions"] == 1
+
+
+async def test_sqlite_store_round_trip(tmp_path):
+    """The SQLite backend should persist turns across store instances."""
+    path = str(tmp_path / "sessions.db")
+    store = SQLiteSessionStore(path, ttl_seconds=60, max_bytes=10_000)
+    conversation_id = await store.create(history_from_turn("Hi", "Hello!"))
+    await store.append(conversation_id, history_from_turn("And?", "More."))
+
+    reopened = SQLiteSessionStore(path, ttl_seconds=60, max_bytes=10_000)
+
+    assert await reopened.load(conversation_id) == [
+        *history_from_turn("Hi", "Hello!"),
+        *history_from_turn("And?", "More."),
+    ]
+
+
+def test_chat_rejects_unknown_conversation(test_client: TestClient):
+    """Unknown or expired conversations should return 404."""
+    response = test_client.post(
+        "/api/chat", json={"message": "Hi", "conversation_id": "missing"}
+    )
+
+    assert response.status_code == 404
+    assert response.json() == {"error": "Conversation not found"}
+
+
+def test_session_keeps_the_conversation_server_side(test_client: TestClient):
+    """Replies are stored after streaming and sent upstream on the next turn."""
+    requests: list[dict] = []
+    topic = uuid.uuid4().hex[:8]
+    first = fake_service(FakeStream(["Selenium ", "mostly"]), requests)
+    app.dependency_overrides[get_openai_service] = lambda: first
+    try:
+        response = test_client.post(
+            "/api/chat", json={"message": f"Tools for {topic}?", "session": True}
+        )
+        conversation_id = response.headers["X-Conversation-Id"]
+        assert get_response_text(response) == "Selenium mostly"
+
+        second = fake_service(FakeStream(["Yes"]), requests)
+        app.dependency_overrides[get_openai_service] = lambda: second
+        response = test_client.post(
+            "/api/chat",
+            json={"message": "And Playwright?", "conversation_id": conversation_id},
+        )
+    finally:
+        app.dependency_overrides.pop(get_openai_service, None)
+
+    assert response.headers["X-Conversation-Id"] == conversation_id
+    assert get_response_text(response) == "Yes"
+    sent = [(m["role"], m["content"]) for m in requests[1]["messages"][1:]]
+    assert sent == [
+        ("user", f"Tools for {topic}?"),
+        ("assistant", "Selenium mostly"),
+        ("user", "And Playwright?"),
+    ]
+
+
+async def test_sqlite_store_stats_come_from_memory(tmp_path):
+    """Totals are kept by each query, so stats never touches the database."""
+    store = SQLiteSessionStore(
+        str(tmp_path / "sessions.db"), ttl_seconds=60, max_bytes=10_000
+    )
+    await store.create(history_from_turn("Hi", "Hello!"))
+    store._db.close()
+
+    assert store.stats() == {"sessions": 1, "bytes": 21, "evictions": 0}
@@ -0,0 +1,106 @@
+"""
+Tests for coalescing identical in-flight completions.
+
+These tests use fake upstream streams (no OpenAI API calls are made).
+
+Run with: pytest tests/test_singleflight.py -v
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.api.chat import ChatServices, plan_reply
+from app.services.openai_service import OpenAIService
+from app.services.singleflight import SingleFlight
+from tests.helpers import FakeStream, collect
+
+
+async def fake_stream(chunks: list[str], gate: asyncio.Event | None = None):
+    """Yield chunks, optionally pausing after the first until a gate opens."""
+    for index, chunk in enumerate(chunks):
+        yield chunk
+        if index == 0 and gate is not None:
+            await gate.wait()
+
+
+async def test_identical_requests_share_one_upstream_stream():
+    """Late subscribers should replay chunks produced before they joined."""
+    registry = SingleFlight()
+    gate = asyncio.Event()
+    calls = []
+
+    def factory():
+        calls.append(1)
+        return fake_stream(["a", "b", "c"], gate)
+
+    completed = []
+    first = registry.join("key", factory, on_complete=completed.append)
+    first_task = asyncio.create_task(collect(first.subscribe()))
+    await asyncio.sleep(0)
+
+    second = registry.join("key", factory)
+    second_task = asyncio.create_task(collect(second.subscribe()))
+    gate.set()
+
+    assert await first_task == ["a", "b", "c"]
+    assert await second_task == ["a", "b", "c"]
+    assert len(calls) == 1
+    assert completed == [["a", "b", "c"]]
+    assert registry.stats() == {"in_flight": 0, "started": 1, "coalesced": 1}
+
+
+async def test_slow_subscriber_does_not_stall_others():
+    """A subscriber that stops reading must not hold back the stream."""
+    registry = SingleFlight()
+    flight = registry.join("key", lambda: fake_stream(["a", "b", "c"]))
+    stalled = flight.subscribe()
+    assert await anext(stalled) == "a"
+
+    assert await collect(flight.subscribe()) == ["a", "b", "c"]
+    assert await collect(stalled) == ["b", "c"]
+
+
+async def test_upstream_error_reaches_every_subscriber():
+    """Subscribers should see the upstream error after the buffered chunks."""
+
+    async def failing_stream():
+        yield "a"
+        raise ValueError("upstream failed")
+
+    registry = SingleFlight()
+    flight = registry.join("key", failing_stream)
+
+    received = []
+    with pytest.raises(ValueError):
+        async for chunk in flight.subscribe():
+            received.append(chunk)
+    assert received == ["a"]
+
+
+async def test_follower_stays_on_its_flight_after_the_leader_finishes():
+    """A reply planned as a follower never becomes an unchecked new leader."""
+    calls = []
+
+    async def create(**kwargs):
+        calls.append(kwargs)
+        return FakeStream(["shared ", "answer"])
+
+    completions = SimpleNamespace(create=create)
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    service = OpenAIService(client)
+    registry = SingleFlight()
+    services = ChatServices(singleflight=registry)
+
+    leader = await plan_reply(service, "Coalesced question", [], services)
+    leader_chunks = leader.open()
+    follower = await plan_reply(service, "Coalesced question", [], services)
+    # Planned but not yet subscribed: it could still be rejected
+    assert registry.coalesced == 0
+
+    assert "".join(await collect(leader_chunks)) == "shared answer"
+    assert "".join(await collect(follower.open())) == "shared answer"
+    assert len(calls) == 1
+    assert follower.timings.source == "shared"
+    assert registry.stats() == {"in_flight": 0, "started": 1, "coalesced": 1}
@@ -0,0 +1,54 @@
+"""
+Tests for SSE framing and chunk coalescing.
+
+Run with: pytest tests/test_sse.py -v
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.services.sse import coalesce_chunks, content_frame
+from tests.helpers import collect
+
+
+async def paced_stream(chunks: list[str], delay: float = 0.0):
+    """Yield chunks with a fixed delay before each one."""
+    for chunk in chunks:
+        await asyncio.sleep(delay)
+        yield chunk
+
+
+@pytest.mark.parametrize(
+    "content", ["Hi", 'quote " and \\ slash', "line\nbreak", "Ünïcode — ✓"]
+)
+def test_content_frame_matches_json_dumps(content: str):
+    """Pre-encoded frames should be byte-identical to the json.dumps framing."""
+    expected = f"data: {json.dumps({'content': content})}\n\n".encode()
+    assert content_frame(content) == expected
+
+
+async def test_first_chunk_is_flushed_alone():
+    """The first token must not wait in the coalescing buffer."""
+    chunks = await collect(coalesce_chunks(paced_stream(list("abcdef")), 3, 1.0))
+    assert chunks == ["a", "bcd", "ef"]
+
+
+async def test_flush_size_counts_encoded_bytes():
+    """Multi-byte characters count by their UTF-8 size, not as one each."""
+    chunks = await collect(coalesce_chunks(paced_stream(list("aéébc")), 4, 1.0))
+    assert chunks == ["a", "éé", "bc"]
+
+
+async def test_buffer_flushes_after_max_delay():
+    """Buffered chunks should be flushed when the upstream pauses."""
+    source = paced_stream(["a", "b", "c"], delay=0.05)
+    chunks = await collect(coalesce_chunks(source, 1_000, 0.01))
+    assert chunks == ["a", "b", "c"]
+
+
+async def test_zero_bytes_disables_coalescing():
+    """Coalescing can be switched off entirely."""
+    chunks = await collect(coalesce_chunks(paced_stream(list("abc")), 0, 1.0))
+    assert chunks == ["a", "b", "c"]
@@ -0,0 +1,95 @@
+"""
+Tests for the incremental SSE client helpers.
+
+Run with: pytest tests/test_sse_helpers.py -v
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.openai_service import get_openai_service
+from tests.helpers import (
+    FakeStream,
+    SSEEvent,
+    SSEParser,
+    assert_first_content_within,
+    assert_no_gap_longer_than,
+    assert_stream_completed,
+    collect_events,
+    events_text,
+    fake_service,
+    parse_sse,
+)
+
+BODY = (
+    'data: {"content": "Ünïcode ✓"}\n\n'
+    ": keep-alive comment\r\n"
+    "id: 7\r\n"
+    "data: first line\r\n"
+    "data: second line\r\n\r\n"
+    "data: [DONE]\n\n"
+).encode()
+
+
+def test_parser_handles_frames_split_at_any_byte():
+    """Events are identical however the body is split across reads."""
+    expected = parse_sse([BODY])
+    assert [event.data for event in expected] == [
+        '{"content": "Ünïcode ✓"}',
+        "first line\nsecond line",
+        "[DONE]",
+    ]
+    assert expected[1].id == "7"
+
+    for split in range(1, len(BODY)):
+        assert parse_sse([BODY[:split], BODY[split:]]) == expected
+    assert parse_sse(BODY[i : i + 1] for i in range(len(BODY))) == expected
+
+
+def test_parser_keeps_only_the_unfinished_tail():
+    """A long body in one read yields every event and buffers just the tail."""
+    parser = SSEParser()
+    events = parser.feed(BODY * 2_000 + b"data: par")
+
+    assert len(events) == 3 * 2_000
+    assert parser._buffer == b"data: par"
+    assert parser.feed(b"tial\n\n")[0].data == "partial"
+
+
+def test_events_are_stamped_with_arrival_time():
+    """Each event carries the arrival time of the read that completed it."""
+    parser = SSEParser()
+    assert parser.feed(b'data: {"content": "a"}', 0.1) == []
+    (event,) = parser.feed(b"\n\n", 0.25)
+    assert event.elapsed == 0.25
+    assert event.content == "a"
+
+
+def test_timing_assertions():
+    """Timing assertions report slow first content and long gaps."""
+    events = [
+        SSEEvent('{"content": "a"}', 0.05),
+        SSEEvent('{"content": "b"}', 0.40),
+        SSEEvent("[DONE]", 0.42),
+    ]
+    assert_stream_completed(events)
+    assert_first_content_within(events, 100)
+    with pytest.raises(AssertionError, match="First content after 50ms"):
+        assert_first_content_within(events, 10)
+    assert_no_gap_longer_than(events, 400)
+    with pytest.raises(AssertionError, match="350ms gap"):
+        assert_no_gap_longer_than(events, 200)
+
+
+def test_collect_events_from_chat_endpoint():
+    """The helper streams /api/chat through any httpx-compatible client."""
+    stream = FakeStream(["Playwright", " and", " Pytest"])
+    app.dependency_overrides[get_openai_service] = lambda: fake_service(stream)
+    try:
+        events = collect_events(TestClient(app), "Which tools do you use?")
+    finally:
+        app.dependency_overrides.pop(get_openai_service)
+
+    assert_stream_completed(events)
+    assert events_text(events) == "Playwright and Pytest"
@@ -0,0 +1,117 @@
+"""
+Tests for releasing the upstream stream when the client goes away.
+
+These tests use a fake OpenAI client (no OpenAI API calls are made).
+
+Run with: pytest tests/test_stream_cancellation.py -v
+"""
+
+import asyncio
+import json
+import uuid
+
+from app.main import app
+from app.services.openai_service import get_openai_service, get_stream_stats
+from app.services.singleflight import SingleFlight
+from tests.helpers import FakeStream, fake_service
+
+
+class EndlessStream(FakeStream):
+    """Fake upstream response that keeps producing until closed."""
+
+    async def __aiter__(self):
+        while True:
+            async for chunk in super().__aiter__():
+                yield chunk
+            await asyncio.sleep(0.01)
+
+
+async def test_early_close_releases_upstream_stream():
+    """Closing the chunk iterator early should close the upstream response."""
+    stats = get_stream_stats()
+    cancelled, tokens_saved = stats.cancelled, stats.tokens_saved
+    stream = FakeStream(["a", "b", "c"])
+    chunks = fake_service(stream).create_chat_stream("Hi")
+
+    assert await anext(chunks) == "a"
+    await chunks.aclose()
+
+    assert stream.closed
+    assert stats.cancelled == cancelled + 1
+    assert stats.tokens_saved == tokens_saved + 499
+
+
+async def test_completed_stream_is_not_counted_as_cancelled():
+    """A fully consumed stream is closed but not counted as cancelled."""
+    stats = get_stream_stats()
+    cancelled = stats.cancelled
+    stream = FakeStream(["a", "b"])
+
+    assert [c async for c in fake_service(stream).create_chat_stream("Hi")] == [
+        "a",
+        "b",
+    ]
+    assert stream.closed
+    assert stats.cancelled == cancelled
+
+
+async def test_last_subscriber_leaving_cancels_shared_stream():
+    """A shared completion should stop once every subscriber has left."""
+    stream = FakeStream(["a"] * 100)
+    flight = SingleFlight().join(
+        "key", lambda: fake_service(stream).create_chat_stream("Hi")
+    )
+    subscriber = flight.subscribe()
+    assert await anext(subscriber) == "a"
+
+    await subscriber.aclose()
+    await asyncio.sleep(0.01)
+
+    assert flight.done
+    assert stream.closed
+    assert len(flight.chunks) < 100
+
+
+async def test_client_disconnect_closes_upstream_of_chat_endpoint():
+    """By default a dropped POST /api/chat client stops the generation."""
+    stream = EndlessStream(["word "])
+    app.dependency_overrides[get_openai_service] = lambda: fake_service(stream)
+    message = f"Walk me through your QA career {uuid.uuid4().hex[:8]}"
+    body = json.dumps({"message": message}).encode()
+    requested = False
+    first_frame = asyncio.Event()
+
+    async def receive() -> dict:
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await first_frame.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        if message["type"] == "http.response.body" and message.get("body"):
+            first_frame.set()
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/api/chat",
+        "raw_path": b"/api/chat",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    try:
+        await asyncio.wait_for(app(scope, receive, send), timeout=5)
+        await asyncio.sleep(0.05)
+    finally:
+        app.dependency_overrides.pop(get_openai_service)
+
+    assert first_frame.is_set()
+    assert stream.closed
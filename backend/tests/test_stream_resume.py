@@ -0,0 +1,218 @@
+"""
+Tests for resuming SSE streams with Last-Event-ID.
+
+These tests use a fake OpenAI client (no OpenAI API calls are made).
+
+Run with: pytest tests/test_stream_resume.py -v
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.chat import (
+    ChatServices,
+    generate_sse_stream,
+    resume_sse_stream,
+)
+from app.main import app
+from app.services import stream_buffer as stream_buffer_module
+from app.services.openai_service import OpenAIService, get_openai_service
+from app.services.stream_buffer import (
+    StreamBuffer,
+    get_stream_buffer,
+    parse_event_id,
+)
+from tests.helpers import FakeStream, events_text, fake_service, parse_sse
+
+
+class GatedStream(FakeStream):
+    """Fake upstream that pauses after the first chunk until released."""
+
+    def __init__(self, chunks: list[str]) -> None:
+        super().__init__(chunks)
+        self.gate = asyncio.Event()
+
+    async def __aiter__(self):
+        for index, content in enumerate(self._chunks):
+            if index == 1:
+                await self.gate.wait()
+            delta = SimpleNamespace(content=content)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+def counting_service(stream: FakeStream) -> tuple[OpenAIService, list[dict]]:
+    """Build a fake service that records each upstream call."""
+    calls: list[dict] = []
+
+    async def create(**kwargs):
+        calls.append(kwargs)
+        return stream
+
+    completions = SimpleNamespace(create=create)
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return OpenAIService(client), calls
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        ("abc123:4", ("abc123", 4)),
+        ("abc123:0", ("abc123", 0)),
+        ("abc123", None),
+        ("abc123:-1", None),
+        ("", None),
+        (None, None),
+    ],
+)
+def test_parse_event_id(value, expected):
+    """Only well-formed ``<stream_id>:<offset>`` values are accepted."""
+    assert parse_event_id(value) == expected
+
+
+async def test_finished_stream_resumes_from_last_event_id():
+    """A reconnect gets the remaining frames without a new upstream call."""
+    service, calls = counting_service(FakeStream(["One ", "two ", "three"]))
+    buffer = StreamBuffer(max_bytes=1_000, ttl=60, linger=1.0)
+
+    services = ChatServices(stream_buffer=buffer)
+    response = await generate_sse_stream(service, "Hi", [], services)
+    events = parse_sse([frame async for frame in response.body_iterator])
+    stream_id = response.headers["X-Stream-Id"]
+
+    offsets = list(range(1, len(events)))
+    assert [event.id for event in events] == [
+        f"{stream_id}:{n}" for n in [*offsets, offsets[-1]]
+    ]
+    assert events[-1].done
+
+    stream_id, offset = parse_event_id(events[0].id)
+    resumed = resume_sse_stream(stream_id, buffer.get(stream_id), offset)
+    rest = parse_sse([frame async for frame in resumed.body_iterator])
+
+    assert events_text(rest) == "two three"
+    assert rest[-1].done
+    assert len(calls) == 1
+    assert buffer.stats()["resumed"] == 1
+
+
+async def test_running_stream_survives_disconnect_and_resumes():
+    """Generation continues through the grace period and is followed live."""
+    stream = GatedStream(["Still ", "going ", "on"])
+    buffer = StreamBuffer(max_bytes=1_000, ttl=60, linger=5.0)
+    response = await generate_sse_stream(
+        fake_service(stream), "Hi", [], ChatServices(stream_buffer=buffer)
+    )
+    body = response.body_iterator
+    first = parse_sse([await anext(body)])
+    await body.aclose()  # client disconnects mid-stream
+
+    stream.gate.set()
+    stream_id, offset = parse_event_id(first[0].id)
+    resumed = resume_sse_stream(stream_id, buffer.get(stream_id), offset)
+    rest = parse_sse([frame async for frame in resumed.body_iterator])
+
+    assert events_text(first + rest) == "Still going on"
+    assert rest[-1].done
+
+
+async def test_abandoned_stream_is_cancelled_after_grace_period():
+    """Without a reconnect the upstream is released once the grace ends."""
+    stream = GatedStream(["a", "b"])
+    buffer = StreamBuffer(max_bytes=1_000, ttl=60, linger=0.01)
+    response = await generate_sse_stream(
+        fake_service(stream), "Hi", [], ChatServices(stream_buffer=buffer)
+    )
+    body = response.body_iterator
+    await anext(body)
+    await body.aclose()
+
+    await asyncio.sleep(0.05)
+
+    assert stream.closed
+    stream_id = response.headers["X-Stream-Id"]
+    resumed = resume_sse_stream(stream_id, buffer.get(stream_id), 1)
+    frames = [frame async for frame in resumed.body_iterator]
+    assert parse_sse(frames)[-1].payload == {"error": "Failed to generate response"}
+
+
+async def test_buffer_evicts_expired_and_oversized_streams(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Finished streams expire after the TTL and the oldest go first when full."""
+    now = 1_000.0
+    monkeypatch.setattr(stream_buffer_module.time, "monotonic", lambda: now)
+
+    async def chunks(text: str):
+        yield text
+
+    buffer = StreamBuffer(max_bytes=10, ttl=60, linger=0)
+    first = buffer.open("first", chunks("123456"))
+    await asyncio.sleep(0)
+    second = buffer.open("second", chunks("123456"))
+    await asyncio.sleep(0)
+    assert first.done and second.done
+
+    assert buffer.get("first") is None  # over the byte budget
+    assert buffer.get("second") is second
+
+    now += 61
+    first.finished_at = second.finished_at = 1_000.0
+    assert buffer.get("second") is None
+    assert buffer.stats() == {"streams": 0, "bytes": 0, "resumed": 1, "evicted": 2}
+
+
+def test_chat_endpoint_resumes_with_last_event_id(test_client: TestClient):
+    """POST /api/chat with Last-Event-ID continues the same response."""
+    service, calls = counting_service(FakeStream(["Resumable ", "answer"]))
+    buffer = StreamBuffer(max_bytes=1_000, ttl=60, linger=1.0)
+    app.dependency_overrides[get_openai_service] = lambda: service
+    app.dependency_overrides[get_stream_buffer] = lambda: buffer
+    try:
+        body = {"message": "Tell me about resumable streams please"}
+        response = test_client.post("/api/chat", json=body)
+        stream_id = response.headers["X-Stream-Id"]
+
+        resumed = test_client.post(
+            "/api/chat", json=body, headers={"Last-Event-ID": f"{stream_id}:1"}
+        )
+    finally:
+        app.dependency_overrides.pop(get_openai_service)
+        app.dependency_overrides.pop(get_stream_buffer)
+
+    assert resumed.headers["X-Stream-Id"] == stream_id
+    assert events_text(parse_sse([resumed.content])) == "answer"
+    assert len(calls) == 1
+
+
+def test_chat_endpoint_answers_new_message_despite_stale_last_event_id(
+    test_client: TestClient,
+):
+    """A different request carrying an old Last-Event-ID gets its own answer."""
+    service, calls = counting_service(FakeStream(["Fresh ", "answer"]))
+    buffer = StreamBuffer(max_bytes=1_000, ttl=60, linger=1.0)
+    app.dependency_overrides[get_openai_service] = lambda: service
+    app.dependency_overrides[get_stream_buffer] = lambda: buffer
+    try:
+        first = test_client.post(
+            "/api/chat", json={"message": "Tell me about stale stream IDs please"}
+        )
+        stream_id = first.headers["X-Stream-Id"]
+
+        second = test_client.post(
+            "/api/chat",
+            json={"message": "And how do you test reconnects?"},
+            headers={"Last-Event-ID": f"{stream_id}:1"},
+        )
+    finally:
+        app.dependency_overrides.pop(get_openai_service)
+        app.dependency_overrides.pop(get_stream_buffer)
+
+    assert second.headers["X-Stream-Id"] != stream_id
+    assert [call["messages"][-1]["content"] for call in calls] == [
+        "Tell me about stale stream IDs please",
+        "And how do you test reconnects?",
+    ]
+    assert buffer.stats()["resumed"] == 0
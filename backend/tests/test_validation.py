@@ -10,6 +10,8 @@ Run with: pytest tests/test_validation.py -v
 import pytest
 from fastapi.testclient import TestClient
 
+from tests.config import MAX_HISTORY_CONTENT_LENGTH
+
 
 @pytest.mark.parametrize(
     "payload",
@@ -18,6 +20,12 @@ from fastapi.testclient import TestClient
         {"msg": "Hello"},
         {},
         {"message": None},
+        {
+            "message": "Hello",
+            "history": [
+                {"role": "user", "content": "x" * (MAX_HISTORY_CONTENT_LENGTH + 1)}
+            ],
+        },
     ],
 )
 def test_chat_rejects_invalid_payloads(test_client: TestClient, payload: dict):